@@ -1,45 +1,50 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from app.db import base as db_base
 from app.db import models
 from app.utils.security import get_current_admin
+from app.utils.cache import response_cache
+from app.utils.live import live_dashboard
+from app.utils.profiling import query_budget
+from app.core.config import CHRONIC_ABSENCE_PCT
 from datetime import date, timedelta
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
 @router.get("/dashboard")
-def get_dashboard_stats(db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_admin)):
+@query_budget(5)
+async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_admin)):
     today = date.today()
+    return await response_cache.respond(request, lambda: _dashboard_stats(db, today), today)
+
+async def _dashboard_stats(db: AsyncSession, today: date) -> dict:
+    total_students = await db.scalar(select(func.count(models.Student.id)))
     
-    total_students = db.query(func.count(models.Student.id)).scalar()
-    
-    today_attendance = db.query(models.Attendance).filter(
-        models.Attendance.attendance_date == today
-    ).count()
-    
-    today_present = db.query(models.Attendance).filter(
-        models.Attendance.attendance_date == today,
-        models.Attendance.status == "present"
-    ).count()
-    
-    today_absent = db.query(models.Attendance).filter(
-        models.Attendance.attendance_date == today,
-        models.Attendance.status == "absent"
-    ).count()
+    # attendance figures come from the pre-aggregated daily summary, not the attendance table
+    Summary = models.DailyClassSummary
+    today_counts = dict((await db.execute(
+        select(Summary.status, func.sum(Summary.count))
+        .where(Summary.attendance_date == today)
+        .group_by(Summary.status)
+    )).all())
+    today_attendance = sum(today_counts.values())
+    today_present = today_counts.get("present", 0)
+    today_absent = today_counts.get("absent", 0)
     
     week_ago = today - timedelta(days=7)
-    week_attendance = db.query(
-        models.Attendance.attendance_date,
-        func.count(models.Attendance.id).label("count")
-    ).filter(
-        models.Attendance.attendance_date >= week_ago
-    ).group_by(models.Attendance.attendance_date).all()
+    week_attendance = (await db.execute(select(
+        Summary.attendance_date,
+        func.sum(Summary.count).label("count")
+    ).where(
+        Summary.attendance_date >= week_ago
+    ).group_by(Summary.attendance_date).order_by(Summary.attendance_date))).all()
     
-    class_stats = db.query(
+    class_stats = (await db.execute(select(
         models.Student.class_name,
         func.count(models.Student.id).label("student_count")
-    ).group_by(models.Student.class_name).all()
+    ).group_by(models.Student.class_name))).all()
     
     return {
         "total_students": total_students,
@@ -60,12 +65,157 @@ def get_dashboard_stats(db: Session = Depends(db_base.get_db), current_user: int
         ]
     }
 
+@router.get("/dashboard/stream")
+@query_budget(1)
+async def stream_dashboard(db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_admin)):
+    """
+    Server-sent events with today's per-class counts: a `snapshot` event on connect (and after
+    each resync), then a `counts` event with the classes that changed after every write.
+    """
+    # the request's session (admin check) would otherwise hold a pooled connection for the whole stream
+    await db.close()
+    listener = live_dashboard.subscribe()
+    if listener is None:
+        raise HTTPException(503, "Too many dashboard listeners on this server")
+    return StreamingResponse(
+        live_dashboard.events(listener, _live_counts),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _live_counts() -> tuple[date, int, dict[str, dict[str, int]]]:
+    today = date.today()
+    Summary = models.DailyClassSummary
+    # own session: the stream outlives the request-scoped dependency
+    async with db_base.AsyncSessionLocal() as db:
+        total_students = await db.scalar(select(func.count(models.Student.id)))
+        counts = {}
+        for class_name, status, count in await db.execute(
+            select(Summary.class_name, Summary.status, Summary.count).where(Summary.attendance_date == today)
+        ):
+            counts.setdefault(class_name, {})[status] = count
+    return today, total_students, counts
+
 @router.get("/students/without-photo")
-def students_without_photo(db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_admin)):
-    students = db.query(models.Student).filter(
+@query_budget(2)
+async def students_without_photo(request: Request, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_admin)):
+    return await response_cache.respond(request, lambda: _students_without_photo(db))
+
+async def _students_without_photo(db: AsyncSession) -> dict:
+    students = (await db.scalars(select(models.Student).where(
         (models.Student.photo_path == None) | (models.Student.photo_path == "")
-    ).all()
+    ))).all()
     return {
         "count": len(students),
         "students": [{"id": s.id, "roll_no": s.roll_no, "name": s.name} for s in students]
     }
+
+@router.get("/analytics/students")
+@query_budget(5)
+async def student_analytics(
+    request: Request,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    class_name: str | None = None,
+    chronic_only: bool = False,
+    chronic_threshold: float = Query(CHRONIC_ABSENCE_PCT, ge=0, le=100),
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_admin)
+):
+    return await response_cache.respond(
+        request, lambda: _student_analytics(db, from_date, to_date, class_name, chronic_only, chronic_threshold)
+    )
+
+async def _roster_stats(db: AsyncSession, from_date: date | None, to_date: date | None, class_name: str | None):
+    """Roster rows plus the analytics arrays restricted (and aligned) to them."""
+    # NumPy and the columnar mirror load on the first analytics request, not at worker boot
+    import numpy as np
+    from app.utils.analytics import attendance_columns
+
+    q = select(models.Student.id, models.Student.roll_no, models.Student.name, models.Student.class_name)
+    if class_name:
+        q = q.where(models.Student.class_name == class_name)
+    roster = (await db.execute(q.order_by(models.Student.id))).all()
+    await attendance_columns.refresh(db)
+
+    ids = np.fromiter((r[0] for r in roster), dtype=np.int64, count=len(roster))
+    stats = attendance_columns.student_stats(from_date, to_date, size=int(ids.max()) + 1 if len(ids) else 0)
+    return roster, {name: column[ids] for name, column in stats.items()}
+
+def _nan_to_none(values) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+async def _student_analytics(db: AsyncSession, from_date, to_date, class_name, chronic_only, chronic_threshold) -> dict:
+    import numpy as np
+    from app.utils.analytics import percentage
+
+    roster, stats = await _roster_stats(db, from_date, to_date, class_name)
+    absence_pct = percentage(stats["absent"], stats["marked"])
+    chronic = absence_pct >= chronic_threshold  # NaN (never marked) compares False
+    columns = {name: column.tolist() for name, column in stats.items()}
+    columns["attendance_pct"] = _nan_to_none(percentage(stats["present"], stats["marked"]))
+    columns["absence_pct"] = _nan_to_none(absence_pct)
+    columns["chronic"] = chronic.tolist()
+
+    rows = np.flatnonzero(chronic).tolist() if chronic_only else range(len(roster))
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "chronic_threshold": chronic_threshold,
+        "count": len(rows),
+        "students": [
+            {
+                "student_id": roster[i][0],
+                "roll_no": roster[i][1],
+                "name": roster[i][2],
+                "class_name": roster[i][3],
+                **{name: column[i] for name, column in columns.items()},
+            }
+            for i in rows
+        ],
+    }
+
+@router.get("/analytics/classes")
+@query_budget(5)
+async def class_analytics(
+    request: Request,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    chronic_threshold: float = Query(CHRONIC_ABSENCE_PCT, ge=0, le=100),
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_admin)
+):
+    return await response_cache.respond(request, lambda: _class_analytics(db, from_date, to_date, chronic_threshold))
+
+async def _class_analytics(db: AsyncSession, from_date, to_date, chronic_threshold) -> dict:
+    import numpy as np
+    from app.utils.analytics import percentage
+
+    roster, stats = await _roster_stats(db, from_date, to_date, None)
+    classes, class_index = np.unique(np.array([r[3] or "" for r in roster], dtype=object), return_inverse=True)
+    n = len(classes)
+
+    def per_class(values):
+        return np.bincount(class_index, weights=values, minlength=n).astype(np.int64)
+
+    chronic = percentage(stats["absent"], stats["marked"]) >= chronic_threshold
+    totals = {name: per_class(stats[name]) for name in ("marked", "present", "absent", "leave")}
+    longest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(longest, class_index, stats["longest_absence_streak"])
+    columns = {
+        "students": np.bincount(class_index, minlength=n).tolist(),
+        **{name: column.tolist() for name, column in totals.items()},
+        "attendance_pct": _nan_to_none(percentage(totals["present"], totals["marked"])),
+        "absence_pct": _nan_to_none(percentage(totals["absent"], totals["marked"])),
+        "chronic_absentees": per_class(chronic).tolist(),
+        "longest_absence_streak": longest.tolist(),
+    }
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "chronic_threshold": chronic_threshold,
+        "classes": [
+            {"class_name": cls or "Unassigned", **{name: column[i] for name, column in columns.items()}}
+            for i, cls in enumerate(classes.tolist())
+        ],
+    }
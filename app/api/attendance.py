@@ -1,53 +1,402 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import exc, func, insert, tuple_, select, update, and_, or_
+from app.core.config import SYNC_MAX_CHANGES, SYNC_SETTLE_SECONDS
 from app.db import base as db_base
 from app.db import models
-from app.schemas.attendance import AttendanceMark, AttendanceOut
+from app.db import summary
+from app.db.archive import archives
+from app.db.dialect import dialect_insert
+from app.db.writer import write_queue
+from app.schemas.attendance import (
+    AttendanceMark, AttendanceOut, AttendanceUpdate, AttendanceBulkMark, AttendanceBulkResult, AttendanceConflict,
+    AttendanceSync, AttendanceSyncResult, SyncMarkResult, SyncPolicy,
+)
 from app.utils.security import get_current_user
-from datetime import datetime, date, UTC
+from app.utils.cache import invalidate_responses
+from app.utils.jsonenc import ORJSONResponse, dumps
+from app.utils.live import live_dashboard
+from app.utils.register import Register, month_bounds, XLSX_MEDIA_TYPE
+from app.utils.profiling import query_budget
+from datetime import datetime, date, timedelta, UTC
+from collections import Counter
+from typing import Literal
+from itertools import islice
+import base64
+import binascii
 import csv
 import io
+import re
+import zlib
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
+A = models.Attendance
+# columns handed back by INSERT/upsert ... RETURNING: what AttendanceOut and the audit row need
+_RETURNED = (A.id, A.student_id, A.attendance_date, A.timestamp, A.status, A.note)
+
+def _attendance_out(rows) -> list[dict]:
+    """AttendanceOut dicts of table rows (selected as _RETURNED) or archived rows, without per-row validation."""
+    return [{"id": r.id, "student_id": r.student_id, "attendance_date": r.attendance_date, "timestamp": r.timestamp,
+             "status": r.status, "note": r.note} for r in rows]
+
+def _audit_rows(rows, changed_by: int, source: str) -> list[dict]:
+    """attendance_audit rows for written (id, student_id, attendance_date, timestamp, status, note) rows."""
+    return [
+        {"attendance_id": att_id, "student_id": sid, "attendance_date": att_date, "status": status, "note": note,
+         "changed_by": changed_by, "changed_at": ts, "source": source}
+        for att_id, sid, att_date, ts, status, note in rows
+    ]
+
+def _archived_reason(att_date: date, boundary: date | None) -> str | None:
+    """`boundary` is archives.boundary, read once per request: reading it stats the archive directory."""
+    if boundary and att_date < boundary:
+        return f"Attendance before {boundary.isoformat()} is archived and can no longer be changed"
+    return None
+
+def _check_not_archived(att_date: date):
+    reason = _archived_reason(att_date, archives.boundary)
+    if reason:
+        raise HTTPException(409, reason)
+
+async def _upsert_mark(db: AsyncSession, student: models.Student, att_date: date, status: str, note: str | None,
+                       current_user: int, source: str):
+    now = models.utcnow()
+
+    async def write(wdb: AsyncSession):
+        stmt = dialect_insert(wdb, models.Attendance).values(
+            student_id=student.id, attendance_date=att_date, status=status, note=note, marked_by=current_user, timestamp=now,
+        )
+        # one statement on SQLite and PostgreSQL: insert the day's mark, or overwrite it in place
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[A.student_id, A.attendance_date],
+            set_={c: stmt.excluded[c] for c in ("status", "note", "marked_by", "timestamp")},
+        )
+        row = (await wdb.execute(stmt.returning(*_RETURNED))).one()
+        await wdb.execute(insert(models.AttendanceAudit), _audit_rows([row], current_user, source))
+        # the previous status was never read, so recount the class's day instead of bumping it
+        counts = await wdb.run_sync(summary.recount, att_date, student.class_name)
+        return row, counts
+
+    row, counts = await write_queue.run(db, write)
+    invalidate_responses()
+    live_dashboard.replace(att_date, student.class_name or "", counts)
+    return row
+
 @router.post("/mark", response_model=AttendanceOut)
-def mark_attendance(payload: AttendanceMark, db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_user)):
-    student = db.query(models.Student).filter(models.Student.id == payload.student_id).first()
+@query_budget(4)
+async def mark_attendance(
+    payload: AttendanceMark,
+    on_duplicate: Literal["error", "update"] = "error",
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_user)
+):
+    student = await db.get(models.Student, payload.student_id)
     if not student:
         raise HTTPException(404, "Student not found")
     
     att_date = payload.date if payload.date else date.today()
+    _check_not_archived(att_date)
+    if on_duplicate == "update":
+        return await _upsert_mark(db, student, att_date, payload.status.value, payload.note, current_user, "mark")
     
-    try:
+    class_key = summary.summary_key(att_date, student.class_name, payload.status)
+
+    async def write(wdb: AsyncSession):
         att = models.Attendance(
             student_id=payload.student_id, 
             status=payload.status, 
             note=payload.note, 
             marked_by=current_user,
             attendance_date=att_date,
-            timestamp=datetime.now(UTC)
+            timestamp=models.utcnow()
         )
-        db.add(att)
-        db.commit()
-        db.refresh(att)
+        wdb.add(att)
+        await wdb.flush()
+        await wdb.run_sync(summary.bump, Counter([class_key]))
+        await wdb.execute(insert(models.AttendanceAudit), _audit_rows(
+            [(att.id, att.student_id, att.attendance_date, att.timestamp, att.status, att.note)], current_user, "mark"
+        ))
         return att
+
+    try:
+        att = await write_queue.run(db, write)
     except exc.IntegrityError:
-        db.rollback()
         raise HTTPException(400, "Attendance already marked for this student on this date")
+    invalidate_responses()
+    live_dashboard.publish(Counter([class_key]))
+    return att
 
-@router.get("/", response_model=list[AttendanceOut])
-def list_attendance(
-    student_id: int | None = None, 
-    class_name: str | None = None, 
-    from_date: date | None = None, 
-    to_date: date | None = None, 
-    db: Session = Depends(db_base.get_db),
+@router.put("/{student_id}/{attendance_date}", response_model=AttendanceOut)
+@query_budget(4)
+async def put_attendance(
+    student_id: int,
+    attendance_date: date,
+    payload: AttendanceUpdate,
+    db: AsyncSession = Depends(db_base.get_async_db),
     current_user: int = Depends(get_current_user)
 ):
-    q = db.query(models.Attendance).join(models.Student)
-    
+    """Set a student's mark for a day, creating it or correcting it (e.g. absent -> present)."""
+    _check_not_archived(attendance_date)
+    student = await db.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(404, "Student not found")
+    return await _upsert_mark(db, student, attendance_date, payload.status.value, payload.note, current_user, "put")
+
+async def _bulk_mark(db: AsyncSession, payload: AttendanceBulkMark, current_user: int, class_name: str | None = None) -> AttendanceBulkResult:
+    default_date = payload.date or date.today()
+    student_ids = {r.student_id for r in payload.records}
+
+    # one set-based lookup for every student in the batch
+    students = dict((await db.execute(
+        select(models.Student.id, models.Student.class_name)
+        .where(models.Student.id.in_(student_ids))
+    )).all())
+    keys = {(r.student_id, r.date or default_date) for r in payload.records}
+    already_marked = set((await db.execute(
+        select(models.Attendance.student_id, models.Attendance.attendance_date)
+        .where(tuple_(models.Attendance.student_id, models.Attendance.attendance_date).in_(keys))
+    )).all())
+
+    now, boundary = models.utcnow(), archives.boundary
+    rows, conflicts, seen = [], [], set()
+    for index, record in enumerate(payload.records):
+        att_date = record.date or default_date
+        key = (record.student_id, att_date)
+        reason = None
+        if record.student_id not in students:
+            reason = "Student not found"
+        elif archived := _archived_reason(att_date, boundary):
+            reason = archived
+        elif class_name is not None and students[record.student_id] != class_name:
+            reason = f"Student is not in class {class_name}"
+        elif key in already_marked:
+            reason = "Attendance already marked for this student on this date"
+        elif key in seen:
+            reason = "Duplicate entry in batch"
+        if reason:
+            conflicts.append(AttendanceConflict(index=index, student_id=record.student_id, reason=reason))
+            continue
+        seen.add(key)
+        rows.append({
+            "student_id": record.student_id,
+            "status": record.status.value,
+            "note": record.note,
+            "marked_by": current_user,
+            "attendance_date": att_date,
+            "timestamp": now,
+        })
+
+    if rows:
+        counts = Counter(summary.summary_key(r["attendance_date"], students[r["student_id"]], r["status"]) for r in rows)
+
+        async def write(wdb: AsyncSession):
+            # single executemany insert, committed once; render_nulls keeps rows with and without a note in one batch
+            created = await wdb.execute(
+                insert(models.Attendance).returning(*_RETURNED).execution_options(render_nulls=True), rows
+            )
+            await wdb.execute(insert(models.AttendanceAudit).execution_options(render_nulls=True),
+                              _audit_rows(created, current_user, "bulk"))
+            await wdb.run_sync(summary.bump, counts)
+
+        try:
+            await write_queue.run(db, write)
+        except exc.IntegrityError:
+            raise HTTPException(409, "Attendance was marked concurrently for some students; retry the batch")
+        invalidate_responses()
+        live_dashboard.publish(counts)
+    return AttendanceBulkResult(created=len(rows), conflicts=conflicts)
+
+@router.post("/mark-bulk", response_model=AttendanceBulkResult)
+@query_budget(5)
+async def mark_attendance_bulk(payload: AttendanceBulkMark, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    return await _bulk_mark(db, payload, current_user)
+
+@router.post("/classes/{class_name}/mark", response_model=AttendanceBulkResult)
+@query_budget(5)
+async def mark_class_attendance(class_name: str, payload: AttendanceBulkMark, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    return await _bulk_mark(db, payload, current_user, class_name=class_name)
+
+def _utc_naive(value: datetime) -> datetime:
+    # DateTime columns hold naive UTC; compare device clocks on the same footing
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+def _encode_watermark(ts: datetime, att_id: int) -> str:
+    raw = f"{ts.isoformat()}|{att_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_watermark(watermark: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(watermark + "=" * (-len(watermark) % 4)).decode()
+        ts, att_id = raw.split("|")
+        return _utc_naive(datetime.fromisoformat(ts)), int(att_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(400, "Invalid watermark")
+
+async def _apply_sync_marks(db: AsyncSession, payload: AttendanceSync, current_user: int) -> list[SyncMarkResult]:
+    A, Op = models.Attendance, models.SyncOperation
+    recorded = {op.idempotency_key: op for op in await db.scalars(
+        select(Op).where(Op.user_id == current_user, Op.idempotency_key.in_({m.idempotency_key for m in payload.marks}))
+    )}
+    fresh = [m for m in payload.marks if m.idempotency_key not in recorded]
+    pairs = {(m.student_id, m.date) for m in fresh}
+    students, existing, device_times = {}, {}, {}
+    if fresh:
+        students = dict((await db.execute(
+            select(models.Student.id, models.Student.class_name).where(models.Student.id.in_({m.student_id for m in fresh}))
+        )).all())
+        existing = {(sid, d): (att_id, status, note, ts) for att_id, sid, d, status, note, ts in await db.execute(
+            select(A.id, A.student_id, A.attendance_date, A.status, A.note, A.timestamp)
+            .where(tuple_(A.student_id, A.attendance_date).in_(pairs))
+        )}
+    if existing and payload.policy == SyncPolicy.last_writer_wins:
+        # marks that arrived through sync are ordered by when they were made, not when they were uploaded
+        device_times = {(sid, d): t for sid, d, t in await db.execute(
+            select(Op.student_id, Op.attendance_date, func.max(Op.marked_at))
+            .where(tuple_(Op.student_id, Op.attendance_date).in_(list(existing)), Op.outcome.in_(("created", "updated")))
+            .group_by(Op.student_id, Op.attendance_date)
+        )}
+
+    # (student_id, date) -> the mark the server will hold once the batch is applied
+    state = {
+        key: {"id": att_id, "status": status, "note": note, "marked_at": device_times.get(key, ts), "changed": False}
+        for key, (att_id, status, note, ts) in existing.items()
+    }
+    # each result with the (student_id, date) whose attendance id it reports, once known
+    results: list[tuple[SyncMarkResult, tuple | None]] = []
+    by_key: dict[str, tuple[SyncMarkResult, tuple | None]] = {}
+    ops, boundary = [], archives.boundary
+    for m in payload.marks:
+        op = recorded.get(m.idempotency_key)
+        if op is not None:
+            results.append((SyncMarkResult(idempotency_key=op.idempotency_key, outcome=op.outcome, attendance_id=op.attendance_id,
+                                           reason=op.reason, replayed=True), None))
+            continue
+        if m.idempotency_key in by_key:  # repeated within the batch
+            first, key = by_key[m.idempotency_key]
+            results.append((first.model_copy(update={"replayed": True}), key))
+            continue
+        key = (m.student_id, m.date)
+        marked_at = _utc_naive(m.marked_at)
+        current = state.get(key)
+        outcome, reason = None, None
+        if m.student_id not in students:
+            reason = "Student not found"
+        elif archived := _archived_reason(m.date, boundary):
+            reason = archived
+        elif payload.class_name is not None and students[m.student_id] != payload.class_name:
+            reason = f"Student is not in class {payload.class_name}"
+        elif current is None:
+            outcome = "created"
+            state[key] = {"id": None, "status": m.status.value, "note": m.note, "marked_at": marked_at, "changed": True}
+        elif current["status"] == m.status.value and current["note"] == m.note:
+            outcome = "unchanged"
+        elif payload.policy == SyncPolicy.reject:
+            reason = "Attendance already marked for this student on this date"
+        elif marked_at <= current["marked_at"]:
+            reason = "A later mark exists for this student on this date"
+        else:
+            outcome = "updated"
+            current.update(status=m.status.value, note=m.note, marked_at=marked_at, changed=True)
+        result = SyncMarkResult(idempotency_key=m.idempotency_key, outcome=outcome or "rejected", reason=reason)
+        by_key[m.idempotency_key] = (result, None if reason else key)
+        results.append(by_key[m.idempotency_key])
+        ops.append((result, {"user_id": current_user, "idempotency_key": m.idempotency_key, "student_id": m.student_id,
+                             "attendance_date": m.date, "marked_at": marked_at, "outcome": result.outcome, "reason": reason}))
+
+    now = models.utcnow()
+    inserts = [(key, mark) for key, mark in state.items() if mark["changed"] and key not in existing]
+    updates = [(key, mark) for key, mark in state.items() if mark["changed"] and key in existing]
+    counts = Counter()
+    for (sid, d), mark in inserts + updates:
+        counts[summary.summary_key(d, students[sid], mark["status"])] += 1
+        if (sid, d) in existing:
+            counts[summary.summary_key(d, students[sid], existing[(sid, d)][1])] -= 1
+    counts = Counter({key: n for key, n in counts.items() if n})  # keeps decrements, unlike +counts
+
+    async def write(wdb: AsyncSession):
+        if inserts:
+            created = await wdb.execute(
+                # rows come back keyed by (student_id, date), so no per-row RETURNING order is needed
+                insert(A).returning(A.id, A.student_id, A.attendance_date).execution_options(render_nulls=True),
+                [{"student_id": sid, "attendance_date": d, "status": mark["status"], "note": mark["note"],
+                  "marked_by": current_user, "timestamp": now} for (sid, d), mark in inserts],
+            )
+            for att_id, sid, d in created:
+                state[(sid, d)]["id"] = att_id
+        if updates:
+            # timestamp is the server-side change time that delta sync and the analytics mirror follow
+            await wdb.execute(update(A), [
+                {"id": mark["id"], "status": mark["status"], "note": mark["note"], "marked_by": current_user, "timestamp": now}
+                for _, mark in updates
+            ])
+        if inserts or updates:
+            await wdb.execute(insert(models.AttendanceAudit).execution_options(render_nulls=True), _audit_rows(
+                [(mark["id"], sid, d, now, mark["status"], mark["note"]) for (sid, d), mark in inserts + updates],
+                current_user, "sync",
+            ))
+        await wdb.run_sync(summary.bump, counts)
+        for result, key in results:
+            if key is not None:
+                result.attendance_id = state[key]["id"]
+        if ops:
+            # render_nulls: one executemany even though reason/attendance_id are None on some rows
+            await wdb.execute(insert(Op).execution_options(render_nulls=True),
+                              [row | {"attendance_id": result.attendance_id} for result, row in ops])
+
+    if ops:
+        try:
+            await write_queue.run(db, write)
+        except exc.IntegrityError:
+            # a concurrent write to the same day, or the same key retried in parallel: replaying the batch is safe
+            raise HTTPException(409, "Attendance changed concurrently; retry the sync")
+        if inserts or updates:
+            invalidate_responses()
+            live_dashboard.publish(counts)
+    return [result for result, _ in results]
+
+async def _sync_changes(db: AsyncSession, since: str | None, class_name: str | None) -> tuple[list, str, bool]:
+    """Attendance rows changed after the watermark, in (timestamp, id) order, plus the next watermark."""
+    A = models.Attendance
+    q = select(A)
+    if class_name is not None:
+        q = q.join(models.Student).where(models.Student.class_name == class_name)
+    if since:
+        ts, att_id = _decode_watermark(since)
+        q = q.where(or_(A.timestamp > ts, and_(A.timestamp == ts, A.id > att_id)))
+    rows = (await db.scalars(q.order_by(A.timestamp, A.id).limit(SYNC_MAX_CHANGES + 1))).all()
+    has_more = len(rows) > SYNC_MAX_CHANGES
+    rows = rows[:SYNC_MAX_CHANGES]
+
+    settled = models.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    if rows and (has_more or rows[-1].timestamp <= settled):
+        watermark = _encode_watermark(rows[-1].timestamp, rows[-1].id)
+    elif rows or not since:
+        # recent changes stay ahead of the watermark (and are sent again next time) until they settle
+        watermark = _encode_watermark(settled, 0)
+    else:
+        watermark = since
+    return rows, watermark, has_more
+
+@router.post("/sync", response_model=AttendanceSyncResult)
+@query_budget(10)
+async def sync_attendance(payload: AttendanceSync, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    """
+    Offline device sync: apply a batch of marks in one transaction, then return the attendance
+    changed on the server since the device's watermark.
+
+    Each mark carries a client-generated idempotency key, so a device can resend the whole batch
+    after a dropped connection: recorded keys return their original outcome. The body may be sent
+    with Content-Encoding: gzip.
+    """
+    results = await _apply_sync_marks(db, payload, current_user) if payload.marks else []
+    changes, watermark, has_more = await _sync_changes(db, payload.since, payload.class_name)
+    return AttendanceSyncResult(results=results, changes=changes, watermark=watermark, has_more=has_more)
+
+STREAM_CHUNK_SIZE = 1000
+
+def _apply_filters(q, student_id, class_name, from_date, to_date):
     if student_id:
         q = q.filter(models.Attendance.student_id == student_id)
     if class_name:
@@ -56,50 +405,225 @@ def list_attendance(
         q = q.filter(models.Attendance.attendance_date >= from_date)
     if to_date:
         q = q.filter(models.Attendance.attendance_date <= to_date)
-    
-    return q.order_by(models.Attendance.attendance_date.desc()).all()
+    return q
+
+def _encode_cursor(att_date: date, att_id: int) -> str:
+    raw = f"{att_date.isoformat()}|{att_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        att_date, att_id = raw.split("|")
+        return date.fromisoformat(att_date), int(att_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(400, "Invalid cursor")
+
+def _after_cursor(q, cursor: str):
+    # keyset condition matching ORDER BY attendance_date DESC, id DESC
+    att_date, att_id = _decode_cursor(cursor)
+    return q.filter(or_(
+        models.Attendance.attendance_date < att_date,
+        and_(models.Attendance.attendance_date == att_date, models.Attendance.id < att_id),
+    ))
+
+_KEYSET_ORDER = (models.Attendance.attendance_date.desc(), models.Attendance.id.desc())
+
+def _reads_table(boundary: date | None, to_date: date | None, cursor: str | None) -> bool:
+    """False when the requested range lies wholly in the archive, which holds every day before its boundary."""
+    ends = [d for d in (to_date, _decode_cursor(cursor)[0] if cursor else None) if d]
+    return boundary is None or not ends or min(ends) >= boundary
+
+def _archived_rows(boundary, student_id, class_name, from_date, to_date, cursor):
+    """Archived rows continuing a listing (all older than the table's), or None if the range doesn't reach back."""
+    if boundary is None or (from_date and from_date >= boundary):
+        return None
+    return archives.rows(student_id, class_name, from_date, to_date, _decode_cursor(cursor) if cursor else None)
+
+@router.get("/", response_model=list[AttendanceOut], response_class=ORJSONResponse)
+@query_budget(1)
+async def list_attendance(
+    student_id: int | None = None, 
+    class_name: str | None = None, 
+    from_date: date | None = None, 
+    to_date: date | None = None, 
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_user)
+):
+    rows, boundary = [], archives.boundary
+    if _reads_table(boundary, to_date, cursor):
+        q = select(*_RETURNED).join(models.Student)
+        q = _apply_filters(q, student_id, class_name, from_date, to_date)
+        if cursor:
+            q = _after_cursor(q, cursor)
+        q = q.order_by(*_KEYSET_ORDER)
+        rows = (await db.execute(q if limit is None else q.limit(limit + 1))).all()
+    archived = _archived_rows(boundary, student_id, class_name, from_date, to_date, cursor)
+    if archived is not None and (limit is None or len(rows) <= limit):
+        rows = [*rows, *islice(archived, None if limit is None else limit + 1 - len(rows))]
+
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].attendance_date, rows[-1].id)
+    # the rows come from the database in AttendanceOut's shape, so they skip response_model validation
+    return ORJSONResponse(_attendance_out(rows), headers=headers)
+
+@router.get("/stream")
+@query_budget(1)
+async def stream_attendance(
+    student_id: int | None = None,
+    class_name: str | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    cursor: str | None = None,
+    current_user: int = Depends(get_current_user)
+):
+    stmt = select(*_RETURNED).join(models.Student)
+    stmt = _apply_filters(stmt, student_id, class_name, from_date, to_date)
+    if cursor:
+        stmt = _after_cursor(stmt, cursor)
+    stmt = stmt.order_by(*_KEYSET_ORDER)
+    boundary = archives.boundary
+    archived = _archived_rows(boundary, student_id, class_name, from_date, to_date, cursor)
+
+    def lines(rows) -> bytes:
+        return b"".join(dumps(row) + b"\n" for row in _attendance_out(rows))
+
+    async def generate():
+        if _reads_table(boundary, to_date, cursor):
+            # own session: the response outlives the request-scoped dependency
+            async with db_base.AsyncSessionLocal() as db:
+                result = await db.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+                async for partition in result.partitions():
+                    yield lines(partition)
+        if archived is not None:
+            while chunk := list(islice(archived, STREAM_CHUNK_SIZE)):
+                yield lines(chunk)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+CSV_HEADER = ["ID", "Roll No", "Student Name", "Class", "Date", "Status", "Note", "Marked At"]
+
+async def _csv_chunks(stmt, compress: bool = False, archived=None):
+    """Yield the export as CSV (optionally gzip) chunks, one per fetched partition, then any archived rows."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def flush() -> bytes:
+        data = buf.getvalue().encode()
+        buf.seek(0); buf.truncate()
+        return gz.compress(data) if gz else data
+
+    writer.writerow(CSV_HEADER)
+    yield flush()
+
+    async with db_base.AsyncSessionLocal() as db:
+        if stmt is not None:
+            result = await db.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+            async for partition in result.partitions():
+                writer.writerows(
+                    (att_id, roll_no, name, cls or "", att_date.strftime("%Y-%m-%d"), status, note or "",
+                     ts.strftime("%Y-%m-%d %H:%M:%S"))
+                    for att_id, roll_no, name, cls, att_date, status, note, ts in partition
+                )
+                chunk = flush()
+                if chunk:
+                    yield chunk
+        if archived is not None:
+            # archived rows carry their class but not the student's name: one lookup for all of them
+            students = {sid: (roll_no, name) for sid, roll_no, name in await db.execute(
+                select(models.Student.id, models.Student.roll_no, models.Student.name)
+            )}
+            while rows := list(islice(archived, STREAM_CHUNK_SIZE)):
+                writer.writerows(
+                    (r.id, *students[r.student_id], r.class_name, r.attendance_date.strftime("%Y-%m-%d"), r.status, r.note or "", "")
+                    for r in rows if r.student_id in students
+                )
+                chunk = flush()
+                if chunk:
+                    yield chunk
+    if gz:
+        yield gz.flush()
+
+def _export_statement(student_id, class_name, from_date, to_date):
+    stmt = select(
+        models.Attendance.id,
+        models.Student.roll_no,
+        models.Student.name,
+        models.Student.class_name,
+        models.Attendance.attendance_date,
+        models.Attendance.status,
+        models.Attendance.note,
+        models.Attendance.timestamp,
+    ).join(models.Student)
+    stmt = _apply_filters(stmt, student_id, class_name, from_date, to_date)
+    return stmt.order_by(*_KEYSET_ORDER)
 
 @router.get("/export")
-def export_attendance_csv(
+@query_budget(2)
+async def export_attendance_csv(
     student_id: int | None = None,
     class_name: str | None = None,
     from_date: date | None = None,
     to_date: date | None = None,
-    db: Session = Depends(db_base.get_db),
+    gzip: bool = False,
     current_user: int = Depends(get_current_user)
 ):
-    q = db.query(models.Attendance, models.Student).join(models.Student)
-    
-    if student_id:
-        q = q.filter(models.Attendance.student_id == student_id)
-    if class_name:
-        q = q.filter(models.Student.class_name == class_name)
-    if from_date:
-        q = q.filter(models.Attendance.attendance_date >= from_date)
-    if to_date:
-        q = q.filter(models.Attendance.attendance_date <= to_date)
-    
-    records = q.order_by(models.Attendance.attendance_date.desc()).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ID", "Roll No", "Student Name", "Class", "Date", "Status", "Note", "Marked At"])
-    
-    for att, student in records:
-        writer.writerow([
-            att.id,
-            student.roll_no,
-            student.name,
-            student.class_name or "",
-            att.attendance_date.strftime("%Y-%m-%d"),
-            att.status,
-            att.note or "",
-            att.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        ])
-    
-    output.seek(0)
+    boundary = archives.boundary
+    stmt = _export_statement(student_id, class_name, from_date, to_date) if _reads_table(boundary, to_date, None) else None
+    archived = _archived_rows(boundary, student_id, class_name, from_date, to_date, None)
+    if gzip:
+        return StreamingResponse(
+            _csv_chunks(stmt, compress=True, archived=archived),
+            media_type="application/gzip",
+            headers={"Content-Disposition": "attachment; filename=attendance_export.csv.gz"}
+        )
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _csv_chunks(stmt, archived=archived),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=attendance_export.csv"}
     )
+
+@router.get("/register/{class_name}/{year}/{month}")
+@query_budget(1)
+async def attendance_register(
+    class_name: str,
+    year: int = Path(..., ge=1900, le=9999),
+    month: int = Path(..., ge=1, le=12),
+    format: Literal["json", "csv", "xlsx"] = "json",
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_user)
+):
+    first, last = month_bounds(year, month)
+    # one query: every student of the class, left-joined to their marks for the month
+    rows = (await db.execute(
+        select(
+            models.Student.id,
+            models.Student.roll_no,
+            models.Student.name,
+            models.Attendance.attendance_date,
+            models.Attendance.status,
+        )
+        .outerjoin(models.Attendance, and_(
+            models.Attendance.student_id == models.Student.id,
+            models.Attendance.attendance_date.between(first, last),
+        ))
+        .where(models.Student.class_name == class_name)
+        .order_by(models.Student.roll_no, models.Student.id)
+    )).all()
+    if not rows:
+        raise HTTPException(404, "Class not found")
+    register = Register.from_rows(class_name, year, month, rows)
+
+    if format == "json":
+        return register.to_json()
+    filename = f"register_{re.sub(r'[^A-Za-z0-9_-]', '_', class_name)}_{year}-{month:02d}.{format}"
+    return StreamingResponse(
+        register.csv_chunks() if format == "csv" else register.xlsx_chunks(),
+        media_type="text/csv" if format == "csv" else XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -1,25 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import base as db_base
 from app.db import models
 from app.schemas.auth import UserCreate, Token
 from app.utils import security
+from app.utils.profiling import query_budget
 
-router = APIRouter()
+router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/signup", status_code=201)
-def signup(payload: UserCreate, db: Session = Depends(db_base.get_db)):
-    u = db.query(models.User).filter(models.User.email == payload.email).first()
+@query_budget(3)
+async def signup(payload: UserCreate, db: AsyncSession = Depends(db_base.get_async_db)):
+    u = await db.scalar(select(models.User.id).where(models.User.email == payload.email))
     if u:
         raise HTTPException(400, "Email already registered")
-    user = models.User(email=payload.email, hashed_password=security.hash_password(payload.password), is_admin=True)
-    db.add(user); db.commit(); db.refresh(user)
+    hashed = await security.password_hasher.hash(payload.password)
+    user = models.User(email=payload.email, hashed_password=hashed, is_admin=True)
+    db.add(user); await db.commit(); await db.refresh(user)
+    security.invalidate_user_auth(user.id)
     return {"msg": "user created"}
 
 @router.post("/login", response_model=Token)
-def login(payload: UserCreate, db: Session = Depends(db_base.get_db)):
-    user = db.query(models.User).filter(models.User.email == payload.email).first()
-    if not user or not security.verify_password(payload.password, user.hashed_password):
+@query_budget(1)
+async def login(payload: UserCreate, db: AsyncSession = Depends(db_base.get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == payload.email))
+    if not user or not await security.password_hasher.verify(payload.password, user.hashed_password):
         raise HTTPException(401, "Invalid credentials")
-    token = security.create_access_token(subject=user.id)
+    token = security.create_access_token(subject=user.id, is_admin=user.is_admin)
     return {"access_token": token, "token_type": "bearer"}
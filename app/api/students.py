@@ -1,60 +1,257 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import AsyncIterator, Literal
+from pydantic import ValidationError
+from sqlalchemy import exc, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.db import base as db_base
 from app.db import models
-from app.schemas.student import StudentCreate, StudentOut
-from app.core.config import UPLOAD_DIR
+from app.db import summary
+from app.db.dialect import dialect_insert
+from app.db.writer import write_queue
+from app.schemas.student import StudentCreate, StudentOut, StudentImportError, StudentImportResult, student_out
+from app.utils import photos
+from app.utils.photos import photo_pipeline
 from app.utils.security import get_current_user, get_current_admin
-import shutil, os
+from app.utils.cache import response_cache, invalidate_responses
+from app.utils.live import live_dashboard
+from app.utils.profiling import query_budget
+import codecs
+import csv
 
 router = APIRouter(prefix="/students", tags=["students"])
 
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+PHOTO_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"],
+        }}},
+    }
+}
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+IMPORT_COLUMNS = ("roll_no", "name", "class_name")
+CSV_IMPORT_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"text/csv": {"schema": {"type": "string"}, "example": "roll_no,name,class_name\n2024001,Alice Johnson,10A\n"}},
+    }
+}
+
+def _decode_line(line: bytes) -> str | None:
+    # Excel on Windows saves "CSV" as Windows-1252, so lines that are not UTF-8 are read as that
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return None
+
+def _parse_record(lines: list[str | None]) -> list[str] | None:
+    return None if None in lines else next(csv.reader(["".join(lines)]), [])
+
+async def _csv_records(request: Request) -> AsyncIterator[list[str] | None]:
+    """
+    Parse the request body as CSV while it streams in, one record at a time. Each line is
+    decoded on its own, so a record that is neither UTF-8 nor Windows-1252 comes out as None
+    and fails alone, rather than aborting an import whose earlier chunks have committed.
+    """
+    tail, record_lines, quotes, start = b"", [], 0, True
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if start and lines:
+            lines[0], start = lines[0].removeprefix(codecs.BOM_UTF8), False
+        for line in lines:
+            # a record is complete once its quotes balance (quoted fields may contain newlines)
+            text = _decode_line(line)
+            record_lines.append(None if text is None else text + "\n")
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                yield _parse_record(record_lines)
+                record_lines, quotes = [], 0
+    if start:
+        tail = tail.removeprefix(codecs.BOM_UTF8)
+    if tail or record_lines:
+        yield _parse_record(record_lines + [_decode_line(tail)])
+
+async def _import_chunk(db: AsyncSession, chunk: list[tuple[int, StudentCreate]], on_duplicate: str, update_columns: list[str], result: StudentImportResult):
+    existing = set(await db.scalars(
+        select(models.Student.roll_no).where(models.Student.roll_no.in_([s.roll_no for _, s in chunk]))
+    ))
+    rows, created, updated = [], 0, 0
+    for row, student in chunk:
+        if student.roll_no in existing and on_duplicate == "skip":
+            result.skipped += 1
+            continue
+        if student.roll_no in existing:
+            updated += 1
+        else:
+            created += 1
+        rows.append(student.model_dump())
+    if not rows:
+        return
+
+    async def write(wdb: AsyncSession):
+        moved = {}
+        if "class_name" in update_columns and existing:
+            # read in the write transaction, so the classes are the ones the upsert overwrites
+            new_classes = {r["roll_no"]: r["class_name"] for r in rows}
+            moved = {sid: (old, new_classes[roll_no]) for sid, roll_no, old in await wdb.execute(
+                select(models.Student.id, models.Student.roll_no, models.Student.class_name)
+                .where(models.Student.roll_no.in_([roll_no for roll_no in new_classes if roll_no in existing]))
+            ) if (old or "") != (new_classes[roll_no] or "")}
+        stmt = dialect_insert(wdb, models.Student)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Student.roll_no],
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+        await wdb.execute(stmt, rows)
+        # the dashboard summary counts marks under the student's current class
+        return await wdb.run_sync(summary.move_students, moved)
+
+    try:
+        moved_counts = await write_queue.run(db, write)
+    except exc.IntegrityError:
+        for row, student in chunk:
+            if student.roll_no not in existing or on_duplicate != "skip":
+                result.failed += 1
+                if len(result.errors) < IMPORT_MAX_ERRORS:
+                    result.errors.append(StudentImportError(row=row, roll_no=student.roll_no, error="Conflicting concurrent write, retry"))
+                else:
+                    result.errors_truncated = True
+        return
+    result.created += created
+    result.updated += updated
+    live_dashboard.publish(moved_counts)
+
+@router.post("/import", response_model=StudentImportResult, openapi_extra=CSV_IMPORT_BODY)
+@query_budget(None, chunked=True)
+async def import_students(
+    request: Request,
+    on_duplicate: Literal["update", "skip"] = "update",
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_admin)
+):
+    result = StudentImportResult(created=0, updated=0, skipped=0, failed=0, errors=[])
+
+    def fail(row: int, roll_no: str | None, error: str):
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(StudentImportError(row=row, roll_no=roll_no, error=error))
+        else:
+            result.errors_truncated = True
+
+    records = _csv_records(request)
+    header = [h.strip().lower() for h in await anext(records, []) or []]
+    missing = [c for c in IMPORT_COLUMNS[:2] if c not in header]
+    if missing:
+        raise HTTPException(400, f"CSV header must include: {', '.join(missing)}")
+    positions = {c: header.index(c) for c in IMPORT_COLUMNS if c in header}
+    # a file without class_name must not wipe existing classes on update
+    update_columns = [c for c in ("name", "class_name") if c in positions]
+
+    chunk: list[tuple[int, StudentCreate]] = []
+    seen: set[str] = set()
+    row = 1
+    async for record in records:
+        row += 1
+        if record is None:
+            fail(row, None, "Not UTF-8 or Windows-1252 text")
+            continue
+        if not any(field.strip() for field in record):
+            continue
+        values = {c: record[i].strip() if i < len(record) else "" for c, i in positions.items()}
+        try:
+            student = StudentCreate(**{**values, "class_name": values.get("class_name") or None})
+        except ValidationError as e:
+            fail(row, values.get("roll_no"), "; ".join(err["msg"] for err in e.errors()))
+            continue
+        if not student.roll_no or not student.name:
+            fail(row, student.roll_no, "roll_no and name are required")
+            continue
+        if student.roll_no in seen:
+            fail(row, student.roll_no, "Duplicate roll no in file")
+            continue
+        seen.add(student.roll_no)
+        chunk.append((row, student))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await _import_chunk(db, chunk, on_duplicate, update_columns, result)
+            chunk = []
+    if chunk:
+        await _import_chunk(db, chunk, on_duplicate, update_columns, result)
+
+    if result.created or result.updated:
+        invalidate_responses()
+    return result
 
 @router.post("/", response_model=StudentOut, status_code=201)
-def create_student(payload: StudentCreate, db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_admin)):
-    existing = db.query(models.Student).filter(models.Student.roll_no == payload.roll_no).first()
+@query_budget(4)
+async def create_student(payload: StudentCreate, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_admin)):
+    existing = await db.scalar(select(models.Student.id).where(models.Student.roll_no == payload.roll_no))
     if existing:
         raise HTTPException(400, "Roll no already exists")
     s = models.Student(roll_no=payload.roll_no, name=payload.name, class_name=payload.class_name)
-    db.add(s); db.commit(); db.refresh(s)
+    db.add(s); await db.commit(); await db.refresh(s)
+    invalidate_responses()
     return s
 
 @router.get("/", response_model=list[StudentOut])
-def list_students(class_name: str | None = None, db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_user)):
-    q = db.query(models.Student)
-    if class_name:
-        q = q.filter(models.Student.class_name == class_name)
-    return q.order_by(models.Student.name).all()
+@query_budget(1)
+async def list_students(request: Request, class_name: str | None = None, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    S = models.Student
+
+    async def build():
+        # column tuples straight to dicts: no ORM objects, no per-row StudentOut validation
+        q = select(S.id, S.roll_no, S.name, S.class_name, S.photo_path)
+        if class_name:
+            q = q.where(S.class_name == class_name)
+        return [student_out(*row) for row in await db.execute(q.order_by(S.name))]
+    return await response_cache.respond(request, build)
 
 @router.get("/{student_id}", response_model=StudentOut)
-def get_student(student_id: int, db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_user)):
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+@query_budget(1)
+async def get_student(student_id: int, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    student = await db.get(models.Student, student_id)
     if not student:
         raise HTTPException(404, "Student not found")
     return student
 
-@router.post("/{student_id}/upload-photo", response_model=StudentOut)
-def upload_photo(student_id: int, file: UploadFile = File(...), db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_user)):
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+@router.get("/{student_id}/photo")
+async def get_photo(
+    student_id: int,
+    request: Request,
+    size: Literal["original", "thumb", "medium"] = "original",
+    v: str | None = None,
+    db: AsyncSession = Depends(db_base.get_async_db),
+    current_user: int = Depends(get_current_user)
+):
+    photo_path = await db.scalar(select(models.Student.photo_path).where(models.Student.id == student_id))
+    if not photo_path:
+        raise HTTPException(404, "Photo not found")
+    return await photos.photo_response(request, photo_path, size, v)
+
+@router.post("/{student_id}/upload-photo", response_model=StudentOut, openapi_extra=PHOTO_UPLOAD_BODY)
+async def upload_photo(student_id: int, request: Request, db: AsyncSession = Depends(db_base.get_async_db), current_user: int = Depends(get_current_user)):
+    student = await db.get(models.Student, student_id)
     if not student:
         raise HTTPException(404, "Student not found")
     
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(400, f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
-    
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(400, f"File too large. Max size: {MAX_FILE_SIZE // (1024*1024)}MB")
-    
-    filename = f"{student_id}_{int(__import__('time').time())}{ext}"
-    dest = UPLOAD_DIR / filename
-    with open(dest, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # the body is streamed to disk here, not buffered by the framework beforehand
+    dest = await photos.receive_upload(request)
+    previous = student.photo_path
     student.photo_path = str(dest)
-    db.commit(); db.refresh(student)
+    await db.commit(); await db.refresh(student)
+    invalidate_responses()
+    photo_pipeline.schedule(dest)
+
+    if previous and previous != student.photo_path:
+        # originals are shared between students with identical photos
+        still_used = await db.scalar(select(func.count(models.Student.id)).where(models.Student.photo_path == previous))
+        if not still_used:
+            await run_in_threadpool(photos.delete_photo, previous)
     return student
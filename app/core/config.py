@@ -2,13 +2,86 @@ import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", BASE_DIR / "uploads"))  # created at startup (app.main lifespan)
+# Closed academic years moved out of the attendance table (python manage.py archive); a year
+# starts on the 1st of ACADEMIC_YEAR_START_MONTH and is named after the calendar year it starts in
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", BASE_DIR / "archive"))
+ACADEMIC_YEAR_START_MONTH = int(os.getenv("ACADEMIC_YEAR_START_MONTH", "6"))
 
-# For development, allow default key. In production, require SECRET_KEY env var
-SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production-use-openssl-rand-hex-32")
-if SECRET_KEY == "dev-secret-key-change-in-production-use-openssl-rand-hex-32":
-    print("WARNING: Using default SECRET_KEY. Set SECRET_KEY environment variable for production!")
+# For development, allow default key. In production, require SECRET_KEY env var (warned about at startup)
+DEFAULT_SECRET_KEY = "dev-secret-key-change-in-production-use-openssl-rand-hex-32"
+SECRET_KEY = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
+
+# Database. DATABASE_URL drives the sync engine; the async engine is derived from it
+# (sqlite -> aiosqlite, postgresql -> asyncpg) unless ASYNC_DATABASE_URL is set explicitly.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./attendance.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite production mode: WAL + tuned pragmas on every connection, and attendance writes
+# funnelled through a single writer task that group-commits them (app.db.writer).
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "false").lower() in ("1", "true", "yes")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_WRITE_BATCH_MAX = int(os.getenv("SQLITE_WRITE_BATCH_MAX", "200"))
+SQLITE_WRITE_BATCH_WAIT_MS = float(os.getenv("SQLITE_WRITE_BATCH_WAIT_MS", "2"))
+
+# Password hashing. bcrypt runs in a dedicated process pool so logins don't starve the
+# request threadpool; PASSWORD_HASH_WORKERS=0 hashes inline in a thread instead.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# Photo pipeline: resized WebP variants are generated by PHOTO_WORKERS background processes
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "1"))
+# in-memory LRU for served thumbnails, in bytes
+PHOTO_CACHE_MAX_BYTES = int(os.getenv("PHOTO_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+
+# Admin authorization cache (see app.utils.security.auth_cache)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+# Embed an "adm" claim in access tokens so admin checks skip the database entirely.
+# Trade-off: revoking admin rights only takes effect once existing tokens expire.
+ADMIN_CLAIM_IN_TOKEN = os.getenv("ADMIN_CLAIM_IN_TOKEN", "false").lower() in ("1", "true", "yes")
+
+# Response cache for read-mostly endpoints (see app.utils.cache.response_cache).
+# The write generation is per process, so the TTL bounds staleness across workers.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+
+# Offline device sync (POST /attendance/sync): changes returned per call (devices page with
+# has_more), and how recent a change must be before the watermark moves past it; a write
+# committed late can carry a timestamp slightly older than changes already handed out.
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", "5000"))
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "5"))
+# request bodies sent with Content-Encoding: gzip/deflate are inflated up to this size
+MAX_INFLATED_BODY_BYTES = int(os.getenv("MAX_INFLATED_BODY_BYTES", str(64 * 1024 * 1024)))
+
+# Live dashboard (GET /admin/dashboard/stream): listeners per worker, how often the in-memory
+# counts are reloaded from the summary (picks up other workers' writes), keepalive interval
+DASHBOARD_STREAM_MAX_LISTENERS = int(os.getenv("DASHBOARD_STREAM_MAX_LISTENERS", "1000"))
+DASHBOARD_STREAM_RESYNC_SECONDS = float(os.getenv("DASHBOARD_STREAM_RESYNC_SECONDS", "30"))
+DASHBOARD_STREAM_HEARTBEAT_SECONDS = float(os.getenv("DASHBOARD_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Admin analytics: default share of marked days absent at which a student counts as a chronic absentee
+CHRONIC_ABSENCE_PCT = float(os.getenv("CHRONIC_ABSENCE_PCT", "10"))
+
+# Prometheus metrics at GET /metrics: per-route latency, DB queries per request, pool checkout waits
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# SQL profiling for development/staging (see app.utils.profiling): per-request statement log,
+# slow-query log with EXPLAIN output, N+1 detection and per-route query budgets.
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "false").lower() in ("1", "true", "yes")
+# raise instead of logging when a route exceeds its query budget or repeats a statement (tests)
+QUERY_PROFILE_STRICT = os.getenv("QUERY_PROFILE_STRICT", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_PROFILE_EXPLAIN = os.getenv("QUERY_PROFILE_EXPLAIN", "true").lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
@@ -0,0 +1,228 @@
+"""
+Columnar archive of closed academic years.
+
+`python manage.py archive --year 2023` moves academic year 2023 out of the attendance table
+into ARCHIVE_DIR/attendance-2023.bin:
+
+    b"ATTARCH1", uint32 header length, JSON header (dates, classes, notes, array offsets),
+    padding to 8 bytes, then
+    student_ids    int32[students], sorted
+    student_class  uint16[students], index into header["classes"]: the class at archive time
+    days           uint16[days], offsets from the year's first day of each day with a mark
+    codes          uint8[students, ceil(days / 4)]: 2 bits per student-day, 4 days per byte,
+                   0 = not marked, 1 present, 2 absent, 3 leave
+
+Readers memory-map the files, so a query only pages in the bytes it touches. Years are
+archived oldest first: the archive holds every day before `archives.boundary` and the
+attendance table every day from it on, and archived days can no longer be marked.
+Archived rows keep their status and note only; they have no timestamp and a synthetic
+negative id, -(date ordinal << 32 | student_id).
+"""
+import json
+import os
+import struct
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterator, NamedTuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app.core.config import ACADEMIC_YEAR_START_MONTH, ARCHIVE_DIR
+from app.db import models
+from app.db.summary import STATUSES
+
+MAGIC = b"ATTARCH1"
+VERSION = 1
+CODES = {status: code for code, status in enumerate(STATUSES, start=1)}
+
+
+class ArchivedRow(NamedTuple):
+    id: int
+    student_id: int
+    attendance_date: date
+    status: str
+    note: str | None
+    class_name: str  # the student's class when the year was archived
+    timestamp: datetime | None = None
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    """First day of academic year `year` and first day of the next one."""
+    return date(year, ACADEMIC_YEAR_START_MONTH, 1), date(year + 1, ACADEMIC_YEAR_START_MONTH, 1)
+
+def academic_year(d: date) -> int:
+    return d.year if d.month >= ACADEMIC_YEAR_START_MONTH else d.year - 1
+
+def archived_id(att_date: date, student_id: int) -> int:
+    return -((att_date.toordinal() << 32) | student_id)
+
+
+class ArchivedYear:
+    def __init__(self, path: Path):
+        import numpy as np
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an attendance archive")
+        (size,) = struct.unpack("<I", bytes(mm[8:12]))
+        header = json.loads(bytes(mm[12:12 + size]))
+        base = -(-(12 + size) // 8) * 8
+        offsets = header["offsets"]
+        students, days, row_bytes = header["students"], header["days"], header["row_bytes"]
+
+        self.path = path
+        self.year = header["year"]
+        self.start, self.end = date.fromisoformat(header["start"]), date.fromisoformat(header["end"])
+        self.rows_archived = header["rows"]
+        self.classes: list[str] = header["classes"]
+        self.notes = {(s, d): note for s, d, note in header["notes"]}
+        self.student_ids = mm[base + offsets["student_ids"]:][:students * 4].view(np.int32)
+        self.student_class = mm[base + offsets["student_class"]:][:students * 2].view(np.uint16)
+        self.days = mm[base + offsets["days"]:][:days * 2].view(np.uint16).astype(np.int32) + self.start.toordinal()
+        self.codes = mm[base + offsets["codes"]:][:students * row_bytes].reshape(students, row_bytes)
+
+    def rows(self, student_id: int | None, class_name: str | None, from_date: date | None, to_date: date | None,
+             before: tuple[date, int] | None = None) -> Iterator[ArchivedRow]:
+        """Archived marks matching the filters, newest day first, after the keyset position `before`."""
+        import numpy as np
+        selected = np.arange(len(self.student_ids))
+        if student_id:
+            selected = selected[self.student_ids == student_id]
+        if class_name:
+            if class_name not in self.classes:
+                return
+            selected = selected[self.student_class[selected] == self.classes.index(class_name)]
+        first = np.searchsorted(self.days, from_date.toordinal()) if from_date else 0
+        last = np.searchsorted(self.days, to_date.toordinal(), side="right") if to_date else len(self.days)
+        if before:
+            last = min(last, np.searchsorted(self.days, before[0].toordinal(), side="right"))
+        sids = self.student_ids[selected]
+
+        for d in range(last - 1, first - 1, -1):
+            ordinal = int(self.days[d])
+            codes = (self.codes[selected, d >> 2] >> ((d & 3) * 2)) & 3
+            marked = np.flatnonzero(codes)
+            if before and ordinal == before[0].toordinal():
+                # same day as the cursor: ids below its id are the higher student ids
+                marked = marked[sids[marked] > -before[1] - (ordinal << 32)]
+            att_date = date.fromordinal(ordinal)
+            for i in marked.tolist():
+                sid, s = int(sids[i]), int(selected[i])
+                yield ArchivedRow(archived_id(att_date, sid), sid, att_date, STATUSES[codes[i] - 1],
+                                  self.notes.get((s, d)), self.classes[self.student_class[s]])
+
+    def columns(self):
+        """(student ids, day ordinals, status index into STATUSES) of every mark, sorted by student then day."""
+        import numpy as np
+        full = np.empty((self.codes.shape[0], self.codes.shape[1] * 4), dtype=np.uint8)
+        for k in range(4):
+            full[:, k::4] = (self.codes >> (k * 2)) & 3
+        s, d = np.nonzero(full[:, :len(self.days)])
+        return self.student_ids[s], self.days[d], (full[s, d] - 1).astype(np.int8)
+
+
+class Archives:
+    """The archived years in a directory, re-read when its contents change (another process archived a year)."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._stamp: int | None = None
+        self._years: list[ArchivedYear] = []  # oldest first
+
+    def years(self) -> list[ArchivedYear]:
+        try:
+            stamp = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            paths = sorted(self.directory.glob("attendance-*.bin")) if stamp is not None else []
+            self._years = [ArchivedYear(path) for path in paths]
+            self._stamp = stamp
+        return self._years
+
+    @property
+    def boundary(self) -> date | None:
+        """First day that is not archived; None when nothing is."""
+        years = self.years()
+        return years[-1].end if years else None
+
+    def rows(self, student_id: int | None = None, class_name: str | None = None, from_date: date | None = None,
+             to_date: date | None = None, before: tuple[date, int] | None = None) -> Iterator[ArchivedRow]:
+        for year in reversed(self.years()):
+            if (from_date and year.end <= from_date) or (to_date and year.start > to_date):
+                continue
+            yield from year.rows(student_id, class_name, from_date, to_date, before)
+
+
+archives = Archives(ARCHIVE_DIR)
+
+
+def archive_year(db: Session, year: int, directory: Path = ARCHIVE_DIR) -> tuple[Path, int]:
+    """Move academic year `year` from the attendance table into `directory`; returns the file and rows moved."""
+    import numpy as np
+    A, S = models.Attendance, models.Student
+    start, end = year_bounds(year)
+    path = directory / f"attendance-{year}.bin"
+    if end > date.today():
+        raise ValueError(f"academic year {year} is not over until {end - timedelta(days=1)}")
+    if path.exists():
+        raise ValueError(f"{path} already exists")
+    oldest = db.scalar(select(func.min(A.attendance_date)))
+    if oldest is not None and oldest < start:
+        raise ValueError(f"archive academic year {academic_year(oldest)} first: years are archived oldest first")
+
+    rows = db.execute(
+        select(A.student_id, S.class_name, A.attendance_date, A.status, A.note)
+        .outerjoin(S, S.id == A.student_id)
+        .where(A.attendance_date >= start, A.attendance_date < end)
+    ).all()
+    unknown = {status for _, _, _, status, _ in rows} - CODES.keys()
+    if unknown:
+        raise ValueError(f"cannot archive statuses {sorted(unknown)}; only {', '.join(STATUSES)} have a code")
+
+    sids = np.array([r[0] for r in rows], dtype=np.int32)
+    ordinals = np.array([r[2].toordinal() for r in rows], dtype=np.int32)
+    codes = np.array([CODES[r[3]] for r in rows], dtype=np.uint8)
+    student_ids, s = np.unique(sids, return_inverse=True)
+    days, d = np.unique(ordinals, return_inverse=True)
+    classes = sorted({r[1] or "" for r in rows})
+    student_class = np.zeros(len(student_ids), dtype=np.uint16)
+    student_class[s] = [classes.index(r[1] or "") for r in rows]
+    full = np.zeros((len(student_ids), -(-len(days) // 4) * 4), dtype=np.uint8)
+    full[s, d] = codes
+    packed = full[:, 0::4] | (full[:, 1::4] << 2) | (full[:, 2::4] << 4) | (full[:, 3::4] << 6)
+
+    arrays = {
+        "student_ids": student_ids.astype("<i4").tobytes(),
+        "student_class": student_class.astype("<u2").tobytes(),
+        "days": (days - start.toordinal()).astype("<u2").tobytes(),
+        "codes": packed.tobytes(),
+    }
+    offsets, position = {}, 0
+    for name, data in arrays.items():
+        offsets[name] = position
+        position += -(-len(data) // 8) * 8
+    header = json.dumps({
+        "version": VERSION, "year": year, "start": start.isoformat(), "end": end.isoformat(), "rows": len(rows),
+        "students": len(student_ids), "days": len(days), "row_bytes": packed.shape[1], "classes": classes,
+        "notes": [[int(s[i]), int(d[i]), r[4]] for i, r in enumerate(rows) if r[4]],
+        "offsets": offsets,
+    }).encode()
+
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(b"\0" * (-f.tell() % 8))
+        for data in arrays.values():
+            f.write(data + b"\0" * (-len(data) % 8))
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        db.execute(delete(A).where(A.attendance_date >= start, A.attendance_date < end))
+        os.replace(tmp, path)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        path.unlink(missing_ok=True)
+        tmp.unlink(missing_ok=True)
+        raise
+    return path, len(rows)
@@ -1,15 +1,101 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.core.config import (
+    DATABASE_URL, ASYNC_DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    SQLITE_TUNED, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB,
+    METRICS_ENABLED, QUERY_PROFILE,
+)
+from app.utils import metrics, profiling
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def _normalize_url(url: str) -> str:
+    # Render/Heroku hand out postgres:// URLs, which SQLAlchemy no longer accepts
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./attendance.db"
+def _engine_kwargs(url: str) -> dict:
+    parsed = make_url(url)
+    kwargs = {}
+    if METRICS_ENABLED:
+        # same pool SQLAlchemy would pick for this URL, with checkout timing
+        default_pool = parsed.get_dialect().get_pool_class(parsed)
+        if default_pool in metrics.TIMED_POOLS:
+            kwargs["poolclass"] = metrics.TIMED_POOLS[default_pool]
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite connections are cheap file handles; keep SQLAlchemy's default pool sizing
+        return kwargs
+    return kwargs | {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
+SQLALCHEMY_DATABASE_URL = _normalize_url(DATABASE_URL)
+ASYNC_SQLALCHEMY_DATABASE_URL = _normalize_url(ASYNC_DATABASE_URL) if ASYNC_DATABASE_URL else _async_url(SQLALCHEMY_DATABASE_URL)
+
+connect_args = {"check_same_thread": False} if make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite" else {}
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args=connect_args, **_engine_kwargs(SQLALCHEMY_DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **_engine_kwargs(ASYNC_SQLALCHEMY_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+IS_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.close()
+
+if IS_SQLITE and SQLITE_TUNED:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+if METRICS_ENABLED:
+    metrics.instrument_engine(engine, "sync")
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+if QUERY_PROFILE:
+    profiling.instrument_engine(engine)
+    profiling.instrument_engine(async_engine.sync_engine)
+
+# single-column indexes that a composite index now leads with; they only slowed writes
+OBSOLETE_INDEXES = ("ix_attendance_attendance_date", "ix_students_class_name")
+
+def create_schema(bind=None):
+    """Create missing tables and indexes. Run once per deploy (python manage.py migrate), never on import."""
+    from app.db import models  # noqa: F401 (registers tables)
+    bind = bind if bind is not None else engine
+    Base.metadata.create_all(bind=bind)
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    with bind.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
 # dependency
 def get_db():
     db = SessionLocal()
@@ -17,3 +103,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# async dependency, used by the attendance/students/admin routers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
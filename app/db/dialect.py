@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, model):
+    """INSERT construct for the session's backend, exposing on_conflict_do_update/do_nothing."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {name}")
+    return insert(model)
@@ -1,34 +1,85 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime, UTC
 
+def utcnow() -> datetime:
+    """Current time as naive UTC, which is what the DateTime columns hold (asyncpg rejects aware values for them)."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    created_at = Column(DateTime, default=utcnow)
 
 class Student(Base):
     __tablename__ = "students"
+    # class filter -> student ids without touching the table
+    __table_args__ = (Index("ix_students_class_id", "class_name", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     roll_no = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
-    class_name = Column(String, index=True)
+    class_name = Column(String)  # indexed by ix_students_class_id
     photo_path = Column(String, nullable=True)
 
 class Attendance(Base):
     __tablename__ = "attendance"
-    __table_args__ = (UniqueConstraint('student_id', 'attendance_date', name='_student_date_uc'),)
+    __table_args__ = (
+        UniqueConstraint('student_id', 'attendance_date', name='_student_date_uc'),
+        # date-range filters joined to students; (student_id, attendance_date) is covered by the constraint
+        Index("ix_attendance_date_student", "attendance_date", "student_id"),
+        # delta sync and the analytics mirror read changes in (timestamp, id) order
+        Index("ix_attendance_timestamp_id", "timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
-    attendance_date = Column(Date, index=True, nullable=False)
-    timestamp = Column(DateTime, default=lambda: datetime.now(UTC))
+    attendance_date = Column(Date, nullable=False)  # indexed by ix_attendance_date_student
+    timestamp = Column(DateTime, default=utcnow)
     status = Column(String)  # "present", "absent", "leave"
     marked_by = Column(Integer, ForeignKey("users.id"))
     note = Column(String, nullable=True)
 
     student = relationship("Student", backref="attendance_records")
+
+class AttendanceAudit(Base):
+    """Append-only history of attendance writes: one row per mark created or changed, with who and how."""
+    __tablename__ = "attendance_audit"
+    __table_args__ = (Index("ix_attendance_audit_student_date", "student_id", "attendance_date"),)
+
+    id = Column(Integer, primary_key=True)
+    attendance_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, nullable=False)
+    attendance_date = Column(Date, nullable=False)
+    status = Column(String, nullable=False)
+    note = Column(String, nullable=True)
+    changed_by = Column(Integer, ForeignKey("users.id"))
+    changed_at = Column(DateTime, nullable=False)
+    source = Column(String, nullable=False)  # "mark", "bulk", "put", "sync"
+
+class SyncOperation(Base):
+    """Outcome of every mark pushed through POST /attendance/sync, keyed by the device's idempotency key."""
+    __tablename__ = "sync_operations"
+    __table_args__ = (Index("ix_sync_operations_student_date", "student_id", "attendance_date"),)
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    idempotency_key = Column(String(64), primary_key=True)
+    student_id = Column(Integer, nullable=False)
+    attendance_date = Column(Date, nullable=False)
+    marked_at = Column(DateTime, nullable=False)  # device clock (UTC); last-writer-wins compares these
+    outcome = Column(String, nullable=False)  # "created", "updated", "unchanged", "rejected"
+    attendance_id = Column(Integer, nullable=True)
+    reason = Column(String, nullable=True)
+    created_at = Column(DateTime, default=utcnow, index=True)
+
+class DailyClassSummary(Base):
+    """Attendance counts per date x class x status, maintained alongside every attendance write."""
+    __tablename__ = "daily_class_summary"
+
+    attendance_date = Column(Date, primary_key=True)
+    class_name = Column(String, primary_key=True)  # "" for students without a class
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
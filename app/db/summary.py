@@ -0,0 +1,104 @@
+from collections import Counter
+from datetime import date
+from sqlalchemy import Date, String, and_, delete, func, insert, literal, select, true, union_all
+from sqlalchemy.orm import Session
+from app.db import models
+from app.db.dialect import dialect_insert
+
+Summary = models.DailyClassSummary
+STATUSES = ("present", "absent", "leave")
+
+
+def summary_key(att_date: date, class_name: str | None, status) -> tuple[date, str, str]:
+    return att_date, class_name or "", getattr(status, "value", status)
+
+
+def bump(db: Session, counts: Counter):
+    """Add `counts` ({(date, class_name, status): n}) to the summary within the caller's transaction."""
+    if not counts:
+        return
+    stmt = dialect_insert(db, Summary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Summary.attendance_date, Summary.class_name, Summary.status],
+        set_={"count": Summary.count + stmt.excluded.count},
+    )
+    db.execute(stmt, [
+        {"attendance_date": d, "class_name": c, "status": s, "count": n}
+        for (d, c, s), n in counts.items()
+    ])
+
+
+def move_students(db: Session, moved: dict[int, tuple[str | None, str | None]]) -> Counter:
+    """
+    Move the counts of students whose class changed ({student_id: (old_class, new_class)}) from
+    the old class's slices to the new one's, within the caller's transaction. The summary counts
+    every mark under its student's current class, as rebuild() and recount() do; archived days
+    have no attendance rows left and keep the class they were archived with. Returns the deltas.
+    """
+    if not moved:
+        return Counter()
+    A = models.Attendance
+    counts = Counter()
+    for student_id, att_date, status, n in db.execute(
+        select(A.student_id, A.attendance_date, A.status, func.count())
+        .where(A.student_id.in_(list(moved)))
+        .group_by(A.student_id, A.attendance_date, A.status)
+    ):
+        old_class, new_class = moved[student_id]
+        counts[summary_key(att_date, old_class, status)] -= n
+        counts[summary_key(att_date, new_class, status)] += n
+    counts = Counter({key: n for key, n in counts.items() if n})  # keeps decrements, unlike +counts
+    bump(db, counts)
+    return counts
+
+
+def recount(db: Session, att_date: date, class_name: str | None) -> dict[str, int]:
+    """
+    Recompute one (date, class_name) slice of the summary from attendance, within the caller's transaction.
+
+    For writes that overwrite a mark without reading it first (upserts): the previous status is
+    unknown, so the slice is recounted in one INSERT ... SELECT instead of bumped. Every status
+    gets a row, zeros included; returns the new {status: count}.
+    """
+    A, S = models.Attendance, models.Student
+    # SELECT 'present' UNION ALL ...: SQLite cannot name the columns of a VALUES list
+    statuses = union_all(*(select(literal(s, String).label("status")) for s in STATUSES)).subquery("statuses")
+    in_class = S.class_name == class_name if class_name else func.coalesce(S.class_name, "") == ""
+    source = (
+        select(literal(att_date, Date), literal(class_name or "", String), statuses.c.status, func.count(A.id))
+        .select_from(statuses.outerjoin(A, and_(
+            A.status == statuses.c.status,
+            A.attendance_date == att_date,
+            A.student_id.in_(select(S.id).where(in_class)),
+        )))
+        .where(true())  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+        .group_by(statuses.c.status)
+    )
+    stmt = dialect_insert(db, Summary).from_select(["attendance_date", "class_name", "status", "count"], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Summary.attendance_date, Summary.class_name, Summary.status],
+        set_={"count": stmt.excluded.count},
+    )
+    return dict(db.execute(stmt.returning(Summary.status, Summary.count)).all())
+
+
+def rebuild(db: Session, archived_until: date | None = None) -> int:
+    """
+    Recompute the summary from the attendance table; returns the number of summary rows.
+    Days before `archived_until` have left the table (app.db.archive), so their rows are kept.
+    """
+    class_name = func.coalesce(models.Student.class_name, "")
+    source = (
+        select(
+            models.Attendance.attendance_date,
+            class_name,
+            models.Attendance.status,
+            func.count(models.Attendance.id),
+        )
+        .join(models.Student)
+        .group_by(models.Attendance.attendance_date, class_name, models.Attendance.status)
+    )
+    db.execute(delete(Summary).where(Summary.attendance_date >= archived_until) if archived_until else delete(Summary))
+    db.execute(insert(Summary).from_select(["attendance_date", "class_name", "status", "count"], source))
+    db.commit()
+    return db.query(func.count()).select_from(Summary).scalar()
@@ -0,0 +1,136 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import SQLITE_TUNED, SQLITE_WRITE_BATCH_MAX, SQLITE_WRITE_BATCH_WAIT_MS, METRICS_ENABLED, QUERY_PROFILE
+from app.db import base as db_base
+from app.utils import metrics, profiling
+
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueue:
+    """
+    Runs write jobs either inline on the request's session, or (SQLite production mode) on one
+    writer task that group-commits every job queued within a short window in a single transaction.
+
+    A job is an async callable taking a session; it must not commit. If a batch fails, it is
+    rolled back and each job is retried alone so only the offending request sees the error.
+    """
+
+    def __init__(self, enabled: bool, batch_max: int, batch_wait: float):
+        self.enabled = enabled
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait
+        self.batches = 0
+        self.jobs = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._engine: AsyncEngine | None = None
+        self._sessionmaker: async_sessionmaker | None = None
+
+    async def run(self, db: AsyncSession, job: WriteJob):
+        if not self.enabled:
+            try:
+                result = await job(db)
+                await db.commit()
+                return result
+            except Exception:
+                await db.rollback()
+                raise
+        # end the request's read transaction so it doesn't hold a pooled connection while queued
+        await db.commit()
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # the single writer owns a dedicated one-connection engine, bound to this event loop
+            writer_engine = create_async_engine(db_base.ASYNC_SQLALCHEMY_DATABASE_URL, pool_size=1, max_overflow=0)
+            event.listen(writer_engine.sync_engine, "connect", db_base.apply_sqlite_pragmas)
+            if METRICS_ENABLED:
+                metrics.instrument_engine(writer_engine.sync_engine, "writer")
+            if QUERY_PROFILE:
+                profiling.instrument_engine(writer_engine.sync_engine)
+            self._engine = writer_engine
+            self._sessionmaker = async_sessionmaker(writer_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # fresh context: the worker outlives this request and must not count queries against it
+            self._task = loop.create_task(self._worker(), context=contextvars.Context())
+
+    async def shutdown(self):
+        """Commit every job queued so far, then stop the writer task and close its engine."""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        if not self._task.done():
+            await self._queue.put(None)  # the worker stops once it reaches this and the queue is empty
+            await self._task
+        self._task = None
+        await self._engine.dispose()
+
+    async def _worker(self):
+        stopping = False
+        while not (stopping and self._queue.empty()):
+            batch = [await self._queue.get()]
+            if self.batch_wait > 0 and not stopping:
+                await asyncio.sleep(self.batch_wait)
+            while len(batch) < self.batch_max and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stopping = stopping or None in batch
+            batch = [entry for entry in batch if entry is not None]
+            if not batch:
+                continue
+            try:
+                await self._commit_batch(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _commit_batch(self, batch):
+        self.batches += 1
+        self.jobs += len(batch)
+        async with self._sessionmaker() as db:
+            try:
+                results = [await job(db) for job, _ in batch]
+                await db.commit()
+            except Exception:
+                await db.rollback()
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+            # group commit failed: isolate the failing job(s)
+            for job, future in batch:
+                try:
+                    result = await job(db)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch": self.jobs / self.batches if self.batches else 0.0,
+        }
+
+
+write_queue = WriteQueue(
+    enabled=db_base.IS_SQLITE and SQLITE_TUNED,
+    batch_max=SQLITE_WRITE_BATCH_MAX,
+    batch_wait=SQLITE_WRITE_BATCH_WAIT_MS / 1000,
+)
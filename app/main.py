@@ -1,29 +1,98 @@
-from fastapi import FastAPI
+"""
+ASGI entry point: `app` is built by create_app().
+
+Importing this module touches neither the database nor the filesystem, so every worker,
+test and script boots quickly. Create the schema once per deploy with `python manage.py migrate`;
+per-process setup and teardown run in the lifespan.
+"""
+from contextlib import asynccontextmanager
+import logging
+import sys
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.base import engine, Base
+from app.core.config import METRICS_ENABLED, QUERY_PROFILE, SECRET_KEY, DEFAULT_SECRET_KEY, UPLOAD_DIR, MAX_INFLATED_BODY_BYTES
+from app.db.base import engine, async_engine
+from app.db.writer import write_queue
 from app.api import auth, students, attendance, admin
+from app.utils import metrics, profiling
+from app.utils.cache import response_cache
+from app.utils.compression import RequestDecompressionMiddleware
+from app.utils.live import live_dashboard
+from app.utils.photos import photo_pipeline
+from app.utils.security import auth_cache, password_hasher
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    if SECRET_KEY == DEFAULT_SECRET_KEY:
+        logger.warning("Using default SECRET_KEY. Set SECRET_KEY environment variable for production!")
+    yield
+    await write_queue.shutdown()  # before the engines go: queued marks still commit
+    password_hasher.shutdown()
+    photo_pipeline.shutdown()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def _pool_stats(pool) -> dict:
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()} if hasattr(pool, "checkedout") else {}
+
+def _analytics_stats() -> dict:
+    # the columnar mirror (and NumPy) is imported by the first analytics request; don't force it on a scrape
+    analytics = sys.modules.get("app.utils.analytics")
+    return analytics.attendance_columns.stats() if analytics else {}
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Student Attendance System API",
+        description="Backend API for managing student attendance with photo upload, admin dashboard, and CSV export",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(RequestDecompressionMiddleware, max_size=MAX_INFLATED_BODY_BYTES)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+    if QUERY_PROFILE:
+        app.add_middleware(profiling.QueryProfileMiddleware)
+    if METRICS_ENABLED:
+        # outermost, so latency covers CORS handling too
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    app.include_router(auth.router)
+    app.include_router(students.router)
+    app.include_router(attendance.router)
+    app.include_router(admin.router)
+
+    @app.get("/", tags=["Health"])
+    def health_check():
+        return {"status": "ok", "message": "Student Attendance System API is running"}
+
+    if METRICS_ENABLED:
+        metrics.register_collector("db_pool", lambda: _pool_stats(engine.pool), pool="sync")
+        metrics.register_collector("db_pool", lambda: _pool_stats(async_engine.pool), pool="async")
+        metrics.register_collector("auth_cache", auth_cache.stats)
+        metrics.register_collector("response_cache", response_cache.stats)
+        metrics.register_collector("write_queue", write_queue.stats)
+        metrics.register_collector("password_hasher", password_hasher.stats)
+        metrics.register_collector("live_dashboard", live_dashboard.stats)
+        metrics.register_collector("analytics_columns", _analytics_stats)
+
+        @app.get("/metrics", include_in_schema=False)
+        def prometheus_metrics():
+            return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    return app
+
 
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="Student Attendance System API",
-    description="Backend API for managing student attendance with photo upload, admin dashboard, and CSV export",
-    version="1.0.0"
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(students.router)
-app.include_router(attendance.router)
-app.include_router(admin.router)
-
-@app.get("/", tags=["Health"])
-def health_check():
-    return {"status": "ok", "message": "Student Attendance System API is running"}
+app = create_app()
@@ -1,8 +1,8 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from datetime import date as date_type
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
 class AttendanceStatus(str, Enum):
     present = "present"
@@ -15,12 +15,67 @@ class AttendanceMark(BaseModel):
     date: Optional[date_type] = None
     note: Optional[str] = None
 
+class AttendanceUpdate(BaseModel):
+    status: AttendanceStatus
+    note: Optional[str] = None
+
+class AttendanceBulkMark(BaseModel):
+    records: list[AttendanceMark] = Field(..., min_length=1, max_length=1000)
+    # applied to every record that does not carry its own date
+    date: Optional[date_type] = None
+
+class AttendanceConflict(BaseModel):
+    index: int
+    student_id: int
+    reason: str
+
+class AttendanceBulkResult(BaseModel):
+    created: int
+    conflicts: list[AttendanceConflict]
+
 class AttendanceOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
     student_id: int
     attendance_date: date_type
-    timestamp: datetime
+    timestamp: Optional[datetime]  # None for archived years
     status: str
     note: Optional[str]
+
+class SyncPolicy(str, Enum):
+    reject = "reject"  # a day already marked on the server keeps its mark
+    last_writer_wins = "last_writer_wins"  # the mark made last on its device wins
+
+class SyncMark(BaseModel):
+    # client-generated (e.g. a UUID); replaying a key returns the recorded outcome
+    idempotency_key: str = Field(..., min_length=1, max_length=64)
+    student_id: int
+    status: AttendanceStatus
+    date: date_type
+    note: Optional[str] = None
+    # device clock when the mark was made; naive values are taken as UTC
+    marked_at: datetime
+
+class AttendanceSync(BaseModel):
+    marks: list[SyncMark] = Field(default_factory=list, max_length=1000)
+    # watermark returned by the previous sync; omit on a device's first sync
+    since: Optional[str] = None
+    # restrict marks and returned changes to one class
+    class_name: Optional[str] = None
+    policy: SyncPolicy = SyncPolicy.reject
+
+class SyncMarkResult(BaseModel):
+    idempotency_key: str
+    outcome: Literal["created", "updated", "unchanged", "rejected"]
+    attendance_id: Optional[int] = None
+    reason: Optional[str] = None
+    replayed: bool = False
+
+class AttendanceSyncResult(BaseModel):
+    results: list[SyncMarkResult]
+    # server-side changes since the watermark, oldest first (including the marks just applied)
+    changes: list[AttendanceOut]
+    watermark: str
+    # more changes are pending: sync again with the new watermark
+    has_more: bool
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, computed_field
 from typing import Optional
+from app.utils import photos
 
 class StudentCreate(BaseModel):
     roll_no: str
@@ -14,3 +15,40 @@ class StudentOut(BaseModel):
     name: str
     class_name: Optional[str]
     photo_path: Optional[str]
+
+    @computed_field
+    @property
+    def thumbnail_path(self) -> Optional[str]:
+        return photos.thumbnail_for(self.photo_path)
+
+    @computed_field
+    @property
+    def photo_url(self) -> Optional[str]:
+        return photos.photo_url(self.id, self.photo_path)
+
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return photos.photo_url(self.id, self.photo_path, "thumb")
+
+def student_out(id: int, roll_no: str, name: str, class_name: str | None, photo_path: str | None) -> dict:
+    """StudentOut of a row's columns as a plain dict, for listings that skip per-row validation."""
+    return {
+        "id": id, "roll_no": roll_no, "name": name, "class_name": class_name, "photo_path": photo_path,
+        "thumbnail_path": photos.thumbnail_for(photo_path),
+        "photo_url": photos.photo_url(id, photo_path),
+        "thumbnail_url": photos.photo_url(id, photo_path, "thumb"),
+    }
+
+class StudentImportError(BaseModel):
+    row: int
+    roll_no: Optional[str] = None
+    error: str
+
+class StudentImportResult(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    failed: int
+    errors: list[StudentImportError]
+    errors_truncated: bool = False
@@ -0,0 +1,184 @@
+"""
+Attendance analytics computed over an in-process columnar mirror of the attendance table.
+
+The mirror holds three NumPy arrays (student id, day ordinal, status code) sorted by student
+then day; each query is then a few vectorized passes over the arrays. It catches up by reading
+the rows whose id is above its watermark or whose timestamp is past `settled_until`, and merges
+them by (student, day): new marks are added, corrected ones overwritten, so reading a row twice
+is harmless. Neither watermark alone is safe, because ids and timestamps are assigned before the
+commit and concurrent writes commit out of order. So, as delta sync does, the timestamp scan
+re-reads the last SYNC_SETTLE_SECONDS behind the time of the previous scan. Archived years
+(app.db.archive) are read into the arrays first, and again whenever another year is archived.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import SYNC_SETTLE_SECONDS
+from app.db import models
+from app.db.archive import archives
+
+STATUSES = ("present", "absent", "leave")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+OTHER = len(STATUSES)  # rows with a status outside STATUSES
+PRESENT, ABSENT, LEAVE = (STATUS_CODES[s] for s in STATUSES)
+LOAD_CHUNK_SIZE = 50_000
+NOT_LOADED = object()
+
+
+class AttendanceColumns:
+    def __init__(self):
+        self.loads = 0
+        self.updates = 0
+        self._clear()
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _clear(self):
+        self.student_ids = np.empty(0, dtype=np.int32)
+        self.days = np.empty(0, dtype=np.int32)
+        self.statuses = np.empty(0, dtype=np.int8)
+        self.watermark = 0  # every row with an id up to here had committed when it was read...
+        self.changed_at: datetime | None = None  # latest attendance.timestamp seen
+        self.settled_until: datetime | None = None  # ...and every row with a timestamp up to here
+        self.archived_until = NOT_LOADED  # archives.boundary the arrays include
+
+    def _caught_up(self, latest: int, changed_at: datetime | None, archived_until) -> bool:
+        # until the newest change has settled, a write committing out of order may still appear below it
+        settled = changed_at is None or (self.settled_until is not None and changed_at <= self.settled_until)
+        return latest == self.watermark and changed_at == self.changed_at and archived_until == self.archived_until and settled
+
+    async def refresh(self, db: AsyncSession):
+        """Merge in attendance rows inserted or changed since the last refresh."""
+        A = models.Attendance
+        # two scalar subqueries rather than one SELECT max(), max(): each is then a single index lookup
+        latest, changed_at = (await db.execute(select(
+            select(func.max(A.id)).scalar_subquery(), select(func.max(A.timestamp)).scalar_subquery()
+        ))).one()
+        latest = latest or 0
+        archived_until = archives.boundary
+        if self._caught_up(latest, changed_at, archived_until):
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            if latest < self.watermark or archived_until != self.archived_until:
+                # the table shrank under us (recreated database, or a year moved to the archive); start over
+                self._clear()
+                self._load_archive()
+            elif self._caught_up(latest, changed_at, archived_until):
+                return  # another request caught up while we waited
+            # rows stamped before this had committed by the time the scan starts
+            settled_until = models.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+            await self._load(db, self.watermark, latest, self.settled_until)
+            self.watermark, self.changed_at, self.settled_until = latest, changed_at, settled_until
+
+    def _load_archive(self):
+        years = archives.years()
+        if years:
+            student_ids, days, statuses = (np.concatenate(c) for c in zip(*(year.columns() for year in years)))
+            order = np.lexsort((days, student_ids))
+            self.student_ids, self.days, self.statuses = student_ids[order], days[order], statuses[order]
+        self.archived_until = years[-1].end if years else None
+
+    async def _load(self, db: AsyncSession, after_id: int, upto_id: int, changed_after: datetime | None):
+        """Merge rows with after_id < id <= upto_id, or a timestamp after `changed_after`, into the arrays."""
+        A = models.Attendance
+        status_code = case({status: code for status, code in STATUS_CODES.items()}, value=A.status, else_=OTHER)
+        new_rows = A.id.between(after_id + 1, upto_id)
+        stmt = (
+            select(A.student_id, A.attendance_date, status_code)
+            .where(new_rows if changed_after is None else new_rows | (A.timestamp > changed_after))
+            .execution_options(yield_per=LOAD_CHUNK_SIZE)
+        )
+        sids, days, statuses = [], [], []
+        # Core rows on the session's connection: ORM row processing would dominate the load
+        conn = await db.connection()
+        result = await conn.stream(stmt)
+        async for partition in result.partitions():
+            student_ids, att_dates, codes = zip(*partition)
+            sids.append(np.array(student_ids, dtype=np.int32))
+            days.append(np.fromiter(map(date.toordinal, att_dates), dtype=np.int32, count=len(att_dates)))
+            statuses.append(np.array(codes, dtype=np.int8))
+        if sids:
+            self._merge(np.concatenate(sids), np.concatenate(days), np.concatenate(statuses))
+        self.loads += 1
+
+    def _merge(self, student_ids: np.ndarray, days: np.ndarray, statuses: np.ndarray):
+        """Overwrite the status of (student, day) pairs already mirrored and add the others."""
+        # (student, day) is unique and the arrays are sorted by it: locate each row by binary search
+        keys = (self.student_ids.astype(np.int64) << 32) | self.days
+        changed = (student_ids.astype(np.int64) << 32) | days
+        positions = np.searchsorted(keys, changed)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == changed[found]
+        self.statuses[positions[found]] = statuses[found]
+        self.updates += int(found.sum())
+        new = ~found
+        if new.any():
+            student_ids = np.concatenate((self.student_ids, student_ids[new]))
+            days = np.concatenate((self.days, days[new]))
+            statuses = np.concatenate((self.statuses, statuses[new]))
+            order = np.lexsort((days, student_ids))
+            self.student_ids, self.days, self.statuses = student_ids[order], days[order], statuses[order]
+
+    def student_stats(self, from_date: date | None, to_date: date | None, size: int) -> dict[str, np.ndarray]:
+        """
+        Per-student figures over the date range, as arrays of at least `size` indexed by student id:
+        marked, present, absent, leave, longest_absence_streak, current_absence_streak.
+
+        Streaks count consecutive *marked* days, so weekends and holidays don't break them.
+        """
+        sids, days, statuses = self.student_ids, self.days, self.statuses
+        if from_date or to_date:
+            lo = from_date.toordinal() if from_date else np.iinfo(np.int32).min
+            hi = to_date.toordinal() if to_date else np.iinfo(np.int32).max
+            in_range = (days >= lo) & (days <= hi)
+            sids, statuses = sids[in_range], statuses[in_range]
+
+        size = max(size, int(sids.max()) + 1 if len(sids) else 0)
+        counts = np.bincount(sids.astype(np.int64) * (OTHER + 1) + statuses, minlength=size * (OTHER + 1))
+        counts = counts.reshape(size, OTHER + 1)
+
+        # runs of absences: a run starts at an absence that follows a non-absence or a new student
+        absent = statuses == ABSENT
+        new_student = np.ones(len(sids), dtype=bool)
+        new_student[1:] = sids[1:] != sids[:-1]
+        after_absence = np.zeros(len(sids), dtype=bool)
+        after_absence[1:] = absent[:-1]
+        run_start = absent & (new_student | ~after_absence)
+        run_ids = np.cumsum(run_start)[absent] - 1
+        run_lengths = np.bincount(run_ids)
+        run_students = sids[run_start]
+        longest = np.zeros(size, dtype=np.int64)
+        np.maximum.at(longest, run_students, run_lengths)
+
+        # a run is current when it ends on the student's last marked day in range
+        last_of_student = np.ones(len(sids), dtype=bool)
+        last_of_student[:-1] = new_student[1:]
+        current = np.zeros(size, dtype=np.int64)
+        ends_current = absent & last_of_student
+        current[sids[ends_current]] = run_lengths[run_ids[ends_current[absent]]]
+
+        return {
+            "marked": counts.sum(axis=1),
+            "present": counts[:, PRESENT],
+            "absent": counts[:, ABSENT],
+            "leave": counts[:, LEAVE],
+            "longest_absence_streak": longest,
+            "current_absence_streak": current,
+        }
+
+    def stats(self) -> dict:
+        return {"rows": len(self.student_ids), "watermark": self.watermark, "loads": self.loads, "updates": self.updates}
+
+
+attendance_columns = AttendanceColumns()
+
+
+def percentage(part, whole):
+    """Elementwise part/whole as a percentage rounded to 0.1, NaN where whole is 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round(np.asarray(part) * 100.0 / whole, 1)
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from typing import Any, Awaitable, Callable
+import time
+from fastapi import Request, Response
+from app.core.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+from app.utils.jsonenc import dumps
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses keyed by path, query params and any extra key parts.
+
+    Entries are tagged with the write generation current when they were built; mutating routes
+    call invalidate_responses() to bump it, which makes every older entry stale at once.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries: OrderedDict[tuple, tuple[int, float, bytes, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def bump(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def _lookup(self, key: tuple) -> tuple[bytes, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == self.generation and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2], entry[3]
+            self.misses += 1
+            return None
+
+    def _store(self, key: tuple, generation: int, body: bytes, etag: str):
+        with self._lock:
+            if generation != self.generation:
+                return  # a write landed while we were building; don't cache stale data
+            self._entries[key] = (generation, time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def respond(self, request: Request, build: Callable[[], Awaitable[Any]], *key_extra) -> Response:
+        """Serve the JSON result of awaiting build(), from cache when possible, honouring If-None-Match."""
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), *key_extra)
+        cached = self._lookup(key)
+        if cached:
+            body, etag = cached
+        else:
+            generation = self.generation
+            body = dumps(await build())
+            etag = f'"{sha256(body).hexdigest()[:32]}"'
+            self._store(key, generation, body, etag)
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "size": len(self._entries),
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+
+def invalidate_responses():
+    """Call after committing any write to students or attendance."""
+    response_cache.bump()
@@ -0,0 +1,51 @@
+"""
+Compressed request bodies: clients on slow links (teacher devices syncing a day of marks,
+CSV imports) may send Content-Encoding: gzip or deflate, and routes see the plain body.
+"""
+import zlib
+from starlette.exceptions import HTTPException
+
+# wbits for zlib.decompressobj: gzip container, zlib container
+WBITS = {b"gzip": 31, b"deflate": 15}
+
+
+class RequestDecompressionMiddleware:
+    """Pure ASGI middleware: inflates the request body as it streams in, up to `max_size` bytes."""
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = scope["headers"]
+        encoding = next((v.strip().lower() for k, v in headers if k == b"content-encoding"), None)
+        if encoding not in WBITS:
+            return await self.app(scope, receive, send)
+
+        # in place: outer middlewares read the matched route back from this same scope
+        scope["headers"] = [(k, v) for k, v in headers if k not in (b"content-encoding", b"content-length")]
+        inflater = zlib.decompressobj(WBITS[encoding])
+        inflated = 0
+
+        async def inflating_receive():
+            nonlocal inflated
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                # max_length bounds memory per chunk, so a compression bomb is caught early
+                body = inflater.decompress(message.get("body", b""), self.max_size - inflated + 1)
+                inflated += len(body)
+                if inflated > self.max_size or inflater.unconsumed_tail:
+                    raise HTTPException(413, "Request body too large once decompressed")
+                if not message.get("more_body", False):
+                    body += inflater.flush()
+                    if not inflater.eof:
+                        raise HTTPException(400, "Truncated compressed request body")
+            except zlib.error:
+                raise HTTPException(400, "Malformed compressed request body")
+            return {**message, "body": body}
+
+        await self.app(scope, receive=inflating_receive, send=send)
@@ -0,0 +1,36 @@
+"""
+Image resizing for the photo pipeline. Runs in worker processes, so it only imports Pillow.
+"""
+from pathlib import Path
+
+# variant name -> longest edge in pixels
+VARIANTS = {"thumb": 128, "medium": 512}
+# uploads are at most 5MB, but a small file can still decode to a huge bitmap
+MAX_PIXELS = 40_000_000
+
+def variant_path(variants_dir: Path, digest: str, name: str) -> Path:
+    return variants_dir / f"{digest}_{name}.webp"
+
+def make_variants(original: str, variants_dir: str, digest: str) -> list[str]:
+    """Write a WebP for every entry in VARIANTS; returns the written paths."""
+    from PIL import Image, ImageOps
+
+    out_dir = Path(variants_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    with Image.open(original) as img:
+        # the header gives the size before anything is decoded
+        if img.width * img.height > MAX_PIXELS:
+            raise ValueError(f"{img.width}x{img.height} image exceeds {MAX_PIXELS} pixels")
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        for name, edge in VARIANTS.items():
+            variant = img.copy()
+            variant.thumbnail((edge, edge))
+            dest = variant_path(out_dir, digest, name)
+            tmp = dest.with_suffix(".tmp")
+            variant.save(tmp, "WEBP", quality=80, method=4)
+            tmp.replace(dest)
+            written.append(str(dest))
+    return written
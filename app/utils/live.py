@@ -0,0 +1,160 @@
+"""
+Live dashboard counters over server-sent events (GET /admin/dashboard/stream).
+
+Attendance routes publish the summary deltas of each committed write here. The feed keeps
+today's per-class counts in memory and fans changes out to every connected dashboard, so
+listeners cost no database queries: the counts are loaded when the first listener connects
+and reloaded every DASHBOARD_STREAM_RESYNC_SECONDS while anyone is listening, which also
+folds in writes served by other worker processes.
+"""
+import asyncio
+import contextvars
+import json
+import time
+from collections import Counter
+from datetime import date
+from typing import AsyncIterator, Awaitable, Callable
+from app.core.config import DASHBOARD_STREAM_MAX_LISTENERS, DASHBOARD_STREAM_RESYNC_SECONDS, DASHBOARD_STREAM_HEARTBEAT_SECONDS
+from app.db.summary import STATUSES
+
+# () -> (day, total_students, {class_name: {status: count}}) for today
+SnapshotLoader = Callable[[], Awaitable[tuple[date, int, dict[str, dict[str, int]]]]]
+
+
+def _frame(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Listener:
+    """
+    One connected dashboard. Its buffer is the set of classes whose counts changed since its
+    last message: repeated changes coalesce, so it never holds more than one entry per class
+    however far the client falls behind.
+    """
+
+    def __init__(self):
+        self.dirty: set[str] = set()
+        self.snapshot = True  # owes the client the full counts
+        self.wake = asyncio.Event()
+
+    def mark(self, classes):
+        self.dirty.update(classes)
+        self.wake.set()
+
+
+class LiveDashboard:
+    def __init__(self, max_listeners: int, resync_seconds: float, heartbeat_seconds: float):
+        self.max_listeners = max_listeners
+        self.resync_seconds = resync_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.published = 0
+        self.messages = 0
+        self.reloads = 0
+        self.rejected = 0
+        self._listeners: set[Listener] = set()
+        self._day: date | None = None
+        self._total_students = 0
+        self._counts: dict[str, Counter] = {}
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def publish(self, counts: Counter):
+        """Apply the deltas ({(date, class_name, status): n}) of a committed write."""
+        if not self._listeners or self._day is None:
+            return
+        changed = set()
+        for (att_date, class_name, status), n in counts.items():
+            if att_date == self._day and n:
+                self._counts.setdefault(class_name, Counter())[status] += n
+                changed.add(class_name)
+        self._notify(changed)
+
+    def replace(self, att_date: date, class_name: str, counts: dict[str, int]):
+        """Set one class's counts for a day outright, after the summary slice was recounted."""
+        if not self._listeners or att_date != self._day:
+            return
+        self._counts[class_name] = Counter(counts)
+        self._notify({class_name})
+
+    def _notify(self, classes: set[str]):
+        if not classes:
+            return
+        self.published += 1
+        for listener in self._listeners:
+            listener.mark(classes)
+
+    def subscribe(self) -> Listener | None:
+        """A new listener, or None when this worker already serves max_listeners."""
+        if len(self._listeners) >= self.max_listeners:
+            self.rejected += 1
+            return None
+        listener = Listener()
+        self._listeners.add(listener)
+        return listener
+
+    def unsubscribe(self, listener: Listener):
+        self._listeners.discard(listener)
+        if not self._listeners:
+            # deltas are dropped while nobody listens, so the next listener has to reload
+            self._day, self._counts = None, {}
+
+    def _fresh(self, today: date) -> bool:
+        return self._day == today and time.monotonic() - self._loaded_at < self.resync_seconds
+
+    async def refresh(self, load: SnapshotLoader):
+        """Reload the counts when they are from another day or older than the resync interval."""
+        if self._fresh(date.today()):
+            return
+        async with self._lock:
+            if self._fresh(date.today()):
+                return  # another listener reloaded while this one waited
+            # fresh context: the reload serves every listener, so it doesn't count against one request
+            day, total_students, counts = await asyncio.create_task(load(), context=contextvars.Context())
+            self._day, self._total_students = day, total_students
+            self._counts = {class_name: Counter(c) for class_name, c in counts.items()}
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+            for listener in self._listeners:
+                listener.snapshot = True
+                listener.wake.set()
+
+    def _classes(self, names) -> dict[str, dict[str, int]]:
+        return {name: {s: self._counts[name][s] for s in STATUSES} for name in names if name in self._counts}
+
+    def message(self, listener: Listener) -> str | None:
+        """The SSE frame owed to `listener`, if any; clears what it covers."""
+        if listener.snapshot:
+            listener.snapshot = False
+            listener.dirty.clear()
+            data = {"date": self._day.isoformat(), "total_students": self._total_students,
+                    "classes": self._classes(sorted(self._counts))}
+            return _frame("snapshot", data)
+        if listener.dirty:
+            classes, listener.dirty = sorted(listener.dirty), set()
+            return _frame("counts", {"date": self._day.isoformat(), "classes": self._classes(classes)})
+        return None
+
+    async def events(self, listener: Listener, load: SnapshotLoader) -> AsyncIterator[str]:
+        """SSE frames for `listener` until the client disconnects, with a keepalive comment when idle."""
+        try:
+            while True:
+                await self.refresh(load)
+                listener.wake.clear()  # before message(): a publish from here on wakes the wait below
+                frame = self.message(listener)
+                if frame is not None:
+                    self.messages += 1
+                    yield frame
+                    continue
+                try:
+                    await asyncio.wait_for(listener.wake.wait(), min(self.heartbeat_seconds, self.resync_seconds))
+                except TimeoutError:
+                    yield ": keepalive\n\n"  # proxies close streams that stay silent
+        finally:
+            self.unsubscribe(listener)
+
+    def stats(self) -> dict:
+        return {"listeners": len(self._listeners), "published": self.published, "messages": self.messages,
+                "reloads": self.reloads, "rejected": self.rejected}
+
+
+live_dashboard = LiveDashboard(DASHBOARD_STREAM_MAX_LISTENERS, DASHBOARD_STREAM_RESYNC_SECONDS, DASHBOARD_STREAM_HEARTBEAT_SECONDS)
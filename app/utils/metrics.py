@@ -0,0 +1,235 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format at GET /metrics.
+
+MetricsMiddleware records per-route latency, status counts and in-flight requests;
+instrument_engine() hooks SQLAlchemy cursor events so every request also reports how many
+queries it ran and how long they took. The Timed*Pool classes time connection checkouts.
+Component stats() dicts (caches, write queue, hasher pool) are exported as gauges on scrape.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+UNMATCHED_ROUTE = "<unmatched>"  # keeps label cardinality bounded for 404 scans
+
+_metrics: list["_Metric"] = []
+_collectors: dict[tuple, tuple[str, Callable[[], dict], dict[str, str]]] = {}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._series: dict[tuple, object] = {}
+        self._lock = Lock()
+        _metrics.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = list(self._series.items())
+        for labels, value in series:
+            lines.extend(self._render_series(labels, value))
+        return lines
+
+    def _render_series(self, labels: tuple, value) -> list[str]:
+        return [f"{self.name}{_labels_text(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (last one is +Inf), then sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _render_series(self, labels: tuple, value) -> list[str]:
+        names = self.labelnames + ("le",)
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), value[:-1]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_labels_text(names, (*labels, bound))} {cumulative}")
+        base = _labels_text(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{base} {value[-1]}")
+        lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served", ("method",))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Database queries run per request", ("route",), QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in database queries per request", ("route",))
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "Database query latency", ("engine",))
+POOL_CHECKOUT_SECONDS = Histogram("db_pool_checkout_seconds", "Time to check a connection out of the pool (includes connecting)", ("pool",))
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no extra task per request, unlike BaseHTTPMiddleware)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            IN_PROGRESS.dec(method)
+            _request_stats.reset(token)
+            # the router stores the matched route in the (shared) scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUESTS.inc(method, route, status)
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            REQUEST_QUERIES.observe(stats.queries, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route)
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Count and time every statement run on `engine` (pass async_engine.sync_engine for async engines)."""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        elapsed = perf_counter() - start
+        QUERY_SECONDS.observe(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(perf_counter() - start, "sync")
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(perf_counter() - start, "async")
+
+
+# default pool class -> instrumented drop-in replacement
+TIMED_POOLS = {QueuePool: TimedQueuePool, AsyncAdaptedQueuePool: TimedAsyncAdaptedQueuePool}
+
+
+def register_collector(prefix: str, collect: Callable[[], dict], **labels: str):
+    """
+    Export the numeric values of collect() as gauges named {prefix}_{key} on every scrape.
+    Registering the same prefix and labels again replaces the collector (one per app instance).
+    """
+    _collectors[(prefix, *labels.items())] = (prefix, collect, labels)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    # collectors may share a name across label sets (e.g. one per pool); group samples under one TYPE line
+    gauges: dict[str, list[str]] = {}
+    for prefix, collect, labels in _collectors.values():
+        label_text = _labels_text(tuple(labels), tuple(labels.values()))
+        for key, value in collect().items():
+            if isinstance(value, (int, float)):
+                gauges.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{label_text} {float(value)}")
+    for name, samples in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
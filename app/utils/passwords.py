@@ -0,0 +1,20 @@
+"""
+bcrypt hashing, kept free of app imports so process-pool workers start quickly.
+
+passlib (and the bcrypt backend behind it) is imported on first use, not at worker boot.
+"""
+from functools import cache
+
+
+@cache
+def _context(rounds: int | None = None):
+    from passlib.context import CryptContext
+    # rounds go into the context: passlib deprecates passing them to hash()
+    settings = {"bcrypt__rounds": rounds} if rounds is not None else {}
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", **settings)
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    return _context(rounds).hash(password)
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _context().verify(plain, hashed)
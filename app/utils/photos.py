@@ -0,0 +1,320 @@
+"""
+Student photo storage: streamed multipart uploads, content-addressed (SHA-256) originals,
+background WebP variants and garbage collection of unreferenced files.
+"""
+import asyncio
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import formatdate
+from pathlib import Path
+from threading import Lock
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from app.core.config import UPLOAD_DIR, PHOTO_WORKERS, PHOTO_CACHE_MAX_BYTES
+from app.utils import imaging
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+MULTIPART_OVERHEAD = 16 * 1024  # boundaries and part headers around the file
+VARIANTS_DIR = UPLOAD_DIR / "variants"
+TMP_DIR = UPLOAD_DIR / "tmp"
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(400, f"File too large. Max size: {MAX_FILE_SIZE // (1024*1024)}MB")
+
+
+async def receive_upload(request: Request, field: str = "file") -> Path:
+    """
+    Stream the `field` file part of a multipart request to disk, hashing as it goes.
+    Oversized uploads are rejected from Content-Length, or as soon as the limit is crossed.
+    Returns the content-addressed path of the stored original.
+    """
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        raise _too_large()
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(400, "Expected a multipart/form-data upload")
+
+    state = {"headers": {}, "name": b"", "value": b"", "in_file": False, "ext": None, "size": 0, "done": False}
+    hasher = hashlib.sha256()
+    pending: list[bytes] = []
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["name"].lower()] = state["value"]
+        state["name"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if options.get(b"name") != field.encode() or b"filename" not in options or state["done"]:
+            return
+        ext = os.path.splitext(options[b"filename"].decode("utf-8", "replace"))[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(400, f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+        state["ext"], state["in_file"] = ext, True
+
+    def on_part_data(data, start, end):
+        if not state["in_file"]:
+            return
+        state["size"] += end - start
+        if state["size"] > MAX_FILE_SIZE:
+            raise _too_large()
+        chunk = bytes(data[start:end])
+        hasher.update(chunk)
+        pending.append(chunk)
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"], state["done"] = False, True
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = TMP_DIR / uuid.uuid4().hex
+    out = await run_in_threadpool(open, tmp, "wb")
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if pending:
+                data = b"".join(pending)
+                pending.clear()
+                await run_in_threadpool(out.write, data)
+        parser.finalize()
+        await run_in_threadpool(out.close)
+        if not state["done"]:
+            raise HTTPException(400, "No file uploaded")
+        dest = UPLOAD_DIR / f"{hasher.hexdigest()}{state['ext']}"
+        if dest.exists():
+            tmp.unlink()  # identical content already stored
+        else:
+            os.replace(tmp, dest)
+        return dest
+    except BaseException:
+        out.close()
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def thumbnail_for(photo_path: str | None, variant: str = "thumb") -> str | None:
+    """
+    Path of a stored photo's variant. Variants are named by the original's content hash, so this
+    needs no filesystem check; until the pipeline has written it, photo_response serves the original.
+    """
+    if not photo_path:
+        return None
+    return str(imaging.variant_path(VARIANTS_DIR, Path(photo_path).stem, variant))
+
+
+def delete_photo(photo_path: str):
+    """Remove an original and its variants. Only files inside UPLOAD_DIR are touched."""
+    path = Path(photo_path)
+    if path.resolve().parent != UPLOAD_DIR.resolve():
+        return
+    path.unlink(missing_ok=True)
+    for name in imaging.VARIANTS:
+        imaging.variant_path(VARIANTS_DIR, path.stem, name).unlink(missing_ok=True)
+
+
+def sweep_orphans(referenced: set[str], tmp_max_age: float = 3600) -> int:
+    """Delete originals and variants no student points at, plus stale partial uploads."""
+    keep = {Path(p).name for p in referenced}
+    keep_stems = {Path(p).stem for p in referenced}
+    removed = 0
+    for path in UPLOAD_DIR.glob("*"):
+        if path.is_file() and path.name not in keep:
+            path.unlink(); removed += 1
+    for path in VARIANTS_DIR.glob("*.webp"):
+        if path.stem.rsplit("_", 1)[0] not in keep_stems:
+            path.unlink(); removed += 1
+    for path in TMP_DIR.glob("*"):
+        if time.time() - path.stat().st_mtime > tmp_max_age:
+            path.unlink(); removed += 1
+    return removed
+
+
+MEDIA_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"}
+IMMUTABLE = "private, max-age=31536000, immutable"
+REVALIDATE = "private, no-cache"
+
+
+class ThumbnailCache:
+    """Byte-bounded LRU of small variant files: path -> (body, mtime)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, path: Path) -> tuple[bytes, float] | None:
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, path: Path, body: bytes, mtime: float):
+        if len(body) > self.max_bytes // 8:
+            return
+        key = str(path)
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (body, mtime)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (old, _) = self._entries.popitem(last=False)
+                self.size -= len(old)
+
+
+thumbnail_cache = ThumbnailCache(PHOTO_CACHE_MAX_BYTES)
+
+
+def photo_version(photo_path: str) -> str:
+    # originals are named by content hash, so the stem identifies the bytes
+    return Path(photo_path).stem[:16]
+
+
+def photo_url(student_id: int, photo_path: str | None, size: str = "original") -> str | None:
+    if not photo_path:
+        return None
+    query = f"?size={size}&v=" if size != "original" else "?v="
+    return f"/students/{student_id}/photo{query}{photo_version(photo_path)}"
+
+
+async def photo_response(request: Request, photo_path: str, size: str, version: str | None) -> Response:
+    """
+    Serve an original or variant with a content-hash ETag. Versioned URLs (matching ?v=) are
+    cacheable forever; a missing variant falls back to the original without long-lived caching.
+    """
+    path = Path(photo_path)
+    etag_base = path.stem
+    cache_control = IMMUTABLE if version == photo_version(photo_path) else REVALIDATE
+    if size != "original":
+        variant = imaging.variant_path(VARIANTS_DIR, path.stem, size)
+        if variant.exists():
+            path, etag_base = variant, f"{etag_base}-{size}"
+        else:
+            cache_control = REVALIDATE
+    etag = f'"{etag_base}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    media_type = MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream")
+    if path.parent == VARIANTS_DIR and "range" not in request.headers:
+        cached = thumbnail_cache.get(path)
+        if cached is None:
+            try:
+                body = await run_in_threadpool(path.read_bytes)
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                raise HTTPException(404, "Photo not found")
+            thumbnail_cache.put(path, body, mtime)
+            cached = (body, mtime)
+        body, mtime = cached
+        return Response(body, media_type=media_type,
+                        headers={**headers, "Last-Modified": formatdate(mtime, usegmt=True), "Accept-Ranges": "bytes"})
+
+    if not path.exists():
+        raise HTTPException(404, "Photo not found")
+    # FileResponse handles Range requests and uses the server's pathsend/sendfile support when present
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+class PhotoPipeline:
+    """Generates resized WebP variants in a background process pool."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._inflight: set[asyncio.Future] = set()
+
+    def schedule(self, original: Path):
+        digest = original.stem
+        if self.workers <= 0 or all(
+            imaging.variant_path(VARIANTS_DIR, digest, name).exists() for name in imaging.VARIANTS
+        ):
+            return
+        for _ in range(2):
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._pool, imaging.make_variants, str(original), str(VARIANTS_DIR), digest
+                )
+            except BrokenProcessPool:
+                # a worker died (OOM kill, crash in a decoder): start a fresh pool and retry once
+                logger.error("photo worker pool is broken, restarting it")
+                self._reset(self._pool)
+                continue
+            self._inflight.add(future)
+            future.add_done_callback(functools.partial(self._finished, self._pool))
+            return
+        logger.error("photo variants for %s not scheduled: worker pool keeps breaking", digest)
+
+    def _reset(self, pool: ProcessPoolExecutor):
+        if self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _finished(self, pool: ProcessPoolExecutor, future: asyncio.Future):
+        self._inflight.discard(future)
+        if future.cancelled():
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            logger.error("photo worker pool broke while generating variants: %s", future.exception())
+            self._reset(pool)  # the next upload starts a fresh one
+            return
+        if future.exception():
+            logger.warning("photo variant generation failed: %s", future.exception())
+
+    async def drain(self):
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+photo_pipeline = PhotoPipeline(PHOTO_WORKERS)
@@ -0,0 +1,146 @@
+"""
+Opt-in SQL profiling for development and staging (QUERY_PROFILE=true).
+
+Every statement a request runs is recorded with its timing. Statements slower than
+SLOW_QUERY_MS are logged together with their EXPLAIN output, and a statement shape that
+repeats N_PLUS_ONE_THRESHOLD times in one request is reported as a likely N+1. Routes can
+declare a query budget with @query_budget(n); with QUERY_PROFILE_STRICT=true (the test
+suite) exceeding a budget or tripping the N+1 detector raises instead of logging.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD, QUERY_PROFILE_EXPLAIN, QUERY_PROFILE_STRICT
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryProfile:
+    def __init__(self, label: str):
+        self.label = label
+        self.queries: list[tuple[str, float]] = []  # (statement, seconds), in execution order
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes (SQL with bound parameters left as placeholders) run at least `threshold` times."""
+        counts = Counter(statement for statement, _ in self.queries)
+        return [(statement, n) for statement, n in counts.most_common() if n >= threshold]
+
+    def check(self, budget: int | None, strict: bool = QUERY_PROFILE_STRICT, chunked: bool = False):
+        problems = []
+        if budget is not None and len(self.queries) > budget:
+            problems.append(f"{self.label} ran {len(self.queries)} queries, budget is {budget}")
+        for statement, n in ([] if chunked else self.repeated()):
+            problems.append(f"{self.label} ran the same statement {n} times (possible N+1): {statement}")
+        for problem in problems:
+            logger.warning(problem)
+        if strict and problems:
+            raise QueryBudgetExceeded("\n".join(problems))
+
+
+_profile: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+
+
+def query_budget(max_queries: int | None, chunked: bool = False):
+    """
+    Declare the most queries a route may run; checked by QueryProfileMiddleware.
+
+    chunked=True marks routes that repeat the same statements once per chunk of input by
+    design (their cost grows with the payload), which exempts them from N+1 detection.
+    """
+    def decorate(endpoint):
+        endpoint.query_budget = max_queries
+        endpoint.query_chunked = chunked
+        return endpoint
+    return decorate
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = "block"):
+    """Raise QueryBudgetExceeded if the block runs more than `max_queries` statements (or an N+1 pattern)."""
+    profile = QueryProfile(label)
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+    profile.check(max_queries, strict=True)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None:
+        return "(EXPLAIN not supported for this dialect)"
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    except Exception as e:  # profiling must never break the request it observes
+        return f"(EXPLAIN failed: {e})"
+    # SQLite: (id, parent, notused, detail); PostgreSQL: one text column per plan line
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def instrument_engine(engine: Engine):
+    """Record statements run on `engine` into the active profile (pass async_engine.sync_engine for async engines)."""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profile_start = perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_profile_start", None)
+        if start is None or conn.info.get("profiling_explain"):
+            return
+        elapsed = perf_counter() - start
+        profile = _profile.get()
+        if profile is not None:
+            profile.queries.append((statement, elapsed))
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            plan = ""
+            if QUERY_PROFILE_EXPLAIN and not executemany:
+                conn.info["profiling_explain"] = True
+                try:
+                    plan = "\n" + _explain(conn, statement, parameters)
+                finally:
+                    conn.info.pop("profiling_explain", None)
+            logger.warning("slow query (%.1f ms) in %s: %s %r%s", elapsed * 1000,
+                           profile.label if profile else "background", statement, parameters, plan)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+class QueryProfileMiddleware:
+    """Pure ASGI middleware: profiles each request and checks it against the route's budget."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = _profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+        route = scope.get("route")
+        if route is not None:
+            profile.label = f"{scope['method']} {route.path}"
+        logger.info("%s: %d queries, %.1f ms in the database", profile.label, len(profile.queries), profile.total_seconds * 1000)
+        endpoint = getattr(route, "endpoint", None)
+        profile.check(getattr(endpoint, "query_budget", None), chunked=getattr(endpoint, "query_chunked", False))
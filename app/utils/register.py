@@ -0,0 +1,115 @@
+"""
+Monthly attendance register: one row per student, one column per day of the month.
+
+The grid is a flat bytearray of status codes, one byte per student-day (0 = not marked),
+filled from a single class x month query and rendered as packed JSON, CSV or XLSX.
+"""
+import calendar
+import csv
+import io
+import tempfile
+from datetime import date
+from typing import Iterable, Iterator
+
+# code -> status; the JSON "marks" strings hold one code digit per day
+LEGEND = (None, "present", "absent", "leave")
+CODES = {status: code for code, status in enumerate(LEGEND) if status}
+CSV_MARKS = ("", "P", "A", "L")
+_DIGITS = bytes.maketrans(bytes(range(len(LEGEND))), "".join(str(c) for c in range(len(LEGEND))).encode())
+CHUNK_ROWS = 500
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+class Register:
+    def __init__(self, class_name: str, year: int, month: int):
+        self.class_name = class_name
+        self.year = year
+        self.month = month
+        self.days = calendar.monthrange(year, month)[1]
+        self.students: list[tuple[int, str, str]] = []  # (id, roll_no, name), in row order
+        self.grid = bytearray()
+
+    @classmethod
+    def from_rows(cls, class_name: str, year: int, month: int, rows: Iterable[tuple]) -> "Register":
+        """Build from (student_id, roll_no, name, attendance_date, status) rows grouped by student;
+        students without a mark that month come with attendance_date None."""
+        register = cls(class_name, year, month)
+        positions: dict[int, int] = {}
+        for student_id, roll_no, name, att_date, status in rows:
+            row = positions.get(student_id)
+            if row is None:
+                row = positions[student_id] = len(register.students)
+                register.students.append((student_id, roll_no, name))
+                register.grid.extend(bytes(register.days))
+            if att_date is not None:
+                register.grid[row * register.days + att_date.day - 1] = CODES.get(status, 0)
+        return register
+
+    def marks(self, row: int) -> bytearray:
+        return self.grid[row * self.days:(row + 1) * self.days]
+
+    def daily_counts(self, code: int) -> list[int]:
+        return [self.grid[day::self.days].count(code) for day in range(self.days)]
+
+    def to_json(self) -> dict:
+        students = []
+        for row, (student_id, roll_no, name) in enumerate(self.students):
+            marks = self.marks(row)
+            students.append({
+                "student_id": student_id,
+                "roll_no": roll_no,
+                "name": name,
+                "marks": marks.translate(_DIGITS).decode(),
+                **{status: marks.count(code) for status, code in CODES.items()},
+            })
+        return {
+            "class_name": self.class_name,
+            "year": self.year,
+            "month": self.month,
+            "days": self.days,
+            "legend": LEGEND,
+            "students": students,
+            "daily": {status: self.daily_counts(code) for status, code in CODES.items()},
+        }
+
+    def _header(self) -> list[str]:
+        return ["Roll No", "Student Name", *(str(d) for d in range(1, self.days + 1)), "Present", "Absent", "Leave"]
+
+    def _table_rows(self) -> Iterator[list]:
+        for row, (_, roll_no, name) in enumerate(self.students):
+            marks = self.marks(row)
+            yield [roll_no, name, *(CSV_MARKS[c] for c in marks), *(marks.count(code) for code in CODES.values())]
+
+    def csv_chunks(self) -> Iterator[bytes]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(self._header())
+        for i, values in enumerate(self._table_rows(), 1):
+            writer.writerow(values)
+            if i % CHUNK_ROWS == 0:
+                yield buf.getvalue().encode()
+                buf.seek(0); buf.truncate()
+        yield buf.getvalue().encode()
+
+    def xlsx_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Write the workbook row by row (xlsxwriter constant-memory mode) to a spooled temp file, then stream it."""
+        import xlsxwriter
+
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as out:
+            workbook = xlsxwriter.Workbook(out, {"constant_memory": True})
+            sheet = workbook.add_worksheet(f"{self.year}-{self.month:02d}")
+            bold = workbook.add_format({"bold": True})
+            sheet.freeze_panes(1, 2)
+            sheet.set_column(1, 1, 24)
+            sheet.set_column(2, self.days + 1, 3)
+            sheet.write_row(0, 0, self._header(), bold)
+            for r, values in enumerate(self._table_rows(), 1):
+                sheet.write_row(r, 0, values)
+            workbook.close()
+            out.seek(0)
+            while chunk := out.read(chunk_size):
+                yield chunk
@@ -1,49 +1,214 @@
-from passlib.context import CryptContext
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, UTC
-from jose import jwt, JWTError
+from threading import Lock
+import asyncio
+import logging
+import multiprocessing
+import time
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES, ADMIN_CLAIM_IN_TOKEN,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE,
+)
+from app.db import base as db_base
+from app.utils import passwords
+
+logger = logging.getLogger(__name__)
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security_scheme = HTTPBearer()
 
 def hash_password(password: str) -> str:
-    return pwd_ctx.hash(password)
+    return passwords.hash_password(password, BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded process pool. At most `max_queue` calls may be pending; beyond
+    that callers get a 503 instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs threads and event loops is unsafe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Too many concurrent logins, retry shortly",
+                                    headers={"Retry-After": "1"})
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            if self.workers > 0:
+                pool = self._executor()
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+                except BrokenProcessPool:
+                    # a worker died: the next call gets a fresh pool, this one is hashed in a thread
+                    logger.error("password hashing pool is broken, restarting it")
+                    self._discard(pool)
+            return await run_in_threadpool(fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += time.perf_counter() - start
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_ctx.verify(plain, hashed)
+    async def hash(self, password: str) -> str:
+        return await self._run(passwords.hash_password, password, BCRYPT_ROUNDS)
 
-def create_access_token(subject: str | int, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES):
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(passwords.verify_password, plain, hashed)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+def create_access_token(subject: str | int, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES, is_admin: bool | None = None):
+    from jose import jwt  # deferred: jose pulls in the whole cryptography package at import
     to_encode = {"sub": str(subject)}
+    if ADMIN_CLAIM_IN_TOKEN and is_admin is not None:
+        to_encode["adm"] = bool(is_admin)
     expire = datetime.now(UTC) + timedelta(minutes=expires_minutes)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def decode_token(token: str) -> int:
+def decode_token_payload(token: str) -> dict:
+    from jose import jwt, JWTError
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return int(user_id)
-    except JWTError:
+        payload["sub"] = int(user_id)
+        return payload
+    except (JWTError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+def decode_token(token: str) -> int:
+    return decode_token_payload(token)["sub"]
+
+
+class AuthCache:
+    """TTL + LRU cache of user authorization state: user id -> is_admin (None if the user does not exist)."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, bool | None]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> tuple[bool, bool | None]:
+        """Return (found, is_admin)."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return False, None
+
+    def set(self, user_id: int, is_admin: bool | None):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, is_admin)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int | None = None):
+        """Drop one user's entry, or everything when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+auth_cache = AuthCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+
+def invalidate_user_auth(user_id: int | None = None):
+    """Call whenever a user is created, deleted or has is_admin changed."""
+    auth_cache.invalidate(user_id)
+
 def get_current_user(token: HTTPAuthorizationCredentials = Depends(security_scheme)) -> int:
     return decode_token(token.credentials)
 
-def get_current_admin(token: HTTPAuthorizationCredentials = Depends(security_scheme)) -> int:
-    from app.db.base import get_db
+async def get_current_admin(token: HTTPAuthorizationCredentials = Depends(security_scheme), db: AsyncSession = Depends(db_base.get_async_db)) -> int:
     from app.db.models import User
-    user_id = decode_token(token.credentials)
-    db_gen = get_db()
-    db = next(db_gen)
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user or not user.is_admin:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-        return user_id
-    finally:
-        db.close()
+    payload = decode_token_payload(token.credentials)
+    user_id = payload["sub"]
+
+    # the claim is only trusted while tokens are issued with it; otherwise is_admin is looked up
+    if ADMIN_CLAIM_IN_TOKEN and "adm" in payload:
+        is_admin = payload["adm"]
+    else:
+        found, is_admin = auth_cache.get(user_id)
+        if not found:
+            # shares the request's session: FastAPI resolves get_async_db once per request
+            is_admin = await db.scalar(select(User.is_admin).where(User.id == user_id))
+            auth_cache.set(user_id, is_admin)
+    if not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user_id
@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark runs the API in-process against a throwaway SQLite database
+created in a temporary directory, so nothing touches your real attendance.db.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_client():
+    """Return (client, admin_headers) for a fresh database."""
+    workdir = tempfile.mkdtemp(prefix="attendance-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/attendance.db")
+    os.environ.setdefault("UPLOAD_DIR", f"{workdir}/uploads")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.db.base import SessionLocal, create_schema
+    from app.db import models
+    from app.utils.security import create_access_token
+
+    create_schema()
+    db = SessionLocal()
+    admin = models.User(email="bench@example.com", hashed_password="!", is_admin=True)
+    db.add(admin); db.commit(); db.refresh(admin)
+    db.close()
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(subject=admin.id)}"}
+    return client, headers
+
+
+def seed_students(count: int, class_size: int = 60) -> list[int]:
+    """Bulk insert `count` students spread over classes of `class_size`."""
+    from sqlalchemy import insert, select
+    from app.db.base import SessionLocal
+    from app.db import models
+
+    db = SessionLocal()
+    rows = [
+        {"roll_no": f"R{i:07d}", "name": f"Student {i}", "class_name": f"C{i // class_size:04d}"}
+        for i in range(count)
+    ]
+    db.execute(insert(models.Student), rows)
+    db.commit()
+    ids = list(db.scalars(select(models.Student.id).order_by(models.Student.id)))
+    db.close()
+    return ids
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def seed_attendance(student_ids: list[int], days: int, start=None, batch: int = 50_000) -> int:
+    """Bulk insert one attendance row per student per day; returns the row count."""
+    from datetime import date, datetime, timedelta, UTC
+    from sqlalchemy import insert
+    from app.db.base import SessionLocal
+    from app.db import models, summary
+
+    start = start or date(2024, 1, 1)
+    statuses = ("present", "present", "present", "absent", "leave")
+    now = datetime.now(UTC)
+    db = SessionLocal()
+    rows, total = [], 0
+    for d in range(days):
+        day = start + timedelta(days=d)
+        for sid in student_ids:
+            rows.append({"student_id": sid, "attendance_date": day, "status": statuses[(sid + d) % 5],
+                         "timestamp": now, "note": None})
+            if len(rows) >= batch:
+                db.execute(insert(models.Attendance), rows); total += len(rows); rows = []
+    if rows:
+        db.execute(insert(models.Attendance), rows); total += len(rows)
+    db.commit()
+    summary.rebuild(db)  # direct inserts bypass the incremental dashboard summary
+    db.close()
+    return total
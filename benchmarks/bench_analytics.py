@@ -0,0 +1,66 @@
+"""
+Latency of the /admin/analytics endpoints over a full academic year.
+
+The first request pays for loading the attendance table into the columnar mirror;
+the timed requests after it run with the response cache invalidated, so each one
+recomputes from the arrays. A single-row mark between rounds exercises the
+incremental catch-up.
+
+    python benchmarks/bench_analytics.py --students 5000 --days 200 --rounds 20
+"""
+import argparse
+import statistics
+from datetime import date, timedelta
+
+from _common import make_client, seed_students, seed_attendance, Timer
+
+QUERIES = {
+    "students (full year)": ("/admin/analytics/students", {}),
+    "students (one term)": ("/admin/analytics/students", {"from_date": "2024-01-01", "to_date": "2024-04-30"}),
+    "students (chronic)": ("/admin/analytics/students", {"chronic_only": "true", "chronic_threshold": "20"}),
+    "students (one class)": ("/admin/analytics/students", {"class_name": "C0003"}),
+    "classes (full year)": ("/admin/analytics/classes", {}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    ids = seed_students(args.students, class_size=40)
+    rows = seed_attendance(ids, days=args.days)
+
+    from app.utils.cache import invalidate_responses
+
+    with Timer() as cold:
+        r = client.get("/admin/analytics/classes", headers=headers)
+        assert r.status_code == 200, r.text
+    print(f"{rows} attendance rows, {args.students} students")
+    print(f"  cold load (first request)   {cold.elapsed * 1000:9.1f} ms")
+
+    for label, (path, params) in QUERIES.items():
+        samples = []
+        for _ in range(args.rounds):
+            invalidate_responses()
+            with Timer() as t:
+                r = client.get(path, params=params, headers=headers)
+                assert r.status_code == 200, r.text
+            samples.append(t.elapsed * 1000)
+        samples.sort()
+        print(f"  {label:26}  p50 {statistics.median(samples):7.1f} ms  "
+              f"p95 {samples[int(len(samples) * 0.95) - 1]:7.1f} ms  {len(r.content) / 1e3:7.0f} kB")
+
+    day = date(2024, 1, 1) + timedelta(days=args.days)
+    r = client.post("/attendance/mark", json={"student_id": ids[0], "status": "absent", "date": day.isoformat()}, headers=headers)
+    assert r.status_code == 200, r.text
+    with Timer() as catch_up:
+        client.get("/admin/analytics/classes", headers=headers)
+    print(f"  after one new mark          {catch_up.elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
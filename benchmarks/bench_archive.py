@@ -0,0 +1,91 @@
+"""
+Several academic years of history in the attendance table, then the closed years moved to
+the columnar archive (manage.py archive). Compares storage and the latency of listings and
+exports over the current year, and over an archived year, before and after.
+
+    python benchmarks/bench_archive.py --students 2000 --years 4 --days 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ.setdefault("ARCHIVE_DIR", tempfile.mkdtemp(prefix="attendance-archive-"))
+
+from _common import make_client, seed_students, seed_attendance, Timer
+
+
+def time_requests(client, headers, queries: dict, rounds: int) -> dict[str, float]:
+    from app.utils.cache import invalidate_responses
+    results = {}
+    for label, (path, params) in queries.items():
+        samples = []
+        for _ in range(rounds):
+            invalidate_responses()
+            with Timer() as t:
+                r = client.get(path, params=params, headers=headers)
+            assert r.status_code == 200, r.text
+            samples.append(t.elapsed * 1000)
+        results[label] = statistics.median(samples)
+    return results
+
+
+def database_bytes() -> int:
+    from sqlalchemy import text
+    from app.db.base import engine
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+        return conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=4, help="academic years of history; all but the last are archived")
+    parser.add_argument("--days", type=int, default=200, help="school days per year")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    from app.db.archive import archive_year, year_bounds
+    from app.db.base import SessionLocal
+
+    ids = seed_students(args.students, class_size=40)
+    first_year = date.today().year - args.years
+    rows = sum(seed_attendance(ids, days=args.days, start=year_bounds(first_year + y)[0]) for y in range(args.years))
+    current, archived = year_bounds(first_year + args.years - 1), year_bounds(first_year)
+    queries = {
+        "class, current year (page of 100)": ("/attendance/", {"class_name": "C0003", "from_date": current[0].isoformat(), "limit": 100}),
+        "student, current year": ("/attendance/", {"student_id": ids[7], "from_date": current[0].isoformat()}),
+        "export, current year": ("/attendance/export", {"from_date": current[0].isoformat()}),
+        "student, archived year": ("/attendance/", {"student_id": ids[7], "from_date": archived[0].isoformat(),
+                                                    "to_date": (archived[1] - timedelta(days=1)).isoformat()}),
+        "class export, archived year": ("/attendance/export", {"class_name": "C0003", "from_date": archived[0].isoformat(),
+                                                               "to_date": (archived[1] - timedelta(days=1)).isoformat()}),
+    }
+
+    size_before = database_bytes()
+    before = time_requests(client, headers, queries, args.rounds)
+
+    archive_bytes = 0
+    with Timer() as moving:
+        for y in range(args.years - 1):
+            with SessionLocal() as db:
+                path, _ = archive_year(db, first_year + y)
+            archive_bytes += path.stat().st_size
+    size_after = database_bytes()
+    after = time_requests(client, headers, queries, args.rounds)
+
+    print(f"{args.students} students x {args.years} years x {args.days} days = {rows} rows; "
+          f"archived {args.years - 1} years in {moving.elapsed:.1f} s")
+    print(f"  storage: database {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+          f"+ archive files {archive_bytes / 1e6:.2f} MB ({Path(os.environ['ARCHIVE_DIR'])})")
+    print(f"  {'median latency (ms)':38}{'table':>10}{'archived':>10}")
+    for label in queries:
+        print(f"  {label:38}{before[label]:10.1f}{after[label]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
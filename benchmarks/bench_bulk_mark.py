@@ -0,0 +1,46 @@
+"""
+Compare marking a whole class through POST /attendance/mark (one request per
+student) against a single POST /attendance/mark-bulk.
+
+    python benchmarks/bench_bulk_mark.py --class-size 60 --days 5
+"""
+import argparse
+from datetime import date, timedelta
+
+from _common import make_client, seed_students, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--class-size", type=int, default=60)
+    parser.add_argument("--days", type=int, default=5)
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    ids = seed_students(args.class_size, class_size=args.class_size)
+    start = date(2024, 1, 1)
+
+    with Timer() as per_row:
+        for d in range(args.days):
+            day = (start + timedelta(days=d)).isoformat()
+            for sid in ids:
+                r = client.post("/attendance/mark", json={"student_id": sid, "status": "present", "date": day}, headers=headers)
+                assert r.status_code == 200, r.text
+
+    start = start + timedelta(days=args.days)
+    with Timer() as bulk:
+        for d in range(args.days):
+            day = (start + timedelta(days=d)).isoformat()
+            records = [{"student_id": sid, "status": "present"} for sid in ids]
+            r = client.post("/attendance/mark-bulk", json={"date": day, "records": records}, headers=headers)
+            assert r.status_code == 200 and not r.json()["conflicts"], r.text
+
+    marks = args.class_size * args.days
+    print(f"{marks} marks ({args.days} roll calls of {args.class_size} students)")
+    print(f"  per-row : {per_row.elapsed:8.3f}s  {marks / per_row.elapsed:10.0f} marks/s")
+    print(f"  bulk    : {bulk.elapsed:8.3f}s  {marks / bulk.elapsed:10.0f} marks/s")
+    print(f"  speedup : {per_row.elapsed / bulk.elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Worker cold start: each run is a fresh interpreter that imports app.main, runs the
+lifespan startup and serves one authenticated request, the way a newly spawned
+gunicorn worker does. Reports the best and median of each phase, plus the heaviest
+top-level packages from `python -X importtime`.
+
+The schema is created up front with `manage.py migrate`, as a deploy would. Pass
+--root to time another checkout of the repository (e.g. the previous release) against
+the same database.
+
+    python benchmarks/bench_cold_start.py --runs 10 [--root ../attendance-previous]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SECRET_KEY = "bench-cold-start"
+
+CHILD = """
+import time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+import asyncio, json, sys
+import httpx
+
+async def serve():
+    api = app.main.app
+    async with api.router.lifespan_context(api):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://bench") as client:
+            r = await client.get("/students/", headers={"Authorization": "Bearer %s"})
+            assert r.status_code == 200, r.text
+        return started, time.perf_counter()
+
+started, served = asyncio.run(serve())
+print(json.dumps({"import": imported - start, "startup": started - imported,
+                  "first_request": served - started, "modules": len(sys.modules)}))
+"""
+
+
+def make_token() -> str:
+    from datetime import datetime, timedelta, UTC
+    from jose import jwt
+    return jwt.encode({"sub": "1", "exp": datetime.now(UTC) + timedelta(hours=1)}, SECRET_KEY, algorithm="HS256")
+
+
+def run_once(root: Path, env: dict, token: str) -> dict:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD % token], env=env, cwd=root,
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start  # interpreter start to first response, and exit
+    return result
+
+
+def import_profile(root: Path, env: dict, top: int) -> list[tuple[str, float]]:
+    """Self import time of every module loaded by `import app.main`, summed per top-level package."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, cwd=root,
+                         check=True, capture_output=True, text=True).stderr
+    totals = defaultdict(float)
+    for line in err.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        totals[fields[2].strip().split(".")[0]] += int(fields[0]) / 1e6
+    return sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--root", type=Path, default=ROOT, help="repository checkout to time")
+    parser.add_argument("--top", type=int, default=12, help="packages to list in the import profile")
+    args = parser.parse_args()
+    root = args.root.resolve()
+
+    workdir = tempfile.mkdtemp(prefix="attendance-bench-")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{workdir}/attendance.db",
+           "UPLOAD_DIR": f"{workdir}/uploads", "SECRET_KEY": SECRET_KEY}
+    subprocess.run([sys.executable, "manage.py", "migrate"], env=env, cwd=root, check=True, capture_output=True)
+    token = make_token()
+
+    runs = [run_once(root, env, token) for _ in range(args.runs)]
+    print(f"{root} ({args.runs} cold starts, {runs[0]['modules']} modules loaded)")
+    for phase in ("import", "startup", "first_request", "process"):
+        samples = [r[phase] * 1000 for r in runs]
+        print(f"  {phase:14}: best {min(samples):7.1f} ms   median {statistics.median(samples):7.1f} ms")
+
+    print("import time by top-level package:")
+    for package, seconds in import_profile(root, env, args.top):
+        print(f"  {package:24} {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
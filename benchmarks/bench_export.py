@@ -0,0 +1,66 @@
+"""
+Time-to-first-byte and peak Python heap of the CSV export at increasing sizes.
+
+The export generator is driven directly (the test client buffers responses,
+which would hide streaming behaviour). Each size gets a fresh database.
+
+    python benchmarks/bench_export.py --sizes 1000,100000,1000000 [--gzip]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def run_one(rows: int, compress: bool):
+    from _common import make_client, seed_students, seed_attendance
+    make_client()
+    students = min(rows, 2000)
+    ids = seed_students(students)
+    seed_attendance(ids, days=max(1, rows // students))
+
+    from app.api.attendance import _csv_chunks, _export_statement
+    stmt = _export_statement(None, None, None, None)
+
+    async def drain():
+        start = time.perf_counter()
+        ttfb, size = None, 0
+        async for chunk in _csv_chunks(stmt, compress=compress):
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+        return ttfb, size, time.perf_counter() - start
+
+    ttfb, size, total = asyncio.run(drain())
+
+    gc.collect()
+    tracemalloc.start()
+    asyncio.run(drain())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{rows:>10} rows  ttfb {ttfb * 1000:8.2f} ms  total {total:8.2f} s  "
+          f"{size / 1e6:9.1f} MB out  peak heap {peak / 1e6:7.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        run_one(args.one, args.gzip)
+        return
+    # one process per size so every run starts from a clean heap and database
+    for rows in (int(s) for s in args.sizes.split(",")):
+        cmd = [sys.executable, os.path.abspath(__file__), "--one", str(rows)] + (["--gzip"] if args.gzip else [])
+        subprocess.run(cmd, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == "__main__":
+    main()
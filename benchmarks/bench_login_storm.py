@@ -0,0 +1,97 @@
+"""
+/attendance/mark latency while a burst of logins is being hashed, with bcrypt running
+inline in the threadpool (PASSWORD_HASH_WORKERS=0) versus the dedicated process pool.
+
+    python benchmarks/bench_login_storm.py --logins 40 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+async def probe(client, headers, ids, stop):
+    latencies, n = [], 0
+    while not stop.is_set():
+        body = {"student_id": ids[n % len(ids)], "status": "present",
+                "date": (date(2024, 1, 1) + timedelta(days=n // len(ids))).isoformat()}
+        start = time.perf_counter()
+        r = await client.post("/attendance/mark", json=body, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert r.status_code == 200, r.text
+        n += 1
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {label:<14} mark p50 {statistics.median(latencies) * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms   ({len(latencies)} marks)")
+
+
+async def run_one(logins: int):
+    import httpx
+    from _common import make_client, seed_students
+    _, headers = make_client()
+    ids = seed_students(200)
+
+    from app.main import app
+    from app.db.base import SessionLocal
+    from app.db import models
+    from app.utils.security import hash_password, password_hasher
+
+    db = SessionLocal()
+    db.add(models.User(email="teacher@example.com", hashed_password=hash_password("secret"), is_admin=False))
+    db.commit(); db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/auth/login", json={"email": "teacher@example.com", "password": "secret"})  # warm the pool
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, ids, stop))
+        await asyncio.sleep(1.0)
+        stop.set()
+        summarize("idle", await task)
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, ids[100:], stop))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            client.post("/auth/login", json={"email": "teacher@example.com", "password": "secret"})
+            for _ in range(logins)
+        ))
+        burst = time.perf_counter() - start
+        stop.set()
+        summarize("login storm", await task)
+        codes = {r.status_code for r in results}
+        print(f"  {logins} logins in {burst:.2f}s, statuses {sorted(codes)}, hasher {password_hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        asyncio.run(run_one(args.logins))
+        return
+    for label, workers in (("inline (threadpool)", "0"), ("process pool", os.getenv("PASSWORD_HASH_WORKERS", "2"))):
+        print(f"--- bcrypt {label}")
+        env = {**os.environ, "PASSWORD_HASH_WORKERS": workers, "BCRYPT_ROUNDS": str(args.rounds)}
+        env.pop("DATABASE_URL", None)
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--one", "--logins", str(args.logins)],
+                       env=env, cwd=HERE, check=True)
+
+
+if __name__ == "__main__":
+    main()
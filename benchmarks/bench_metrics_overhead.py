@@ -0,0 +1,112 @@
+"""
+Per-request cost of the /metrics instrumentation (middleware, SQLAlchemy cursor
+events, timed pool checkouts): the same sequential request mix is timed with
+METRICS_ENABLED=false and =true, each in a fresh process and database. Runs
+alternate between the two modes and the best of each is kept. End-to-end numbers
+are noisy at this scale, so the middleware and the cursor events are also timed
+in isolation.
+
+    python benchmarks/bench_metrics_overhead.py --requests 2000 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_one(requests: int):
+    import httpx
+    from _common import make_client, seed_students, seed_attendance, Timer
+    _, headers = make_client()
+    from app.main import app
+    ids = seed_students(200)
+    seed_attendance(ids, days=10)
+    paths = ["/", f"/students/{ids[0]}", "/attendance/?limit=20", "/admin/dashboard"]
+
+    async def drive():
+        # ASGI transport: no test-client thread hop per request, so the middleware cost isn't drowned out
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for path in paths:  # warm up
+                await client.get(path, headers=headers)
+            with Timer() as t:
+                for i in range(requests):
+                    r = await client.get(paths[i % len(paths)], headers=headers)
+                    assert r.status_code == 200, r.text
+        return t.elapsed / requests * 1e6
+
+    print(f"{asyncio.run(drive()):.1f}")
+
+
+def micro(iterations: int = 20000):
+    from time import perf_counter
+    from sqlalchemy import create_engine, select
+    import _common  # noqa: F401  puts the repository on sys.path
+    from app.utils import metrics
+
+    async def noop_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def time_app(target) -> float:
+        scope = {"type": "http", "method": "GET", "path": "/"}
+        start = perf_counter()
+        for _ in range(iterations):
+            await target(dict(scope), None, send)
+        return (perf_counter() - start) / iterations * 1e6
+
+    bare = asyncio.run(time_app(noop_app))
+    wrapped = asyncio.run(time_app(metrics.MetricsMiddleware(noop_app)))
+    print(f"middleware    : {wrapped - bare:8.2f} us/request")
+
+    def time_queries(engine) -> float:
+        with engine.connect() as conn:
+            conn.execute(select(1))
+            start = perf_counter()
+            for _ in range(iterations):
+                conn.execute(select(1)).all()
+            return (perf_counter() - start) / iterations * 1e6
+
+    plain = time_queries(create_engine("sqlite://"))
+    instrumented = create_engine("sqlite://")
+    metrics.instrument_engine(instrumented, "bench")
+    print(f"cursor events : {time_queries(instrumented) - plain:8.2f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.requests)
+        return
+
+    results = {"off": [], "on": []}
+    for _ in range(args.rounds):
+        for label, enabled in (("off", "false"), ("on", "true")):
+            env = {**os.environ, "METRICS_ENABLED": enabled}
+            env.pop("DATABASE_URL", None)
+            out = subprocess.run(
+                [sys.executable, __file__, "--run-one", "--requests", str(args.requests)],
+                env=env, cwd=HERE, check=True, capture_output=True, text=True,
+            ).stdout
+            results[label].append(float(out.strip().splitlines()[-1]))
+    best = {label: min(samples) for label, samples in results.items()}
+    for label, samples in results.items():
+        print(f"metrics {label:3}: {best[label]:8.1f} us/request (best of {args.rounds} x {args.requests}; "
+              f"all: {', '.join(f'{s:.0f}' for s in samples)})")
+    delta = best["on"] - best["off"]
+    print(f"overhead  : {delta:8.1f} us/request ({delta / best['off'] * 100:+.1f}%)")
+    micro()
+
+
+if __name__ == "__main__":
+    main()
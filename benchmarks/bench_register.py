@@ -0,0 +1,48 @@
+"""
+Build a class's monthly register by listing the month's attendance and pivoting
+it client-side, versus GET /attendance/register/{class}/{year}/{month}.
+
+    python benchmarks/bench_register.py --class-size 60 --rounds 50
+"""
+import argparse
+from datetime import date
+
+from _common import make_client, seed_students, seed_attendance, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--class-size", type=int, default=60)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    ids = seed_students(args.class_size * args.classes, class_size=args.class_size)
+    seed_attendance(ids, days=90, start=date(2024, 1, 1))
+    params = {"class_name": "C0003", "from_date": "2024-02-01", "to_date": "2024-02-29"}
+
+    with Timer() as pivot:
+        for _ in range(args.rounds):
+            r = client.get("/attendance/", params=params, headers=headers)
+            grid = {}
+            for rec in r.json():
+                grid.setdefault(rec["student_id"], {})[rec["attendance_date"]] = rec["status"]
+    list_bytes = len(r.content)
+
+    results = {}
+    for fmt in ("json", "csv", "xlsx"):
+        with Timer() as t:
+            for _ in range(args.rounds):
+                r = client.get("/attendance/register/C0003/2024/2", params={"format": fmt}, headers=headers)
+                assert r.status_code == 200, r.text
+        results[fmt] = (t.elapsed, len(r.content))
+
+    print(f"one month, class of {args.class_size}, {args.rounds} rounds")
+    print(f"  list + pivot   : {pivot.elapsed / args.rounds * 1000:7.1f} ms  {list_bytes / 1e3:7.1f} kB")
+    for fmt, (elapsed, size) in results.items():
+        print(f"  register {fmt:5} : {elapsed / args.rounds * 1000:7.1f} ms  {size / 1e3:7.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Per-row cost of the GET /students/ and GET /attendance/ listings: the previous path (ORM
+objects, validated one by one through StudentOut / AttendanceOut, encoded with the stdlib
+encoder or Pydantic) against the current one (column tuples turned into dicts, encoded with
+orjson). Both paths list the same rows from the same session. "query" is fetching the ORM
+objects alone, so the rest of "before" is validating and encoding them; "after" includes its
+own, cheaper, fetch of column tuples. The last lines time the routes end to end over HTTP.
+
+    python benchmarks/bench_serialization.py --students 5000 --days 60
+"""
+import argparse
+import asyncio
+import json
+import statistics
+
+from _common import make_client, seed_students, seed_attendance, Timer
+
+
+def median_us_per_row(fn, rows: int, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        with Timer() as t:
+            fn()
+        samples.append(t.elapsed)
+    return statistics.median(samples) / rows * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    ids = seed_students(args.students, class_size=40)
+    seed_attendance(ids, days=args.days)
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from app.api.attendance import _RETURNED, _KEYSET_ORDER, _attendance_out
+    from app.db import models
+    from app.db.base import AsyncSessionLocal
+    from app.schemas.attendance import AttendanceOut
+    from app.schemas.student import StudentOut, student_out
+    from app.utils.cache import invalidate_responses
+    from app.utils.jsonenc import dumps
+
+    S, A = models.Student, models.Attendance
+    attendance_adapter = TypeAdapter(list[AttendanceOut])
+    student_ids = ids[:args.students // 2]  # about half the table
+    marks = select(A).where(A.student_id.in_(student_ids)).order_by(*_KEYSET_ORDER)
+    mark_columns = select(*_RETURNED).where(A.student_id.in_(student_ids)).order_by(*_KEYSET_ORDER)
+    students = select(S).order_by(S.name)
+    student_columns = select(S.id, S.roll_no, S.name, S.class_name, S.photo_path).order_by(S.name)
+
+    loop = asyncio.new_event_loop()
+    session = AsyncSessionLocal()
+
+    def run(coro_fn):
+        return lambda: loop.run_until_complete(coro_fn())
+
+    async def students_query():
+        session.expunge_all()
+        return (await session.scalars(students)).all()
+
+    async def students_before():
+        # response_cache.respond(): json.dumps with jsonable_encoder for the validated models
+        data = [StudentOut.model_validate(s) for s in await students_query()]
+        return json.dumps(data, default=jsonable_encoder, separators=(",", ":")).encode()
+
+    async def students_after():
+        return dumps([student_out(*row) for row in await session.execute(student_columns)])
+
+    async def marks_query():
+        session.expunge_all()
+        return (await session.scalars(marks)).all()
+
+    async def marks_before():
+        # response_model=list[AttendanceOut] on ORM objects: validate each, then serialize
+        return attendance_adapter.dump_json(attendance_adapter.validate_python(await marks_query(), from_attributes=True))
+
+    async def marks_after():
+        return dumps(_attendance_out((await session.execute(mark_columns)).all()))
+
+    n_students = len(ids)
+    n_marks = len(loop.run_until_complete(marks_query()))
+    assert json.loads(loop.run_until_complete(marks_before())) == json.loads(loop.run_until_complete(marks_after()))
+    assert json.loads(loop.run_until_complete(students_before())) == json.loads(loop.run_until_complete(students_after()))
+
+    print(f"{n_students} students, {n_marks} attendance rows listed; median of {args.rounds} rounds, µs per row")
+    print(f"  {'':24}{'query':>10}{'before':>10}{'after':>10}")
+    for label, rows, query, before, after in (
+        ("GET /students/", n_students, students_query, students_before, students_after),
+        ("GET /attendance/", n_marks, marks_query, marks_before, marks_after),
+    ):
+        q = median_us_per_row(run(query), rows, args.rounds)
+        b = median_us_per_row(run(before), rows, args.rounds)
+        a = median_us_per_row(run(after), rows, args.rounds)
+        print(f"  {label:24}{q:10.2f}{b:10.2f}{a:10.2f}   {b / a:.1f}x")
+    loop.run_until_complete(session.close())
+    loop.close()
+
+    print("  end to end, response cache invalidated before each request (ms):")
+    for label, path, params in (
+        ("GET /students/", "/students/", {}),
+        ("GET /attendance/ (class)", "/attendance/", {"class_name": "C0003"}),
+        ("GET /attendance/ (student)", "/attendance/", {"student_id": ids[7]}),
+    ):
+        samples = []
+        for _ in range(args.rounds):
+            invalidate_responses()
+            with Timer() as t:
+                r = client.get(path, params=params, headers=headers)
+            assert r.status_code == 200, r.text
+            samples.append(t.elapsed * 1000)
+        print(f"  {label:28}{statistics.median(samples):10.1f}   {len(r.json())} rows, {len(r.content) / 1e3:.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+N parallel markers against the async /attendance/mark route on SQLite, with and without
+SQLITE_TUNED (WAL + pragmas + group-committing writer queue). Reports p50/p99 latency.
+
+    python benchmarks/bench_sqlite_modes.py --concurrency 64 --requests 3000
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    for label, tuned in (("default", "false"), ("tuned", "true")):
+        env = {**os.environ, "SQLITE_TUNED": tuned}
+        env.pop("DATABASE_URL", None)  # each run gets a fresh temporary database
+        print(f"--- SQLite {label} mode")
+        subprocess.run(
+            [sys.executable, os.path.join(HERE, "load_test.py"), "--only", "async",
+             "--concurrency", str(args.concurrency), "--requests", str(args.requests)],
+            env=env, cwd=HERE, check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
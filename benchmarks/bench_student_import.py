@@ -0,0 +1,60 @@
+"""
+Compare onboarding students through POST /students/ (one request per student)
+against streaming a CSV roster into POST /students/import. The import is timed
+for a fresh roster and again for a re-import (every row takes the update path);
+a final traced re-import reports peak Python heap.
+
+    python benchmarks/bench_student_import.py --rows 100000 --per-row 3000
+"""
+import argparse
+import tracemalloc
+
+from _common import make_client, Timer
+
+
+def roster(rows: int, offset: int = 0, chunk_rows: int = 5000):
+    yield b"roll_no,name,class_name\n"
+    for start in range(offset, offset + rows, chunk_rows):
+        yield "".join(
+            f"R{i:07d},Student {i},{i % 40:02d}\n" for i in range(start, min(start + chunk_rows, offset + rows))
+        ).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--per-row", type=int, default=3000, help="students created one request at a time for the baseline")
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    csv_headers = {**headers, "Content-Type": "text/csv"}
+
+    with Timer() as per_row:
+        for i in range(args.per_row):
+            r = client.post("/students/", json={"roll_no": f"P{i:07d}", "name": f"Student {i}", "class_name": f"{i % 40:02d}"}, headers=headers)
+            assert r.status_code == 201, r.text
+
+    timings = {}
+    for label in ("created", "updated"):
+        with Timer() as t:
+            r = client.post("/students/import", content=roster(args.rows), headers=csv_headers)
+        assert r.status_code == 200 and r.json()["failed"] == 0 and r.json()[label] == args.rows, r.text
+        timings[label] = t.elapsed
+
+    tracemalloc.start()
+    r = client.post("/students/import", content=roster(args.rows), headers=csv_headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert r.status_code == 200, r.text
+
+    print(f"per-row POST /students/ ({args.per_row} students)")
+    print(f"  {per_row.elapsed:8.3f}s  {args.per_row / per_row.elapsed:10.0f} rows/s")
+    print(f"POST /students/import ({args.rows} rows)")
+    for label, elapsed in timings.items():
+        print(f"  {label:8}: {elapsed:8.3f}s  {args.rows / elapsed:10.0f} rows/s")
+    print(f"  peak heap : {peak / 2**20:6.1f} MiB")
+    print(f"  speedup   : {(args.rows / timings['created']) / (args.per_row / per_row.elapsed):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
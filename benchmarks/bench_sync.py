@@ -0,0 +1,71 @@
+"""
+A teacher device reconnecting with a day of offline marks for its class: replaying them as
+individual POST /attendance/mark calls (twice, as after a dropped connection) versus one
+gzip-compressed POST /attendance/sync batch, replayed the same way. Also compares what the
+device downloads afterwards: the whole class history versus the sync delta.
+
+    python benchmarks/bench_sync.py --class-size 60 --days 120
+"""
+import argparse
+import gzip
+import json
+from datetime import date, timedelta
+
+from _common import make_client, seed_students, seed_attendance, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--class-size", type=int, default=60)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--days", type=int, default=120, help="history already on the server")
+    args = parser.parse_args()
+
+    client, headers = make_client()
+    ids = seed_students(args.class_size * args.classes, class_size=args.class_size)
+    start = date(2024, 1, 1)
+    seed_attendance(ids, days=args.days, start=start)
+    roster = ids[:args.class_size]  # class C0000
+    class_name = "C0000"
+
+    def day_marks(day: date, prefix: str) -> list[dict]:
+        return [{"idempotency_key": f"{prefix}-{sid}", "student_id": sid, "status": "present",
+                 "date": day.isoformat(), "marked_at": f"{day.isoformat()}T09:00:00Z"} for sid in roster]
+
+    # per-mark replay: the retry after a dropped connection hits the unique constraint row by row
+    marks = day_marks(start + timedelta(days=args.days), "single")
+    with Timer() as single:
+        for _ in range(2):
+            for m in marks:
+                client.post("/attendance/mark", json={k: m[k] for k in ("student_id", "status", "date")}, headers=headers)
+
+    first = client.post("/attendance/sync", json={"class_name": class_name}, headers=headers).json()
+    while first["has_more"]:
+        first = client.post("/attendance/sync", json={"class_name": class_name, "since": first["watermark"]},
+                            headers=headers).json()
+
+    body = json.dumps({"class_name": class_name, "since": first["watermark"],
+                       "marks": day_marks(start + timedelta(days=args.days + 1), "sync")}).encode()
+    compressed = gzip.compress(body)
+    sync_headers = headers | {"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    with Timer() as batch:
+        for _ in range(2):
+            r = client.post("/attendance/sync", content=compressed, headers=sync_headers)
+            assert r.status_code == 200, r.text
+    delta_bytes = len(r.content)
+    replayed = sum(res["replayed"] for res in r.json()["results"])
+
+    with Timer() as full:
+        r = client.get("/attendance/", params={"class_name": class_name}, headers=headers)
+    full_bytes = len(r.content)
+
+    print(f"class of {args.class_size}, {args.days} days of history, each batch sent twice")
+    print(f"  per-mark POST /mark : {single.elapsed * 1000:8.1f} ms  {2 * len(marks)} requests")
+    print(f"  POST /sync (gzip)   : {batch.elapsed * 1000:8.1f} ms  2 requests, {len(compressed) / 1e3:.1f} kB "
+          f"on the wire ({len(body) / 1e3:.1f} kB raw), {replayed} of {len(roster)} replayed")
+    print(f"  download: full class {full_bytes / 1e3:8.1f} kB ({full.elapsed * 1000:.1f} ms)"
+          f"   sync response {delta_bytes / 1e3:.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Concurrent roll-call load test: N markers each POST /attendance/mark as fast as they can.
+
+Compares the async route (AsyncSession) with the previous sync implementation, which is
+reproduced below as a threadpool-backed route on a separate in-process app.
+
+    python benchmarks/load_test.py --concurrency 32 --requests 2000
+    python benchmarks/load_test.py --url http://localhost:8000 --token <jwt>   # against a live server
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+
+from _common import make_client, seed_students
+
+
+def build_sync_app():
+    from collections import Counter
+    from datetime import datetime, UTC
+    from fastapi import Depends, FastAPI, HTTPException
+    from sqlalchemy import exc
+    from sqlalchemy.orm import Session
+    from app.db import base as db_base, models, summary
+    from app.schemas.attendance import AttendanceMark
+    from app.utils.security import get_current_user
+
+    app = FastAPI()
+
+    @app.post("/attendance/mark")
+    def mark_attendance(payload: AttendanceMark, db: Session = Depends(db_base.get_db), current_user: int = Depends(get_current_user)):
+        student = db.query(models.Student).filter(models.Student.id == payload.student_id).first()
+        if not student:
+            raise HTTPException(404, "Student not found")
+        att_date = payload.date or date.today()
+        try:
+            att = models.Attendance(student_id=payload.student_id, status=payload.status.value, note=payload.note,
+                                    marked_by=current_user, attendance_date=att_date, timestamp=datetime.now(UTC))
+            db.add(att)
+            summary.bump(db, Counter([summary.summary_key(att_date, student.class_name, payload.status)]))
+            db.commit()
+            db.refresh(att)
+            return {"id": att.id}
+        except exc.IntegrityError:
+            db.rollback()
+            raise HTTPException(400, "Attendance already marked for this student on this date")
+
+    return app
+
+
+async def run_load(client, headers, student_ids, first_day, concurrency, total):
+    jobs = asyncio.Queue()
+    for n in range(total):
+        sid = student_ids[n % len(student_ids)]
+        day = first_day + timedelta(days=n // len(student_ids))
+        jobs.put_nowait({"student_id": sid, "status": "present", "date": day.isoformat()})
+    latencies, errors = [], 0
+
+    async def marker():
+        nonlocal errors
+        while not jobs.empty():
+            body = jobs.get_nowait()
+            start = time.perf_counter()
+            r = await client.post("/attendance/mark", json=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(marker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def report(label, stats):
+    print(f"{label:<6} {stats['throughput']:9.0f} req/s   p50 {stats['p50_ms']:8.1f} ms   "
+          f"p99 {stats['p99_ms']:8.1f} ms   errors {stats['errors']}")
+
+
+async def main():
+    import httpx
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--only", choices=("sync", "async"), help="run just one of the in-process apps")
+    parser.add_argument("--url", help="target a running server instead of the in-process apps")
+    parser.add_argument("--token", help="bearer token for --url")
+    args = parser.parse_args()
+
+    if args.url:
+        headers = {"Authorization": f"Bearer {args.token}"}
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            students = (await client.get("/students/", headers=headers)).json()
+            ids = [s["id"] for s in students]
+            report("live", await run_load(client, headers, ids, date(2030, 1, 1), args.concurrency, args.requests))
+        return
+
+    _, headers = make_client()
+    ids = seed_students(args.students)
+    from app.main import app
+
+    print(f"{args.requests} marks, {args.concurrency} concurrent markers")
+    for label, target, first_day in (("sync", build_sync_app(), date(2024, 1, 1)), ("async", app, date(2025, 1, 1))):
+        if args.only and label != args.only:
+            continue
+        transport = httpx.ASGITransport(app=target, raise_app_exceptions=False)  # count 500s as errors
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            report(label, await run_load(client, headers, ids, first_day, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
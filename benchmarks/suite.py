@@ -0,0 +1,343 @@
+"""
+Benchmark suite covering the auth, students, attendance and admin routers.
+
+Seeds a synthetic school (students in classes, one mark per student per day, via direct
+bulk inserts), then drives every scenario below in-process through the ASGI app: first
+sequentially, then with --concurrency clients at once. Per endpoint and mode it records
+throughput, p50/p95/p99 latency, errors and SQL statements per request, plus the peak
+Python memory allocated while serving one request (tracemalloc). Read scenarios invalidate
+the response cache before each request, so they measure the work behind it.
+
+    python benchmarks/suite.py run --students 10000 --days 200 --output before.json
+    python benchmarks/suite.py run --students 10000 --days 200 --output after.json --baseline before.json
+    python benchmarks/suite.py compare before.json after.json [--threshold 0.25]
+
+`run --baseline` and `compare` exit with status 1 when an endpoint regressed: p50, p95 or
+throughput worse by more than --threshold, more queries per request, more errors, or peak
+memory up by more than --threshold.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, UTC
+
+from _common import ROOT, make_client, seed_students, seed_attendance, Timer
+
+START = date(2024, 1, 1)
+LOGIN = {"email": "bench-user@example.com", "password": "bench-password"}
+# noise floors below which a change is never a regression
+MIN_LATENCY_CHANGE_MS = 0.5
+MIN_MEMORY_CHANGE_KIB = 64
+
+
+class Scenario:
+    """One endpoint under test. build(n) returns the httpx request kwargs for the n-th request."""
+
+    def __init__(self, router: str, name: str, method: str, path: str, build, scale: float = 1.0,
+                 status: int = 200, read: bool = True):
+        self.key = f"{router}.{name}"
+        self.method, self.path, self.build = method, path, build
+        self.scale, self.status, self.read = scale, status, read
+        self.counter = itertools.count()  # shared by both modes, so writes never collide
+
+
+def scenarios(ids: list[int], class_size: int, days: int, watermark: str) -> list[Scenario]:
+    classes = len(ids) // class_size
+    cls = "C0001"
+    roster = ids[class_size:2 * class_size]
+    seeded_day = lambda n: START + timedelta(days=n % days)
+    # each write scenario marks its own range of days after the seeded history
+    write_day = lambda base, n, per_day: (START + timedelta(days=days + base + n // per_day)).isoformat()
+
+    def import_csv(n):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["roll_no", "name", "class_name"])
+        writer.writerows((f"IMP{i:05d}", f"Imported {i} v{n}", "IMPORTED") for i in range(200))
+        return {"content": buf.getvalue(), "headers": {"Content-Type": "text/csv"}}
+
+    def sync_batch(n):
+        day = write_day(3000, n, 1)
+        marks = [{"idempotency_key": f"bench-{n}-{sid}", "student_id": sid, "status": "present", "date": day,
+                  "marked_at": f"{day}T09:00:00Z"} for sid in roster]
+        return {"json": {"class_name": cls, "since": watermark, "marks": marks}}
+
+    return [
+        Scenario("auth", "login", "POST", "/auth/login", lambda n: {"json": LOGIN}, scale=0.1, read=False),
+        Scenario("auth", "signup", "POST", "/auth/signup",
+                 lambda n: {"json": {"email": f"bench-{n}@example.com", "password": "bench-password"}},
+                 scale=0.1, status=201, read=False),
+
+        Scenario("students", "list_class", "GET", "/students/", lambda n: {"params": {"class_name": cls}}),
+        Scenario("students", "list_all", "GET", "/students/", lambda n: {}, scale=0.1),
+        Scenario("students", "get", "GET", "/students/{id}", lambda n: {"url": f"/students/{ids[n % len(ids)]}"}),
+        Scenario("students", "create", "POST", "/students/",
+                 lambda n: {"json": {"roll_no": f"NEW{n:07d}", "name": f"New {n}", "class_name": "NEW"}},
+                 status=201, read=False),
+        Scenario("students", "import", "POST", "/students/import", import_csv, scale=0.25, read=False),
+
+        Scenario("attendance", "list_page", "GET", "/attendance/",
+                 lambda n: {"params": {"class_name": cls, "limit": 100}}),
+        Scenario("attendance", "list_student", "GET", "/attendance/",
+                 lambda n: {"params": {"student_id": ids[n % len(ids)]}}),
+        Scenario("attendance", "stream_class", "GET", "/attendance/stream", lambda n: {"params": {"class_name": cls}},
+                 scale=0.25),
+        Scenario("attendance", "export_class", "GET", "/attendance/export", lambda n: {"params": {"class_name": cls}},
+                 scale=0.25),
+        Scenario("attendance", "register", "GET", "/attendance/register/{class}/{year}/{month}",
+                 lambda n: {"url": f"/attendance/register/{cls}/{START.year}/{START.month + n % 3}"}),
+        Scenario("attendance", "mark", "POST", "/attendance/mark",
+                 lambda n: {"json": {"student_id": ids[n % len(ids)], "status": "present",
+                                     "date": write_day(0, n, len(ids))}}, read=False),
+        Scenario("attendance", "put", "PUT", "/attendance/{student_id}/{date}",
+                 lambda n: {"url": f"/attendance/{ids[n % len(ids)]}/{seeded_day(n // len(ids))}",
+                            "json": {"status": ("absent", "present")[n % 2]}}, read=False),
+        Scenario("attendance", "mark_class", "POST", "/attendance/classes/{class}/mark",
+                 lambda n: {"url": f"/attendance/classes/C{n % classes:04d}/mark",
+                            "json": {"date": write_day(1000, n, classes),
+                                     "records": [{"student_id": sid, "status": "present"}
+                                                 for sid in ids[n % classes * class_size:(n % classes + 1) * class_size]]}},
+                 read=False),
+        Scenario("attendance", "sync", "POST", "/attendance/sync", sync_batch, read=False),
+
+        Scenario("admin", "dashboard", "GET", "/admin/dashboard", lambda n: {}),
+        Scenario("admin", "without_photo", "GET", "/admin/students/without-photo", lambda n: {}, scale=0.25),
+        Scenario("admin", "analytics_students", "GET", "/admin/analytics/students", lambda n: {}, scale=0.25),
+        Scenario("admin", "analytics_class", "GET", "/admin/analytics/students", lambda n: {"params": {"class_name": cls}}),
+        Scenario("admin", "analytics_classes", "GET", "/admin/analytics/classes", lambda n: {}, scale=0.25),
+    ]
+
+
+class QueryCounter:
+    """Counts SQL statements on every engine, including ones created later (the SQLite writer's)."""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        self.count = 0
+        event.listen(Engine, "after_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    return sorted_values[max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))]
+
+
+async def send(client, headers, scenario: Scenario, n: int):
+    from app.utils.cache import invalidate_responses
+    if scenario.read:
+        invalidate_responses()
+    kwargs = scenario.build(n)
+    url = kwargs.pop("url", scenario.path)
+    return await client.request(scenario.method, url, headers=headers | kwargs.pop("headers", {}), **kwargs)
+
+
+async def measure(client, headers, scenario: Scenario, requests: int, concurrency: int, queries: QueryCounter) -> dict:
+    latencies, errors = [], []
+    jobs = iter(range(requests))
+
+    async def worker():
+        for _ in jobs:
+            n = next(scenario.counter)
+            start = time.perf_counter()
+            r = await send(client, headers, scenario, n)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if r.status_code != scenario.status:
+                errors.append(f"{r.status_code}: {r.text[:200]}")
+
+    before = queries.count
+    with Timer() as wall:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    if errors:
+        print(f"  {scenario.key}: {len(errors)} unexpected responses, first: {errors[0]}", file=sys.stderr)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "rps": round(requests / wall.elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_per_request": round((queries.count - before) / requests, 2),
+    }
+
+
+async def peak_memory_kib(client, headers, scenario: Scenario) -> float:
+    tracemalloc.start()
+    try:
+        await send(client, headers, scenario, next(scenario.counter))
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args) -> dict:
+    import httpx
+    _, headers = make_client()  # points the app at a fresh database before it is imported
+    from app.main import app
+    from app.db import models
+    from app.db.base import SessionLocal
+    from app.utils.passwords import hash_password
+
+    with Timer() as seeding:
+        ids = seed_students(args.students, class_size=args.class_size)
+        rows = seed_attendance(ids, days=args.days, start=START)
+        with SessionLocal() as db:
+            db.add(models.User(email=LOGIN["email"], hashed_password=hash_password(LOGIN["password"]), is_admin=False))
+            db.commit()
+    print(f"seeded {len(ids)} students x {args.days} days = {rows} rows in {seeding.elapsed:.1f} s", file=sys.stderr)
+
+    queries = QueryCounter()
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)  # count 500s as errors
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            watermark = None
+            while True:  # a device that is up to date with its class before it starts pushing
+                body = (await client.post("/attendance/sync", json={"class_name": "C0001", "since": watermark},
+                                          headers=headers)).json()
+                watermark = body["watermark"]
+                if not body["has_more"]:
+                    break
+            selected = [s for s in scenarios(ids, args.class_size, args.days, watermark)
+                        if not args.only or any(s.key.startswith(prefix) for prefix in args.only)]
+            for scenario in selected:
+                requests = max(2, round(args.requests * scenario.scale))
+                await send(client, headers, scenario, next(scenario.counter))  # warm up
+                entry = {"method": scenario.method, "path": scenario.path}
+                entry["sequential"] = await measure(client, headers, scenario, requests, 1, queries)
+                if args.concurrency > 1:
+                    entry["concurrent"] = await measure(client, headers, scenario, requests, args.concurrency, queries)
+                entry["peak_memory_kib"] = await peak_memory_kib(client, headers, scenario)
+                results[scenario.key] = entry
+                print(f"  {scenario.key:32} p50 {entry['sequential']['p50_ms']:8.2f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "students": args.students,
+            "class_size": args.class_size,
+            "days": args.days,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "endpoints": results,
+    }
+
+
+def print_results(report: dict):
+    meta = report["meta"]
+    print(f"{meta['students']} students x {meta['days']} days, revision {meta['revision']}, "
+          f"{meta['concurrency']} concurrent clients")
+    print(f"{'endpoint':32}{'mode':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}")
+    for key, entry in report["endpoints"].items():
+        for mode in ("sequential", "concurrent"):
+            if mode not in entry:
+                continue
+            m = entry[mode]
+            print(f"{key:32}{mode[:3]:>6}{m['rps']:9.1f}{m['p50_ms']:9.2f}{m['p95_ms']:9.2f}{m['p99_ms']:9.2f}"
+                  f"{m['queries_per_request']:9.2f}{entry['peak_memory_kib'] if mode == 'sequential' else '':>10}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print the change of every endpoint measured in both reports; returns the regressions."""
+    regressions = []
+
+    def check(key: str, metric: str, old: float, new: float, worse: bool, floor: float = 0.0):
+        change = (new - old) / old if old else 0.0
+        regressed = worse and abs(new - old) > floor
+        marker = "  REGRESSION" if regressed else ""
+        if regressed:
+            regressions.append(f"{key} {metric}: {old} -> {new}")
+        print(f"{key:44}{metric:>20}{old:12.2f}{new:12.2f}{change:+9.0%}{marker}")
+
+    print(f"baseline {baseline['meta']['revision']} ({baseline['meta']['created']}) vs "
+          f"{current['meta']['revision']} ({current['meta']['created']}), threshold {threshold:.0%}")
+    differing = [k for k in ("students", "class_size", "days", "requests", "concurrency", "database")
+                 if baseline["meta"].get(k) != current["meta"].get(k)]
+    if differing:
+        print(f"warning: the runs differ in {', '.join(differing)}; their numbers are not comparable")
+    for key, new in current["endpoints"].items():
+        old = baseline["endpoints"].get(key)
+        if old is None:
+            print(f"{key:44}{'(new endpoint)':>20}")
+            continue
+        for mode in ("sequential", "concurrent"):
+            if mode not in old or mode not in new:
+                continue
+            o, n, label = old[mode], new[mode], f"{key} [{mode[:3]}]"
+            for metric in ("p50_ms", "p95_ms"):
+                check(label, metric, o[metric], n[metric], n[metric] > o[metric] * (1 + threshold), MIN_LATENCY_CHANGE_MS)
+            check(label, "rps", o["rps"], n["rps"], n["rps"] < o["rps"] * (1 - threshold))
+            check(label, "queries_per_request", o["queries_per_request"], n["queries_per_request"],
+                  n["queries_per_request"] > o["queries_per_request"], 0.01)
+            check(label, "errors", o["errors"], n["errors"], n["errors"] > o["errors"])
+        check(key, "peak_memory_kib", old["peak_memory_kib"], new["peak_memory_kib"],
+              new["peak_memory_kib"] > old["peak_memory_kib"] * (1 + threshold), MIN_MEMORY_CHANGE_KIB)
+    for key in baseline["endpoints"].keys() - current["endpoints"].keys():
+        print(f"{key:44}{'(not measured)':>20}")
+
+    print(f"{len(regressions)} regressions" + "".join(f"\n  {r}" for r in regressions))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="seed a school, benchmark every endpoint, optionally compare")
+    run.add_argument("--students", type=int, default=10000)
+    run.add_argument("--class-size", type=int, default=40)
+    run.add_argument("--days", type=int, default=200)
+    run.add_argument("--requests", type=int, default=200, help="per endpoint and mode; heavy endpoints run a fraction")
+    run.add_argument("--concurrency", type=int, default=16, help="clients in the concurrent pass (1 skips it)")
+    run.add_argument("--only", nargs="*", help="endpoint prefixes to run, e.g. attendance admin.dashboard")
+    run.add_argument("--output", help="write the results to this JSON file")
+    run.add_argument("--baseline", help="compare against this earlier JSON result")
+    run.add_argument("--threshold", type=float, default=0.25, help="relative change counted as a regression")
+    diff = commands.add_parser("compare", help="compare two JSON results")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f, open(args.current) as g:
+            sys.exit(1 if compare(json.load(f), json.load(g), args.threshold) else 0)
+
+    report = asyncio.run(run_suite(args))
+    print_results(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            sys.exit(1 if compare(json.load(f), report, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
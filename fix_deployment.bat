@@ -31,7 +31,7 @@ echo    git push
 echo.
 echo 2. On Render.com, use these settings:
 echo    Build Command: pip install -r requirements.txt
-echo    Start Command: gunicorn app.main:app --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+echo    Start Command: python manage.py migrate ^&^& gunicorn app.main:app --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
 echo.
 echo 3. Add environment variable:
 echo    SECRET_KEY = (generate with: openssl rand -hex 32)
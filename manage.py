@@ -0,0 +1,99 @@
+"""
+Maintenance commands for the attendance system.
+
+    python manage.py migrate           # create missing tables and indexes, fill an empty summary (run before starting the API)
+    python manage.py rebuild-summary   # recompute daily_class_summary from attendance
+    python manage.py gc-photos         # delete photo files no student references
+    python manage.py prune-sync-log    # forget device sync idempotency keys older than --days (90)
+    python manage.py archive --year Y  # move closed academic year Y out of attendance into ARCHIVE_DIR
+"""
+import argparse
+
+
+def migrate(args):
+    from sqlalchemy import exists, select
+    from app.db.base import SessionLocal, create_schema
+    from app.db import models, summary
+    from app.db.archive import archives
+    create_schema()
+    db = SessionLocal()
+    try:
+        # an upgrade creates daily_class_summary empty; the dashboard reads zeros until it is filled
+        if not db.scalar(select(exists().select_from(summary.Summary))) and db.scalar(select(exists().select_from(models.Attendance))):
+            print(f"daily_class_summary rebuilt: {summary.rebuild(db, archived_until=archives.boundary)} rows")
+    finally:
+        db.close()
+    print("schema up to date")
+
+
+def rebuild_summary(args):
+    from app.db.base import SessionLocal, create_schema
+    from app.db import summary
+    from app.db.archive import archives
+    create_schema()
+    db = SessionLocal()
+    try:
+        rows = summary.rebuild(db, archived_until=archives.boundary)
+    finally:
+        db.close()
+    print(f"daily_class_summary rebuilt: {rows} rows")
+
+
+def gc_photos(args):
+    from app.db.base import SessionLocal
+    from app.db import models
+    from app.utils.photos import sweep_orphans
+    db = SessionLocal()
+    try:
+        referenced = {p for (p,) in db.query(models.Student.photo_path).filter(models.Student.photo_path.isnot(None))}
+    finally:
+        db.close()
+    print(f"removed {sweep_orphans(referenced)} unreferenced photo files")
+
+
+def prune_sync_log(args):
+    from datetime import timedelta
+    from sqlalchemy import delete
+    from app.db.base import SessionLocal
+    from app.db import models
+    cutoff = models.utcnow() - timedelta(days=args.days)
+    db = SessionLocal()
+    try:
+        removed = db.execute(delete(models.SyncOperation).where(models.SyncOperation.created_at < cutoff)).rowcount
+        db.commit()
+    finally:
+        db.close()
+    print(f"removed {removed} sync log entries older than {args.days} days")
+
+
+def archive(args):
+    from app.db.base import SessionLocal
+    from app.db.archive import archive_year
+    db = SessionLocal()
+    try:
+        path, rows = archive_year(db, args.year)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+    finally:
+        db.close()
+    print(f"archived {rows} attendance rows of academic year {args.year} to {path} ({path.stat().st_size / 1e3:.1f} kB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="create missing tables and indexes").set_defaults(func=migrate)
+    commands.add_parser("rebuild-summary", help="recompute the dashboard summary table").set_defaults(func=rebuild_summary)
+    commands.add_parser("gc-photos", help="delete unreferenced photo files").set_defaults(func=gc_photos)
+    prune = commands.add_parser("prune-sync-log", help="delete old device sync idempotency records")
+    prune.add_argument("--days", type=int, default=90, help="keep records newer than this many days")
+    prune.set_defaults(func=prune_sync_log)
+    archive_cmd = commands.add_parser("archive", help="move a closed academic year into the columnar archive")
+    archive_cmd.add_argument("--year", type=int, required=True, help="academic year, named after the calendar year it starts in")
+    archive_cmd.set_defaults(func=archive)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
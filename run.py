@@ -4,6 +4,8 @@ Quick start script for the attendance system
 import uvicorn
 
 if __name__ == "__main__":
+    from app.db.base import create_schema
+    create_schema()
     print("Starting Student Attendance System API...")
     print("API Documentation: http://localhost:8000/docs")
     print("Alternative docs: http://localhost:8000/redoc")
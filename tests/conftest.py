@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+# before any app import: a throwaway database, and SQL profiling that fails on budget overruns
+_workdir = tempfile.mkdtemp(prefix="attendance-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/attendance.db")
+os.environ.setdefault("UPLOAD_DIR", f"{_workdir}/uploads")
+os.environ.setdefault("QUERY_PROFILE", "true")
+os.environ.setdefault("QUERY_PROFILE_STRICT", "true")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Admin-authenticated client over one database shared by every module, with class B1 of 20 students."""
+    from fastapi.testclient import TestClient
+    from app.db import models
+    from app.db.base import SessionLocal, create_schema
+    from app.main import app
+    from app.utils.security import create_access_token
+
+    create_schema()
+    db = SessionLocal()
+    admin = models.User(email="budget-admin@example.com", hashed_password="!", is_admin=True)
+    db.add(admin)
+    db.add_all(models.Student(roll_no=f"B{i:03d}", name=f"Student {i}", class_name="B1") for i in range(20))
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(subject=admin.id)}"}
+    db.close()
+    with TestClient(app) as client:
+        client.headers.update(headers)
+        yield client
+
+
+@pytest.fixture
+def student_ids(client) -> list[int]:
+    """Ids of the students in class B1, by name."""
+    return [s["id"] for s in client.get("/students/", params={"class_name": "B1"}).json()]
@@ -0,0 +1,50 @@
+"""The columnar analytics mirror catches up with writes that commit out of order."""
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy import func, select, update
+
+from app.db import models
+
+
+def test_mirror_picks_up_rows_and_corrections_committed_out_of_order(client, student_ids):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.db.base import ASYNC_SQLALCHEMY_DATABASE_URL, SessionLocal
+    from app.utils.analytics import AttendanceColumns, STATUS_CODES
+
+    A = models.Attendance
+    first, second = student_ids[10], student_ids[11]
+    day = date(2024, 10, 1)
+    columns = AttendanceColumns()
+
+    def status_of(student_id: int, att_date: date):
+        match = (columns.student_ids == student_id) & (columns.days == att_date.toordinal())
+        return next((s for s, code in STATUS_CODES.items() if columns.statuses[match].tolist() == [code]), None)
+
+    async def refresh():
+        engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+        async with AsyncSession(engine) as db:
+            await columns.refresh(db)
+        await engine.dispose()
+
+    now = models.utcnow()
+    with SessionLocal() as db:
+        top = db.scalar(select(func.max(A.id))) or 0
+        # id top + 1 and an earlier timestamp belong to a write still in flight
+        db.add(A(id=top + 2, student_id=first, attendance_date=day, status="present", timestamp=now - timedelta(seconds=1)))
+        db.commit()
+    asyncio.run(refresh())
+    assert status_of(first, day) == "present"
+
+    with SessionLocal() as db:
+        # the in-flight write commits: neither max(id) nor max(timestamp) moves
+        db.add(A(id=top + 1, student_id=second, attendance_date=day, status="absent", timestamp=now - timedelta(seconds=2)))
+        # and so does a correction stamped before the newest change
+        db.execute(update(A).where(A.id == top + 2).values(status="leave", timestamp=now - timedelta(seconds=1, milliseconds=500)))
+        db.commit()
+    asyncio.run(refresh())
+    assert (status_of(second, day), status_of(first, day)) == ("absent", "leave")
+
+    asyncio.run(refresh())  # re-reading the settle window is idempotent
+    assert int(((columns.student_ids == first) & (columns.days == day.toordinal())).sum()) == 1
+    assert columns.watermark == top + 2
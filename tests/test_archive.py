@@ -0,0 +1,60 @@
+"""Closed academic years in the columnar archive are read transparently and can no longer be changed."""
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db import models
+
+
+def test_archived_years_are_read_transparently(client, student_ids, tmp_path, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.db import archive
+    from app.db.base import SessionLocal
+    from app.utils.cache import invalidate_responses
+
+    ids = student_ids[:4]
+    marks = [(sid, f"2019-09-{day:02d}", status) for day in (2, 3, 4) for sid, status in zip(ids, ("present", "absent", "leave", "present"))]
+    marks.append((ids[0], "2020-05-29", "absent"))
+    for sid, day, status in marks:
+        note = "sick" if (sid, day) == (ids[1], "2019-09-03") else None
+        assert client.post("/attendance/mark", json={"student_id": sid, "status": status, "date": day, "note": note}).status_code == 200
+    query = {"student_id": ids[1], "from_date": "2019-06-01", "to_date": "2020-05-31"}
+    before = client.get("/attendance/", params=query).json()
+
+    monkeypatch.setattr(archive.archives, "directory", tmp_path)
+    with SessionLocal() as db:
+        with pytest.raises(ValueError, match="not over"):
+            archive.archive_year(db, date.today().year)
+        path, moved = archive.archive_year(db, 2019, tmp_path)
+        assert moved == len(marks)
+        assert db.scalar(select(func.count()).where(models.Attendance.attendance_date < date(2020, 6, 1))) == 0
+    assert path.stat().st_size < 1024
+    invalidate_responses()
+
+    after = client.get("/attendance/", params=query).json()
+    assert [(r["attendance_date"], r["status"], r["note"]) for r in after] == [(r["attendance_date"], r["status"], r["note"]) for r in before]
+    assert all(r["id"] < 0 and r["timestamp"] is None for r in after)
+
+    # keyset pagination runs on from the table into the archive
+    assert client.post("/attendance/mark", json={"student_id": ids[2], "status": "present", "date": "2020-06-01"}).status_code == 200
+    pages, cursor = [], None
+    while True:
+        r = client.get("/attendance/", params={"class_name": "B1", "to_date": "2020-06-01", "limit": 5} | ({"cursor": cursor} if cursor else {}))
+        pages += r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [(r["student_id"], r["attendance_date"]) for r in pages] == [(ids[2], "2020-06-01")] + sorted(
+        ((sid, day) for sid, day, _ in marks), key=lambda m: (m[1], -m[0]), reverse=True)
+
+    streamed = [json.loads(line) for line in client.get("/attendance/stream", params={"from_date": "2019-09-03", "to_date": "2019-09-03"}).text.splitlines()]
+    assert [r["student_id"] for r in streamed] == sorted(ids)  # within a day, ids descend: student ids ascend
+    exported = list(csv.reader(io.StringIO(client.get("/attendance/export", params={"student_id": ids[1], "to_date": "2019-12-31"}).text)))
+    assert [row[3:7] for row in exported[1:]] == [["B1", "2019-09-04", "absent", ""], ["B1", "2019-09-03", "absent", "sick"], ["B1", "2019-09-02", "absent", ""]]
+
+    stats = client.get("/admin/analytics/students", params={"class_name": "B1", "to_date": "2020-05-31"}).json()
+    assert next(s for s in stats["students"] if s["student_id"] == ids[0])["absent"] == 1
+    assert client.put(f"/attendance/{ids[0]}/2019-09-02", json={"status": "absent"}).status_code == 409
@@ -0,0 +1,122 @@
+"""
+Performance regression gates. Every filter combination accepted by GET /attendance/ and
+GET /attendance/export must be answered through an index, never a full table scan; every
+route must stay within its @query_budget (strict profiling is on, see conftest.py); lazy
+loads in a loop are flagged as N+1; and importing the app must stay cheap. Feature
+behaviour is tested in the per-feature modules next to this one.
+"""
+from datetime import date
+from itertools import product
+
+import pytest
+from sqlalchemy import create_engine, select, text
+
+from app.api.attendance import _after_cursor, _apply_filters, _encode_cursor, _export_statement, _KEYSET_ORDER, _RETURNED
+from app.db import models
+from app.db.base import Base
+
+FILTERS = list(product([None, 5], [None, "10A"], [None, date(2024, 1, 1)], [None, date(2024, 3, 31)]))
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        yield conn
+
+
+def query_plan(conn, stmt) -> list[str]:
+    sql = stmt.compile(conn.engine, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def assert_indexed(plan: list[str], filtered: bool):
+    for step in plan:
+        # an unfiltered listing has to visit every row, but must still do it in index order
+        if filtered:
+            assert not step.startswith("SCAN"), plan
+        else:
+            assert not step.startswith("SCAN") or "USING" in step, plan
+
+
+def list_statement(student_id, class_name, from_date, to_date, cursor=None):
+    stmt = _apply_filters(select(*_RETURNED).join(models.Student), student_id, class_name, from_date, to_date)
+    if cursor:
+        stmt = _after_cursor(stmt, cursor)
+    return stmt.order_by(*_KEYSET_ORDER)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_list_attendance_uses_indexes(conn, filters):
+    assert_indexed(query_plan(conn, list_statement(*filters)), any(filters))
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_list_attendance_next_page_uses_indexes(conn, filters):
+    stmt = list_statement(*filters, cursor=_encode_cursor(date(2024, 2, 1), 1000))
+    assert_indexed(query_plan(conn, stmt), True)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_export_uses_indexes(conn, filters):
+    assert_indexed(query_plan(conn, _export_statement(*filters)), any(filters))
+
+
+# --- per-route query budgets (QUERY_PROFILE_STRICT is on for the suite, see conftest.py) ---
+
+
+def test_write_routes_stay_within_budget(client, student_ids):
+    ids = student_ids
+    records = [{"student_id": sid, "status": "absent"} for sid in ids[1:]]
+    assert client.post("/attendance/mark", json={"student_id": ids[0], "status": "present", "date": "2024-05-02"}).status_code == 200
+    assert client.post("/attendance/mark-bulk", json={"date": "2024-05-02", "records": records}).status_code == 200
+    assert client.post("/attendance/classes/B1/mark", json={"date": "2024-05-03", "records": records}).status_code == 200
+    assert client.post("/students/", json={"roll_no": "B999", "name": "Late Joiner", "class_name": "B1"}).status_code == 201
+
+
+@pytest.mark.parametrize("path", [
+    "/attendance/",
+    "/attendance/?limit=5",
+    "/attendance/stream",
+    "/attendance/export",
+    "/attendance/register/B1/2024/5",
+    "/students/",
+    "/admin/dashboard",
+    "/admin/students/without-photo",
+    "/admin/analytics/students",
+    "/admin/analytics/classes",
+])
+def test_read_routes_stay_within_budget(client, path):
+    # an N+1 regression (e.g. touching Attendance.student per row) raises QueryBudgetExceeded here
+    assert client.get(path).status_code == 200
+
+
+def test_lazy_loading_is_flagged_as_n_plus_one(client):
+    from sqlalchemy.orm import Session
+    from app.db.base import engine
+    from app.utils.profiling import QueryBudgetExceeded, assert_max_queries
+
+    with Session(engine) as db:
+        rows = db.scalars(select(models.Attendance).limit(10)).all()
+        with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+            with assert_max_queries(100):
+                [row.student.name for row in rows]
+
+
+def test_importing_the_app_has_no_side_effects(tmp_path):
+    # a fresh interpreter: this process has already imported everything
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    env = os.environ | {"DATABASE_URL": f"sqlite:///{tmp_path}/boot.db", "UPLOAD_DIR": str(tmp_path / "uploads")}
+    heavy = ["passlib", "jose", "numpy", "xlsxwriter", "PIL"]
+    out = subprocess.run(
+        [sys.executable, "-c", f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"],
+        env=env, cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == "[]"
+    assert not (tmp_path / "boot.db").exists()
+    assert not (tmp_path / "uploads").exists()
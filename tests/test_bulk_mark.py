@@ -0,0 +1,39 @@
+"""Bulk marking: one transaction per batch, with conflicts reported per record instead of failing it."""
+
+
+def test_bulk_mark_reports_conflicts_per_record(client, student_ids):
+    ids = student_ids
+    assert client.post("/attendance/mark", json={"student_id": ids[0], "status": "present", "date": "2024-07-01"}).status_code == 200
+
+    r = client.post("/attendance/mark-bulk", json={"date": "2024-07-01", "records": [
+        {"student_id": ids[0], "status": "absent"},  # already marked that day
+        {"student_id": ids[1], "status": "present"},
+        {"student_id": 999999, "status": "present"},
+        {"student_id": ids[1], "status": "absent"},  # same student and day twice in the batch
+        {"student_id": ids[2], "status": "leave", "date": "2024-07-02", "note": "trip"},
+    ]})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"created": 2, "conflicts": [
+        {"index": 0, "student_id": ids[0], "reason": "Attendance already marked for this student on this date"},
+        {"index": 2, "student_id": 999999, "reason": "Student not found"},
+        {"index": 3, "student_id": ids[1], "reason": "Duplicate entry in batch"},
+    ]}
+    marked = client.get("/attendance/", params={"class_name": "B1", "from_date": "2024-07-01", "to_date": "2024-07-02"}).json()
+    assert sorted((m["student_id"], m["attendance_date"], m["status"], m["note"]) for m in marked) == sorted([
+        (ids[0], "2024-07-01", "present", None), (ids[1], "2024-07-01", "present", None), (ids[2], "2024-07-02", "leave", "trip"),
+    ])
+
+    other_class = client.post("/attendance/classes/B2/mark", json={"date": "2024-07-03", "records": [{"student_id": ids[3], "status": "present"}]})
+    assert other_class.json() == {"created": 0, "conflicts": [{"index": 0, "student_id": ids[3], "reason": "Student is not in class B2"}]}
+
+
+def test_bulk_mark_reads_the_archive_boundary_once(client, student_ids, monkeypatch):
+    from app.db.archive import archives
+
+    stats = []
+    years = archives.years
+    monkeypatch.setattr(archives, "years", lambda: stats.append(1) or years())
+    r = client.post("/attendance/mark-bulk", json={"date": "2024-07-04", "records": [
+        {"student_id": sid, "status": "present"} for sid in student_ids[4:14]
+    ]})
+    assert (r.status_code, r.json()["created"], len(stats)) == (200, 10, 1)
@@ -0,0 +1,17 @@
+"""Cached listings send an ETag and answer a matching If-None-Match with 304 until a write invalidates them."""
+
+
+def test_etag_revalidation_and_invalidation(client):
+    first = client.get("/students/", params={"class_name": "B1"})
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/students/", params={"class_name": "B1"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    assert client.get("/students/", params={"class_name": "B1"}, headers={"If-None-Match": f'"stale", {etag}'}).status_code == 304
+    assert client.get("/students/", params={"class_name": "B2"}, headers={"If-None-Match": etag}).status_code == 200
+
+    assert client.post("/students/", json={"roll_no": "E001", "name": "Zed Etag", "class_name": "B1"}).status_code == 201
+    changed = client.get("/students/", params={"class_name": "B1"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()[-1]["roll_no"] == "E001"
@@ -0,0 +1,63 @@
+"""Attendance corrections: PUT and upsert-mode marks update in place, keep the summary right and are audited."""
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db import models
+
+
+def test_corrections_upsert_in_place_and_are_audited(client, student_ids):
+    from app.db.base import SessionLocal
+
+    ids = student_ids
+    today = date.today().isoformat()
+
+    def counts() -> tuple[int, int, int]:
+        stats = client.get("/admin/dashboard").json()["today"]
+        return stats["total_marked"], stats["present"], stats["absent"]
+
+    before = counts()
+    first = client.put(f"/attendance/{ids[0]}/{today}", json={"status": "absent"})
+    assert first.status_code == 200, first.text
+    fixed = client.put(f"/attendance/{ids[0]}/{today}", json={"status": "present", "note": "arrived late"})
+    assert (fixed.json()["id"], fixed.json()["status"]) == (first.json()["id"], "present")
+    assert counts() == (before[0] + 1, before[1] + 1, before[2])
+
+    mark = {"student_id": ids[1], "status": "absent", "date": today}
+    assert client.post("/attendance/mark", json=mark).status_code == 200
+    assert client.post("/attendance/mark", json=mark | {"status": "present"}).status_code == 400
+    assert client.post("/attendance/mark", params={"on_duplicate": "update"}, json=mark | {"status": "present"}).status_code == 200
+    assert counts() == (before[0] + 2, before[1] + 2, before[2])
+    assert client.put(f"/attendance/999999/{today}", json={"status": "present"}).status_code == 404
+
+    with SessionLocal() as db:
+        trail = db.execute(
+            select(models.AttendanceAudit.student_id, models.AttendanceAudit.status, models.AttendanceAudit.source)
+            .where(models.AttendanceAudit.attendance_date == date.today()).order_by(models.AttendanceAudit.id)
+        ).all()
+    assert trail == [(ids[0], "absent", "put"), (ids[0], "present", "put"),
+                     (ids[1], "absent", "mark"), (ids[1], "present", "mark")]
+
+
+def test_correction_after_a_class_move_keeps_the_summary_consistent(client):
+    from app.db.base import SessionLocal
+
+    today = date.today()
+    before = client.get("/admin/dashboard").json()["today"]
+    sid = client.post("/students/", json={"roll_no": "MV001", "name": "Mover", "class_name": "MV-A"}).json()["id"]
+    assert client.post("/attendance/mark", json={"student_id": sid, "status": "absent", "date": today.isoformat()}).status_code == 200
+
+    moved = client.post("/students/import", content="roll_no,name,class_name\nMV001,Mover,MV-B\n", headers={"Content-Type": "text/csv"})
+    assert moved.json()["updated"] == 1
+    assert client.put(f"/attendance/{sid}/{today}", json={"status": "present"}).status_code == 200
+
+    after = client.get("/admin/dashboard").json()["today"]
+    assert (after["total_marked"], after["present"], after["absent"]) == (
+        before["total_marked"] + 1, before["present"] + 1, before["absent"])
+    assert after["not_marked"] == before["not_marked"]
+    S = models.DailyClassSummary
+    with SessionLocal() as db:
+        slices = dict(((c, s), n) for c, s, n in db.execute(
+            select(S.class_name, S.status, S.count).where(S.attendance_date == today, S.class_name.in_(("MV-A", "MV-B")))
+        ))
+    assert {k: n for k, n in slices.items() if n} == {("MV-B", "present"): 1}
@@ -0,0 +1,23 @@
+"""CSV export, plain and gzip-compressed."""
+import csv
+import gzip
+import io
+
+
+def test_gzip_export_matches_the_plain_csv(client, student_ids):
+    for sid, status in zip(student_ids[:3], ("present", "absent", "leave")):
+        assert client.post("/attendance/mark", json={"student_id": sid, "status": status, "date": "2024-07-08"}).status_code == 200
+    params = {"class_name": "B1", "from_date": "2024-07-08", "to_date": "2024-07-08"}
+
+    plain = client.get("/attendance/export", params=params)
+    packed = client.get("/attendance/export", params=params | {"gzip": "true"})
+    assert plain.headers["content-type"].startswith("text/csv")
+    assert packed.headers["content-type"] == "application/gzip"
+    assert packed.headers["content-disposition"] == "attachment; filename=attendance_export.csv.gz"
+    # the client must not inflate it on the way: the body is the .csv.gz file itself
+    assert "content-encoding" not in packed.headers
+    assert gzip.decompress(packed.content).decode() == plain.text
+
+    rows = list(csv.reader(io.StringIO(plain.text)))
+    assert rows[0] == ["ID", "Roll No", "Student Name", "Class", "Date", "Status", "Note", "Marked At"]
+    assert sorted(row[5] for row in rows[1:]) == ["absent", "leave", "present"]
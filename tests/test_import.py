@@ -0,0 +1,54 @@
+"""POST /students/import: CSV parsing edge cases, per-row errors and non-UTF-8 uploads."""
+from sqlalchemy import select
+
+from app.db import models
+
+CSV = {"Content-Type": "text/csv"}
+
+
+def imported(roll_nos: list[str]) -> dict[str, tuple[str, str | None]]:
+    from app.db.base import SessionLocal
+
+    S = models.Student
+    with SessionLocal() as db:
+        return {r: (n, c) for r, n, c in db.execute(select(S.roll_no, S.name, S.class_name).where(S.roll_no.in_(roll_nos)))}
+
+
+def test_import_handles_crlf_and_quoted_newlines(client):
+    body = '\ufeffroll_no,name,class_name\r\nIM001,"Smith, Ann",I1\r\nIM002,"Two\r\nLines",I1\r\nIM003,"Say ""hi""",I1\r\n\r\n'
+    r = client.post("/students/import", content=body.encode(), headers=CSV)
+    assert r.status_code == 200, r.text
+    assert (r.json()["created"], r.json()["failed"]) == (3, 0)
+    assert imported(["IM001", "IM002", "IM003"]) == {
+        "IM001": ("Smith, Ann", "I1"), "IM002": ("Two\r\nLines", "I1"), "IM003": ('Say "hi"', "I1"),
+    }
+
+
+def test_import_reports_duplicate_and_missing_fields_per_row(client):
+    body = "roll_no,name,class_name\nIM010,Kept,I1\nIM010,Again,I1\n,No Roll,I1\nIM011\nIM012,Fine\n"
+    r = client.post("/students/import", content=body, headers=CSV)
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert (result["created"], result["failed"]) == (2, 3)
+    assert [(e["row"], e["roll_no"]) for e in result["errors"]] == [(3, "IM010"), (4, ""), (5, "IM011")]
+    assert result["errors"][0]["error"] == "Duplicate roll no in file"
+    assert imported(["IM010", "IM012"]) == {"IM010": ("Kept", "I1"), "IM012": ("Fine", None)}
+
+
+def test_import_without_class_name_column_keeps_classes(client):
+    assert client.post("/students/import", content="roll_no,name,class_name\nIM020,First,I2\n", headers=CSV).json()["created"] == 1
+    r = client.post("/students/import", content="name,roll_no\nRenamed,IM020\nNew,IM021\n", headers=CSV)
+    assert (r.json()["created"], r.json()["updated"]) == (1, 1)
+    assert imported(["IM020", "IM021"]) == {"IM020": ("Renamed", "I2"), "IM021": ("New", None)}
+
+    missing = client.post("/students/import", content="roll_no,class_name\nIM022,I2\n", headers=CSV)
+    assert (missing.status_code, missing.json()["detail"]) == (400, "CSV header must include: name")
+
+
+def test_import_reads_windows_1252_and_rejects_undecodable_rows(client):
+    body = "roll_no,name,class_name\nIM030,José Müller,I3\n".encode("cp1252") + b"IM031,Bad \x81 byte,I3\n" + "IM032,Zoë,I3\n".encode()
+    r = client.post("/students/import", content=body, headers=CSV)
+    assert r.status_code == 200, r.text
+    assert (r.json()["created"], r.json()["failed"]) == (2, 1)
+    assert r.json()["errors"] == [{"row": 3, "roll_no": None, "error": "Not UTF-8 or Windows-1252 text"}]
+    assert imported(["IM030", "IM031", "IM032"]) == {"IM030": ("José Müller", "I3"), "IM032": ("Zoë", "I3")}
@@ -0,0 +1,45 @@
+"""The student and attendance listings, built from column tuples, match their response models."""
+from sqlalchemy import select
+
+from app.api.attendance import _KEYSET_ORDER
+from app.db import models
+
+
+def test_listings_match_their_response_models(client, student_ids):
+    from app.db.base import SessionLocal
+    from app.schemas.attendance import AttendanceOut
+    from app.schemas.student import StudentOut
+
+    ids = student_ids
+    client.put(f"/attendance/{ids[2]}/2024-05-06", json={"status": "leave", "note": "fever"})
+    with SessionLocal() as db:
+        students = db.scalars(select(models.Student).where(models.Student.class_name == "B1").order_by(models.Student.name))
+        expected_students = [StudentOut.model_validate(s).model_dump(mode="json") for s in students]
+        marks = db.scalars(select(models.Attendance).where(models.Attendance.student_id == ids[2])
+                           .order_by(*_KEYSET_ORDER))
+        expected_marks = [AttendanceOut.model_validate(a).model_dump(mode="json") for a in marks]
+
+    assert client.get("/students/", params={"class_name": "B1"}).json() == expected_students
+    assert client.get("/attendance/", params={"student_id": ids[2]}).json() == expected_marks
+    page = client.get("/attendance/", params={"student_id": ids[2], "limit": 1})
+    assert page.json() == expected_marks[:1] and page.headers["content-type"] == "application/json"
+    assert ("X-Next-Cursor" in page.headers) == (len(expected_marks) > 1)
+
+
+def test_orjson_response_writes_datetimes_like_response_models():
+    import json
+    from datetime import UTC, datetime
+    from decimal import Decimal
+
+    import numpy as np
+    from pydantic import BaseModel
+
+    from app.utils.jsonenc import ORJSONResponse
+
+    class Row(BaseModel):
+        at: datetime
+
+    at = datetime(2024, 10, 7, 8, 30, tzinfo=UTC)
+    response = ORJSONResponse({"at": at, "rate": Decimal("0.5"), 7: np.int64(3)})
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"at": json.loads(Row(at=at).model_dump_json())["at"], "rate": 0.5, "7": 3}
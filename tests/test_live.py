@@ -0,0 +1,37 @@
+"""The live dashboard feed behind GET /admin/dashboard/stream."""
+from datetime import date
+
+
+def test_live_dashboard_coalesces_deltas_per_listener():
+    import asyncio
+    from collections import Counter
+    from datetime import timedelta
+    from app.utils.live import LiveDashboard
+
+    today = date.today()
+    feed = LiveDashboard(max_listeners=2, resync_seconds=60, heartbeat_seconds=60)
+    loads = []
+
+    async def load():
+        loads.append(today)
+        return today, 10, {"B1": {"present": 1}}
+
+    async def scenario():
+        a, b = feed.subscribe(), feed.subscribe()
+        assert feed.subscribe() is None  # bounded per worker
+        stream = feed.events(a, load)
+        assert (await anext(stream)).startswith('event: snapshot\ndata: {"date":"%s","total_students":10' % today)
+        feed.publish(Counter({(today, "B1", "absent"): 1}))
+        feed.publish(Counter({(today, "B1", "absent"): 1, (today, "B2", "present"): 1, (today - timedelta(days=1), "B1", "leave"): 5}))
+        # two writes, one message: the listener's buffer holds changed classes, not events
+        assert await anext(stream) == (
+            'event: counts\ndata: {"date":"%s","classes":{"B1":{"present":1,"absent":2,"leave":0},'
+            '"B2":{"present":1,"absent":0,"leave":0}}}\n\n' % today
+        )
+        await stream.aclose()
+        assert (b.snapshot, b.dirty) == (True, {"B1", "B2"})
+        feed.unsubscribe(b)
+        feed.publish(Counter({(today, "B1", "absent"): 1}))  # nobody listening: dropped, reloaded on the next connect
+        assert feed.stats()["listeners"] == 0 and len(loads) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+"""Prometheus metrics at GET /metrics: per-route series labelled by route template."""
+import re
+
+
+def sample(text: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_count_requests_by_route_template(client, student_ids):
+    ok = 'http_requests_total{method="GET",route="/students/{student_id}",status="200"}'
+    missing = 'http_requests_total{method="GET",route="<unmatched>",status="404"}'
+    queries = 'http_request_db_queries_count{route="/students/{student_id}"}'
+    before = client.get("/metrics").text
+
+    for sid in student_ids[:3]:
+        assert client.get(f"/students/{sid}").status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    after = client.get("/metrics")
+    assert after.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert sample(after.text, ok) - sample(before, ok) == 3
+    assert sample(after.text, missing) - sample(before, missing) == 1
+    assert sample(after.text, queries) - sample(before, queries) == 3
+    assert "# TYPE http_request_duration_seconds histogram" in after.text
+    assert re.search(r'^response_cache_hits(\{[^}]*\})? \d+', after.text, re.M)
@@ -0,0 +1,42 @@
+"""python manage.py migrate upgrades an existing database in place."""
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def manage(tmp_path, *args: str) -> str:
+    env = os.environ | {"DATABASE_URL": f"sqlite:///{tmp_path}/upgrade.db", "UPLOAD_DIR": str(tmp_path / "uploads"),
+                        "ARCHIVE_DIR": str(tmp_path / "archive")}
+    return subprocess.run([sys.executable, "manage.py", *args], env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def test_migrate_fills_a_summary_table_it_creates(tmp_path):
+    manage(tmp_path, "migrate")
+    with sqlite3.connect(tmp_path / "upgrade.db") as db:
+        # a database from before the summary table, with attendance in it
+        db.execute("DROP TABLE daily_class_summary")
+        db.execute("INSERT INTO students (id, roll_no, name, class_name) VALUES (1, 'U1', 'Upgrade', 'U')")
+        db.executemany("INSERT INTO attendance (student_id, attendance_date, status) VALUES (1, ?, ?)",
+                       [("2024-10-01", "present"), ("2024-10-02", "absent")])
+    assert "daily_class_summary rebuilt: 2 rows" in manage(tmp_path, "migrate")
+    with sqlite3.connect(tmp_path / "upgrade.db") as db:
+        assert db.execute("SELECT attendance_date, class_name, status, count FROM daily_class_summary ORDER BY 1").fetchall() == [
+            ("2024-10-01", "U", "present", 1), ("2024-10-02", "U", "absent", 1),
+        ]
+    assert "rebuilt" not in manage(tmp_path, "migrate")
+
+
+def test_migrate_drops_indexes_made_redundant_by_composites(tmp_path):
+    manage(tmp_path, "migrate")
+    with sqlite3.connect(tmp_path / "upgrade.db") as db:
+        db.execute("CREATE INDEX ix_attendance_attendance_date ON attendance (attendance_date)")
+        db.execute("CREATE INDEX ix_students_class_name ON students (class_name)")
+    manage(tmp_path, "migrate")
+    with sqlite3.connect(tmp_path / "upgrade.db") as db:
+        indexes = {name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"ix_attendance_date_student", "ix_students_class_id"} <= indexes
+    assert not indexes & {"ix_attendance_attendance_date", "ix_students_class_name"}
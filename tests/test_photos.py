@@ -0,0 +1,115 @@
+"""Photo uploads: content-addressed storage, background thumbnails, caching headers and a crashed worker pool."""
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def png(color: str, size: tuple[int, int] = (300, 200), mode: str = "RGB") -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+def upload(client, student_id: int, body: bytes, filename: str = "photo.png"):
+    return client.post(f"/students/{student_id}/upload-photo", files={"file": (filename, body, "image/png")})
+
+
+def test_upload_dedups_generates_thumbnails_and_revalidates(client, student_ids):
+    first, second = student_ids[12], student_ids[13]
+    body = png("red")
+    r = upload(client, first, body)
+    assert r.status_code == 200, r.text
+    photo_path = Path(r.json()["photo_path"])
+    assert photo_path.read_bytes() == body
+    # identical content is stored once and shared
+    assert Path(upload(client, second, body, "copy.png").json()["photo_path"]) == photo_path
+    assert [p.name for p in photo_path.parent.glob(f"{photo_path.stem}*")] == [photo_path.name]
+    assert upload(client, first, b"GIF89a", "notes.txt").status_code == 400
+
+    # variants are named by content hash, so the URL is known before the pipeline has written them
+    student = client.get(f"/students/{first}").json()
+    assert student["thumbnail_url"] == f"/students/{first}/photo?size=thumb&v={photo_path.stem[:16]}"
+    deadline = time.monotonic() + 60
+    while not Path(student["thumbnail_path"]).exists():
+        assert time.monotonic() < deadline, "thumbnail was never generated"
+        time.sleep(0.1)
+    thumb = client.get(student["thumbnail_url"])
+    assert (thumb.status_code, thumb.headers["content-type"]) == (200, "image/webp")
+    assert "immutable" in thumb.headers["cache-control"]
+    assert Image.open(io.BytesIO(thumb.content)).size == (128, 85)
+
+    original = client.get(student["photo_url"])
+    assert original.content == body
+    for r in (thumb, original):
+        again = client.get(r.url, headers={"If-None-Match": r.headers["etag"]})
+        assert (again.status_code, again.content) == (304, b"")
+
+
+def test_pipeline_replaces_a_broken_worker_pool(tmp_path):
+    from app.utils import imaging, photos
+
+    original = tmp_path / "0123456789abcdef.png"
+    original.write_bytes(png("blue"))
+    pipeline = photos.PhotoPipeline(1)
+
+    async def run():
+        broken = ProcessPoolExecutor(1)
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+        pipeline._pool = broken
+        pipeline.schedule(original)
+        await pipeline.drain()
+        return broken
+
+    try:
+        broken = asyncio.run(run())
+        assert pipeline._pool is not broken
+        assert all(imaging.variant_path(photos.VARIANTS_DIR, original.stem, name).exists() for name in imaging.VARIANTS)
+    finally:
+        pipeline.shutdown()
+
+
+def test_variants_refuse_images_over_the_pixel_cap(tmp_path):
+    from app.utils import imaging
+
+    original = tmp_path / "huge.png"
+    original.write_bytes(png(1, (8000, 6000), mode="1"))
+    with pytest.raises(ValueError, match="exceeds"):
+        imaging.make_variants(str(original), str(tmp_path), "huge")
+    assert not list(tmp_path.glob("*.webp"))
+
+
+def test_photo_range_requests_get_partial_content(client, student_ids):
+    body = png("green")
+    student = upload(client, student_ids[14], body).json()
+    r = client.get(student["photo_url"], headers={"Range": "bytes=0-9"})
+    assert r.status_code == 206, r.text
+    assert (r.headers["content-range"], r.content) == (f"bytes 0-9/{len(body)}", body[:10])
+    tail = client.get(student["photo_url"], headers={"Range": "bytes=-4"})
+    assert (tail.status_code, tail.content) == (206, body[-4:])
+    assert client.get(student["photo_url"], headers={"Range": f"bytes={len(body)}-"}).status_code == 416
+
+
+def test_thumbnail_url_serves_the_original_until_the_variant_exists(client, student_ids):
+    from app.db.base import SessionLocal
+    from app.db import models
+    from app.utils import photos
+
+    body = png("yellow")
+    pending = photos.UPLOAD_DIR / f"{'f' * 64}.png"
+    pending.write_bytes(body)  # stored, but no variants generated
+    with SessionLocal() as db:
+        db.get(models.Student, student_ids[15]).photo_path = str(pending)
+        db.commit()
+    student = client.get(f"/students/{student_ids[15]}").json()
+    assert student["thumbnail_url"] is not None and not Path(student["thumbnail_path"]).exists()
+    r = client.get(student["thumbnail_url"])
+    assert (r.status_code, r.content, r.headers["cache-control"]) == (200, body, photos.REVALIDATE)
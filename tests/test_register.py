@@ -0,0 +1,29 @@
+"""Monthly class register: one row per student, one digit (JSON) or letter (CSV) per day."""
+import csv
+import io
+
+
+def test_monthly_register(client, student_ids):
+    ids = student_ids
+    for sid, day, status in ((ids[0], "2024-08-01", "present"), (ids[0], "2024-08-02", "absent"), (ids[1], "2024-08-31", "leave")):
+        assert client.post("/attendance/mark", json={"student_id": sid, "status": status, "date": day}).status_code == 200
+
+    register = client.get("/attendance/register/B1/2024/8").json()
+    assert (register["days"], register["legend"]) == (31, [None, "present", "absent", "leave"])
+    rows = {s["student_id"]: s for s in register["students"]}
+    assert set(ids) <= set(rows)
+    assert rows[ids[0]]["marks"] == "12" + "0" * 29
+    assert (rows[ids[0]]["present"], rows[ids[0]]["absent"], rows[ids[0]]["leave"]) == (1, 1, 0)
+    assert rows[ids[1]]["marks"] == "0" * 30 + "3"
+    assert rows[ids[2]]["marks"] == "0" * 31
+    assert (register["daily"]["present"][0], register["daily"]["absent"][1], register["daily"]["leave"][30]) == (1, 1, 1)
+
+    r = client.get("/attendance/register/B1/2024/8", params={"format": "csv"})
+    assert r.headers["content-disposition"] == "attachment; filename=register_B1_2024-08.csv"
+    table = list(csv.reader(io.StringIO(r.text)))
+    assert table[0][:4] == ["Roll No", "Student Name", "1", "2"] and table[0][-3:] == ["Present", "Absent", "Leave"]
+    first = next(row for row in table[1:] if row[1] == rows[ids[0]]["name"])
+    assert first[2:4] == ["P", "A"] and first[-3:] == ["1", "1", "0"]
+
+    assert client.get("/attendance/register/NO-SUCH-CLASS/2024/8").status_code == 404
+    assert client.get("/attendance/register/B1/2024/13").status_code == 422
@@ -0,0 +1,75 @@
+"""Password hashing pool recovery, the admin claim setting and the admin authorization cache."""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+
+def test_password_hasher_replaces_a_broken_pool():
+    from app.utils import passwords
+    from app.utils.security import PasswordHasher
+
+    hasher = PasswordHasher(1, 4)
+    broken = ProcessPoolExecutor(1)
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+    hasher._pool = broken
+    try:
+        hashed = asyncio.run(hasher.hash("s3cret"))
+        assert passwords.verify_password("s3cret", hashed)
+        assert hasher._pool is None
+        assert asyncio.run(hasher.verify("s3cret", hashed))
+        assert hasher._pool is not None and hasher._pool is not broken
+        assert hasher.stats()["completed"] == 2
+    finally:
+        hasher.shutdown()
+
+
+def test_admin_claim_is_ignored_unless_enabled(client, monkeypatch):
+    from jose import jwt
+    from app.core.config import ALGORITHM, SECRET_KEY
+    from app.db import models
+    from app.db.base import SessionLocal
+    from app.utils import security
+    from app.utils.passwords import hash_password
+
+    with SessionLocal() as db:
+        user = models.User(email="claims-teacher@example.com", hashed_password=hash_password("x", 4), is_admin=False)
+        db.add(user); db.commit()
+        user_id = user.id
+    forged = jwt.encode({"sub": str(user_id), "adm": True}, SECRET_KEY, algorithm=ALGORITHM)
+    headers = {"Authorization": f"Bearer {forged}"}
+
+    monkeypatch.setattr(security, "ADMIN_CLAIM_IN_TOKEN", False)
+    assert client.get("/admin/dashboard", headers=headers).status_code == 403
+    monkeypatch.setattr(security, "ADMIN_CLAIM_IN_TOKEN", True)
+    assert client.get("/admin/dashboard", headers=headers).status_code == 200
+
+
+def test_auth_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    from types import SimpleNamespace
+    from app.utils import security
+
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(security, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    cache = security.AuthCache(ttl=60, max_entries=2)
+
+    cache.set(1, True)
+    cache.set(2, False)
+    assert cache.get(1) == (True, True)  # 1 is now the most recently used
+    cache.set(3, None)
+    assert (cache.get(2), cache.get(3), cache.stats()["size"]) == ((False, None), (True, None), 2)
+
+    clock.now += 59
+    assert cache.get(1) == (True, True)
+    clock.now += 1
+    assert cache.get(1) == (False, None)
+    assert cache.stats() == {"hits": 3, "misses": 2, "hit_rate": 0.6, "size": 1}
+
+    cache.invalidate(3)
+    assert cache.get(3) == (False, None)
+    disabled = security.AuthCache(ttl=0, max_entries=2)
+    disabled.set(1, True)
+    assert disabled.get(1) == (False, None)
@@ -0,0 +1,38 @@
+"""Offline device sync: idempotent replays, conflict policies and delta downloads."""
+
+
+def test_sync_is_idempotent_and_returns_deltas(client, student_ids):
+    import gzip
+    import json
+
+    ids = student_ids
+
+    def sync(body: dict) -> dict:
+        r = client.post("/attendance/sync", content=gzip.compress(json.dumps(body).encode()),
+                        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"})
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    def day_stats(student_id: int) -> dict:
+        rows = client.get("/admin/analytics/students", params={"class_name": "B1", "from_date": "2024-06-03", "to_date": "2024-06-03"}).json()
+        return next(s for s in rows["students"] if s["student_id"] == student_id)
+
+    first = sync({"class_name": "B1"})
+    marks = [{"idempotency_key": f"k{i}", "student_id": sid, "status": "present", "date": "2024-06-03",
+              "marked_at": "2024-06-03T09:00:00Z"} for i, sid in enumerate(ids[:3])]
+    pushed = sync({"class_name": "B1", "since": first["watermark"], "marks": marks})
+    assert [r["outcome"] for r in pushed["results"]] == ["created"] * 3
+    assert {r["attendance_id"] for r in pushed["results"]} <= {c["id"] for c in pushed["changes"]}
+    assert day_stats(ids[0])["present"] == 1
+
+    replay = sync({"class_name": "B1", "since": first["watermark"], "marks": marks})
+    assert [(r["outcome"], r["replayed"]) for r in replay["results"]] == [("created", True)] * 3
+    assert [r["attendance_id"] for r in replay["results"]] == [r["attendance_id"] for r in pushed["results"]]
+
+    later = {**marks[0], "idempotency_key": "k-later", "status": "absent", "marked_at": "2024-06-03T10:00:00Z"}
+    earlier = {**marks[1], "idempotency_key": "k-earlier", "status": "absent", "marked_at": "2024-06-03T08:00:00Z"}
+    assert sync({"marks": [later]})["results"][0]["outcome"] == "rejected"  # default policy keeps the server's mark
+    lww = sync({"policy": "last_writer_wins", "marks": [{**later, "idempotency_key": "k-later-lww"}, earlier]})
+    assert [r["outcome"] for r in lww["results"]] == ["updated", "rejected"]
+    # the analytics mirror picks up the corrected status, not just new rows
+    assert (day_stats(ids[0])["present"], day_stats(ids[0])["absent"]) == (0, 1)
@@ -0,0 +1,58 @@
+"""
+DateTime columns hold naive UTC. asyncpg, the PostgreSQL driver, encodes a `timestamp` parameter
+as `value - datetime(2000, 1, 1)`, which raises TypeError for an aware datetime; every write path
+is run here and its datetime parameters put through that same encoding step.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+pgproto = pytest.importorskip("asyncpg.pgproto.pgproto")
+
+
+def datetimes(params):
+    if isinstance(params, datetime):
+        yield params
+    elif isinstance(params, dict):
+        for value in params.values():
+            yield from datetimes(value)
+    elif isinstance(params, (list, tuple)):
+        for value in params:
+            yield from datetimes(value)
+
+
+def test_write_paths_bind_naive_utc_timestamps(client, student_ids):
+    bound = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # the values before the dialect's bind processing (SQLite's turns datetimes into strings)
+        bound.extend(datetimes(context.compiled_parameters if context.compiled else parameters))
+
+    ids = student_ids
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        assert client.post("/attendance/mark", json={"student_id": ids[4], "status": "present", "date": "2024-09-02"}).status_code == 200
+        assert client.post("/attendance/mark", params={"on_duplicate": "update"},
+                           json={"student_id": ids[4], "status": "absent", "date": "2024-09-02"}).status_code == 200
+        assert client.put(f"/attendance/{ids[5]}/2024-09-02", json={"status": "leave"}).status_code == 200
+        assert client.post("/attendance/mark-bulk", json={"date": "2024-09-03", "records": [
+            {"student_id": ids[4], "status": "present"}, {"student_id": ids[5], "status": "absent", "note": "flu"},
+        ]}).status_code == 200
+        synced = client.post("/attendance/sync", json={"policy": "last_writer_wins", "marks": [
+            {"idempotency_key": "tz-1", "student_id": ids[6], "status": "present", "date": "2024-09-04", "marked_at": "2024-09-04T09:00:00+02:00"},
+            {"idempotency_key": "tz-2", "student_id": ids[4], "status": "leave", "date": "2024-09-03", "marked_at": "2099-01-01T00:00:00Z"},
+        ]})
+        assert [r["outcome"] for r in synced.json()["results"]] == ["created", "updated"]
+        since = client.post("/attendance/sync", json={}).json()["watermark"]
+        assert client.post("/attendance/sync", json={"since": since}).status_code == 200
+        assert client.post("/auth/signup", json={"email": "naive-utc@example.com", "password": "s3cret-pass"}).status_code == 201
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+
+    assert bound, "no datetime parameters were captured"
+    for value in bound:
+        value - pgproto.pg_epoch_datetime  # asyncpg's timestamp_encode
+    # device clocks are normalized to UTC too
+    assert datetime(2024, 9, 4, 7, 0) in bound
@@ -0,0 +1,38 @@
+"""The SQLite group-commit write queue commits everything queued before it shuts down."""
+import asyncio
+
+from sqlalchemy import insert, select
+
+from app.db import models
+
+
+def test_write_queue_drains_on_shutdown(client):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.db.base import ASYNC_SQLALCHEMY_DATABASE_URL, SessionLocal
+    from app.db.writer import WriteQueue
+
+    S = models.Student
+    queue = WriteQueue(enabled=True, batch_max=2, batch_wait=0.05)
+
+    def job(n: int):
+        async def write(wdb: AsyncSession):
+            await wdb.execute(insert(S).values(roll_no=f"WQ{n:03d}", name=f"Queued {n}", class_name="WQ"))
+            return n
+        return write
+
+    async def run():
+        engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+        async with AsyncSession(engine) as db:
+            first = await queue.run(db, job(0))
+            pending = [asyncio.create_task(queue.run(AsyncSession(engine), job(n))) for n in range(1, 6)]
+            await asyncio.sleep(0)  # queued, still waiting out batch_wait
+            await queue.shutdown()
+            assert all(task.done() for task in pending)
+            results = [first, *[task.result() for task in pending]]
+        await engine.dispose()
+        return results
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4, 5]
+    assert queue._task is None and queue.batches == 4
+    with SessionLocal() as db:
+        assert db.scalars(select(S.roll_no).where(S.class_name == "WQ").order_by(S.roll_no)).all() == [f"WQ{n:03d}" for n in range(6)]